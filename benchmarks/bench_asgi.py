@@ -0,0 +1,157 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Final, List
+
+from environment import Timer
+
+"""
+Compares the throughput and latency of the Identifier API served by gunicorn's synchronous workers
+(wsgi:app, as in supervisord.conf) with the same number of uvicorn workers serving asgi:app, under
+--concurrency clients that each mint an identifier, check that it exists, and read its current data
+in a loop for --seconds:
+
+    python benchmarks/bench_asgi.py --workers 5 --concurrency 64 --seconds 20
+
+Both servers must be installed (pip install gunicorn uvicorn), and both share the benchmark's data
+directory, so it's best pointed (with IDENTIFIER_DATA_PATH) at the kind of disk used in production.
+"""
+
+ROOT: Final[Path] = Path(__file__).parent.parent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+    environment = dict(
+        os.environ, PYTHONPATH=os.pathsep.join([str(Path(ROOT, "src")), str(ROOT)])
+    )
+    servers = {
+        "gunicorn wsgi:app": [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--workers",
+            str(args.workers),
+            "--bind",
+            "127.0.0.1:{port}",
+            "wsgi:app",
+        ],
+        "uvicorn asgi:app": [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--workers",
+            str(args.workers),
+            "--port",
+            "{port}",
+            "--log-level",
+            "warning",
+            "asgi:app",
+        ],
+    }
+    for label, command in servers.items():
+        port: int = _free_port()
+        server = subprocess.Popen(
+            [part.format(port=port) for part in command],
+            cwd=ROOT,
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_until_listening(port=port)
+            timer, elapsed = _load(
+                port=port, concurrency=args.concurrency, seconds=args.seconds
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        print(timer.report(label))
+        print(f"{'':<32} throughput={len(timer.samples) / elapsed:.1f} requests/s")
+
+
+def _load(port: int, concurrency: int, seconds: float):
+    timer: Timer = Timer()
+    errors: List[str] = []
+    deadline: float = time.perf_counter() + seconds
+
+    def client() -> None:
+        while time.perf_counter() < deadline:
+            status, body = _get(port=port, path="/identifier/new", timer=timer)
+            if status != 201:
+                errors.append(body)
+                continue
+            identifier: str = body.split('"')[3]
+            for path in (
+                f"/identifier/exists/{identifier}",
+                f"/identifier/exists/{random.getrandbits(128):032x}",
+            ):
+                _get(port=port, path=path, timer=timer)
+
+    start: float = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        print(f"{len(errors)} requests failed, e.g. {errors[0]}")
+    return timer, time.perf_counter() - start
+
+
+def _get(port: int, path: str, timer: Timer):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        with timer.time():
+            connection.request("GET", path)
+            response = connection.getresponse()
+            body: str = response.read().decode()
+        return response.status, body
+    finally:
+        connection.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_until_listening(port: int) -> None:
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"The server on port {port} didn't start.")
+
+
+if __name__ == "__main__":
+    main()
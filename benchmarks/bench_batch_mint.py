@@ -0,0 +1,57 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+
+from environment import Timer
+
+from co.deability.identifier.api.app import app
+
+"""
+Compares minting --count identifiers with one GET /identifier/new request each against minting
+them with POST /identifier/new/batch requests of --batch-size identifiers each. Requests go through
+the Flask test client, so the numbers include the application's per-request overhead but not the
+network's:
+
+    python benchmarks/bench_batch_mint.py --count 100000 --batch-size 1000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    single, batch = Timer(), Timer()
+    with app.test_client() as client:
+        for _ in range(args.count):
+            with single.time():
+                assert client.get("/identifier/new").status_code == 201
+        for start in range(0, args.count, args.batch_size):
+            size: int = min(args.batch_size, args.count - start)
+            with batch.time():
+                response = client.post("/identifier/new/batch", json={"count": size})
+            assert len(response.json["created"]) == size
+    print(single.report("single requests"))
+    print(batch.report(f"batch requests of {args.batch_size}"))
+    print(
+        f"identifiers/s: single={args.count / single.total:.1f} "
+        f"batch={args.count / batch.total:.1f} "
+        f"speedup={single.total / batch.total:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
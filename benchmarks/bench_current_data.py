@@ -0,0 +1,66 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import os
+from pathlib import Path
+
+from environment import Timer
+
+from co.deability.identifier.api.repositories.id_repository_type import IdRepositoryType
+from co.deability.identifier.api.repositories.uuid_repository import (
+    CURRENT_FILE,
+    UuidRepository,
+)
+
+"""
+Measures UuidRepository.get_current_data for an identifier with --versions data files, both through
+the "current" pointer maintained by add_data and through the directory listing that's used when the
+pointer is absent:
+
+    python benchmarks/bench_current_data.py --versions 10000 --reads 1000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--versions", type=int, default=10000)
+    parser.add_argument("--reads", type=int, default=1000)
+    args = parser.parse_args()
+    base_path: Path = Path(os.environ["IDENTIFIER_DATA_PATH"])
+    writer = UuidRepository(
+        repository_type=IdRepositoryType.WRITER, base_path=base_path
+    )
+    identifier: str = writer.create_id()
+    writes = Timer()
+    for version in range(args.versions):
+        with writes.time():
+            writer.add_data(data={"version": version}, identifier=identifier)
+    print(writes.report("add_data"))
+    expected: dict = writer.get_current_data(identifier=identifier)
+    pointer, listing = Timer(), Timer()
+    for _ in range(args.reads):
+        with pointer.time():
+            assert writer.get_current_data(identifier=identifier) == expected
+    Path(writer._path_calculator(identifier=identifier), CURRENT_FILE).unlink()
+    for _ in range(args.reads):
+        with listing.time():
+            assert writer.get_current_data(identifier=identifier) == expected
+    print(pointer.report("current via pointer"))
+    print(listing.report("current via listing"))
+
+
+if __name__ == "__main__":
+    main()
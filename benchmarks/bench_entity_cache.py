@@ -0,0 +1,63 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import random
+
+from environment import Timer
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories.entities import entity_repository
+
+"""
+Measures entity_repository.read_entity for --reads random reads of --entities entities (each
+updated once, so that reads by the first identifier go through the lineage), with and without the
+shared entity cache:
+
+    python benchmarks/bench_entity_cache.py --entities 10000 --reads 100000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--reads", type=int, default=100000)
+    args = parser.parse_args()
+    identifiers = []
+    for number in range(args.entities):
+        identifier: str = entity_repository.create_entity(
+            entity={"number": number, "name": f"entity {number}", "tags": ["a", "b"]}
+        )
+        entity_repository.update_entity(
+            identifier=identifier,
+            entity={"number": number, "name": f"entity {number}", "tags": ["c"]},
+        )
+        identifiers.append(identifier)
+    reads = [random.choice(identifiers) for _ in range(args.reads)]
+    uncached, cached = Timer(), Timer()
+    for identifier in reads:
+        with uncached.time():
+            entity_repository.read_entity(identifier=identifier)
+    config.ENTITY_CACHE_SIZE = 64 * 1024 * 1024
+    for identifier in reads:
+        with cached.time():
+            entity_repository.read_entity(identifier=identifier)
+    print(uncached.report("read_entity from disk"))
+    print(cached.report("read_entity with cache"))
+    print(f"speedup={uncached.total / cached.total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+from pathlib import Path
+from typing import List
+
+from environment import Timer
+
+from co.deability.identifier.api import repositories
+from co.deability.identifier.api.repositories import entities
+from co.deability.identifier.api.repositories.entities import entity_repository
+
+"""
+Updates a single entity --updates times and then times finding its current version from its first
+identifier, both through its lineage (entity_repository.latest_identifier) and by following the
+links from each version's data file to the next, one at a time (the chain is too long for
+os.path.realpath), which is how versions were resolved before
+lineages were recorded. Update times are reported for the first and last hundred updates, to show
+that an update's cost doesn't grow with the number of versions:
+
+    python benchmarks/bench_entity_versions.py --updates 1000 --reads 1000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=1000)
+    args = parser.parse_args()
+    first_identifier: str = entity_repository.create_entity(entity={"version": 0})
+    identifiers: List[str] = [first_identifier]
+    updates = Timer()
+    for version in range(1, args.updates + 1):
+        with updates.time():
+            identifiers.append(
+                entity_repository.update_entity(
+                    identifier=identifiers[-1], entity={"version": version}
+                )
+            )
+    first_updates, last_updates = Timer(), Timer()
+    first_updates.samples = updates.samples[:100]
+    last_updates.samples = updates.samples[-100:]
+    print(first_updates.report("first 100 updates"))
+    print(last_updates.report("last 100 updates"))
+    first_data_path: Path = next(
+        entities.get_data_file_paths(identifier=first_identifier)
+    )
+    lineage, links = Timer(), Timer()
+    for _ in range(args.reads):
+        with lineage.time():
+            latest: str = entity_repository.latest_identifier(
+                identifier=first_identifier
+            )
+        assert latest == identifiers[-1]
+    for _ in range(args.reads):
+        with links.time():
+            linked_path: Path = first_data_path
+            while linked_path.is_symlink():
+                linked_path = linked_path.readlink()
+            linked: str = repositories.calculate_identifier(
+                identifier_path=linked_path.parent
+            )
+        assert linked == identifiers[-1]
+    print(lineage.report("latest via lineage"))
+    print(links.report("latest via links"))
+
+
+if __name__ == "__main__":
+    main()
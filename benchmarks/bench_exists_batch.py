@@ -0,0 +1,81 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import random
+import uuid
+from typing import List
+
+from environment import Timer
+
+from co.deability.identifier.api.app import app
+from co.deability.identifier.api.services import id_service
+
+"""
+Compares checking the existence of --count identifiers, half of which exist, with one
+GET /identifier/exists/<identifier> request each against checking them with
+POST /identifier/exists/batch requests of --batch-size identifiers each. The identifiers are
+created beforehand (untimed.) Requests go through the Flask test client, so the numbers include the
+application's per-request overhead but not the network's:
+
+    python benchmarks/bench_exists_batch.py --count 100000 --batch-size 10000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+    identifiers: List[str] = []
+    while len(identifiers) < args.count // 2:
+        identifiers.extend(
+            id_service.create_new_ids(
+                count=min(1000, args.count // 2 - len(identifiers))
+            )["created"]
+        )
+    identifiers.extend(uuid.uuid4().hex for _ in range(args.count - len(identifiers)))
+    random.shuffle(identifiers)
+    single, batch = Timer(), Timer()
+    with app.test_client() as client:
+        found: int = 0
+        for identifier in identifiers:
+            with single.time():
+                response = client.get(f"/identifier/exists/{identifier}")
+            found += response.json[f"{identifier} exists"]
+        assert found == args.count // 2
+        # The single requests filled the existence cache; start the batches from a cold one.
+        for identifier in identifiers:
+            id_service._get_reader()._exists_cache.invalidate(identifier)
+        found = 0
+        for start in range(0, args.count, args.batch_size):
+            with batch.time():
+                response = client.post(
+                    "/identifier/exists/batch",
+                    json=identifiers[start : start + args.batch_size],
+                )
+            found += sum(response.json["exists"].values())
+        assert found == args.count // 2
+    print(single.report("single requests"))
+    print(batch.report(f"batch requests of {args.batch_size}"))
+    print(
+        f"identifiers/s: single={args.count / single.total:.1f} "
+        f"batch={args.count / batch.total:.1f} "
+        f"speedup={single.total / batch.total:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
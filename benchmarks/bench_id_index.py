@@ -0,0 +1,74 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import random
+import time
+import uuid
+
+from environment import Timer
+
+from co.deability.identifier import config
+from co.deability.identifier.api import repositories
+
+"""
+Creates --identifiers identifier directories, then measures repositories.identifier_exists for
+--checks random identifiers (half of which exist) by directory lookup, with the Bloom filter, and
+with the sorted identifier index:
+
+    python benchmarks/bench_id_index.py --identifiers 100000 --checks 100000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--identifiers", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=100000)
+    args = parser.parse_args()
+    identifiers = [uuid.uuid4().hex for _ in range(args.identifiers)]
+    for start in range(0, len(identifiers), 10000):
+        repositories.create_identifier_paths(
+            identifiers=identifiers[start : start + 10000]
+        )
+    checks = [
+        random.choice(identifiers) if random.random() < 0.5 else uuid.uuid4().hex
+        for _ in range(args.checks)
+    ]
+    config.BLOOM_FILTER = config.ID_INDEX = True
+    for label, build in (
+        ("Bloom filter", repositories.get_bloom_filter),
+        ("identifier index", repositories.get_id_index),
+    ):
+        started: float = time.perf_counter()
+        build()
+        print(f"built the {label} in {time.perf_counter() - started:.2f}s")
+    timers = {}
+    for label, bloom_filter, id_index in (
+        ("exists by directory lookup", False, False),
+        ("exists with Bloom filter", True, False),
+        ("exists with identifier index", False, True),
+    ):
+        config.BLOOM_FILTER, config.ID_INDEX = bloom_filter, id_index
+        timer = timers[label] = Timer()
+        for identifier in checks:
+            with timer.time():
+                repositories.identifier_exists(identifier=identifier)
+        print(timer.report(label))
+    baseline: float = timers["exists by directory lookup"].total
+    print(f"speedup={baseline / timers['exists with identifier index'].total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import tracemalloc
+import uuid
+from typing import Callable, List
+
+from environment import Timer
+
+from co.deability.identifier.values.Identifier import Identifier
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
+
+"""
+Compares hexadecimal strings with Identifier and IdentifierArray for --count identifiers: the CPU
+time to validate them, to mint them, and to convert a batch to and from strings, and the memory
+taken by a list of strings against an array:
+
+    python benchmarks/bench_identifiers.py --count 100000
+"""
+
+VALID_CHARS: str = "0123456789abcdef"
+
+
+def _is_valid_by_character(identifier: str) -> bool:
+    # The check this replaced
+    if len(identifier) != 32:
+        return False
+    for c in identifier:
+        if c not in VALID_CHARS:
+            return False
+    return True
+
+
+def _time(label: str, rounds: int, operation: Callable[[], object]) -> Timer:
+    timer = Timer()
+    for _ in range(rounds):
+        with timer.time():
+            operation()
+    print(timer.report(label))
+    return timer
+
+
+def _memory(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    built = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+    hexes: List[str] = [uuid.uuid4().hex for _ in range(args.count)]
+    array: IdentifierArray = IdentifierArray.from_hex(identifiers=hexes)
+
+    by_character = _time(
+        "validate by character", 1, lambda: [_is_valid_by_character(h) for h in hexes]
+    )
+    by_match = _time(
+        "validate with Identifier", 1, lambda: [Identifier.is_valid(h) for h in hexes]
+    )
+    as_batch = _time(
+        "validate with IdentifierArray",
+        1,
+        lambda: IdentifierArray.from_hex(identifiers=hexes),
+    )
+    print(
+        f"validation speedup: {by_character.total / by_match.total:.1f}x per identifier, "
+        f"{by_character.total / as_batch.total:.1f}x as a batch"
+    )
+
+    minted_strings = _time(
+        "mint strings with uuid4",
+        1,
+        lambda: [str(uuid.uuid4()).replace("-", "", 4) for _ in range(args.count)],
+    )
+    minted_array = _time(
+        "mint IdentifierArray", 1, lambda: IdentifierArray.random(count=args.count)
+    )
+    minted_hexes = _time(
+        "mint IdentifierArray as strings",
+        1,
+        lambda: IdentifierArray.random(count=args.count).hexes(),
+    )
+    print(
+        f"minting speedup: {minted_strings.total / minted_array.total:.1f}x packed, "
+        f"{minted_strings.total / minted_hexes.total:.1f}x as strings"
+    )
+    _time("IdentifierArray to strings", 1, array.hexes)
+
+    strings_size: int = _memory(lambda: [uuid.uuid4().hex for _ in range(args.count)])
+    array_size: int = _memory(lambda: IdentifierArray.random(count=args.count))
+    print(
+        f"memory: {strings_size / args.count:.1f} bytes per identifier as strings, "
+        f"{array_size / args.count:.1f} in an IdentifierArray "
+        f"({strings_size / array_size:.1f}x less)"
+    )
+
+
+if __name__ == "__main__":
+    main()
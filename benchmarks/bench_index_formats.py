@@ -0,0 +1,64 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+from typing import List
+
+from environment import Timer
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories import entities
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+
+"""
+Compares the two index formats (see IDENTIFIER_INDEX_FORMAT) by indexing --count entities under a
+single index, once with one symlink per entry and once with a posting list, and then timing a full
+scan of each index with find_entity_ids:
+
+    python benchmarks/bench_index_formats.py --count 100000 --scans 5
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--scans", type=int, default=5)
+    args = parser.parse_args()
+    if not entities.DELETED_ENTITY_PATH.exists():
+        entities.DELETED_ENTITY_PATH.write_text("{}")
+    identifiers: List[str] = [
+        entity_repository.create_entity(entity={"benchmark": number})
+        for number in range(args.count)
+    ]
+    for index_format in ("symlink", "postings"):
+        config.INDEX_FORMAT = index_format
+        index = {"entity type": f"benchmark-{index_format}"}
+        adds, scans = Timer(), Timer()
+        for identifier in identifiers:
+            with adds.time():
+                index_repository.create_index(identifier=identifier, index=index)
+        for _ in range(args.scans):
+            with scans.time():
+                found: List[str] = index_repository.find_entity_ids(index=index)
+            assert len(found) == args.count
+        print(adds.report(f"{index_format}: add entry"))
+        print(scans.report(f"{index_format}: scan index"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import List
+
+import environment
+from environment import Timer
+
+from co.deability.identifier.services import layout_service
+
+"""
+Compares directory layouts for identifiers (see IDENTIFIER_SHARD_WIDTHS) by creating --count
+identifiers under each layout and reporting the inodes consumed along with create and exists
+latency. Run it on the same kind of filesystem that backs IDENTIFIER_DATA_PATH in production:
+
+    python benchmarks/bench_layout.py --count 1000000 --layouts "" "2,2" "3,3"
+"""
+
+
+def run(count: int, spec: str, scratch: Path) -> None:
+    widths = layout_service.parse_shard_widths(spec)
+    base: Path = Path(tempfile.mkdtemp(dir=scratch))
+    identifiers: List[str] = [uuid.uuid4().hex for _ in range(count)]
+    missing: List[str] = [uuid.uuid4().hex for _ in range(min(count, 100000))]
+    inodes_before: int = environment.used_inodes(base)
+    create, exists, absent = Timer(), Timer(), Timer()
+    for identifier in identifiers:
+        with create.time():
+            layout_service.identifier_path(base, identifier, widths).mkdir(
+                parents=True, exist_ok=False
+            )
+    inodes_used: int = environment.used_inodes(base) - inodes_before
+    for identifier in identifiers[: len(missing)]:
+        with exists.time():
+            os.path.exists(layout_service.identifier_path(base, identifier, widths))
+    for identifier in missing:
+        with absent.time():
+            os.path.exists(layout_service.identifier_path(base, identifier, widths))
+    label: str = f"layout '{spec}'" if spec else "layout per-character"
+    print(f"{label}: {inodes_used} inodes ({inodes_used / count:.2f} per identifier)")
+    print(create.report("  create"))
+    print(exists.report("  exists (present)"))
+    print(absent.report("  exists (absent)"))
+    shutil.rmtree(base, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--layouts", nargs="+", default=["", "2,2"])
+    parser.add_argument(
+        "--scratch",
+        default=os.environ["IDENTIFIER_DATA_PATH"],
+        help="The directory in which the benchmark trees are created.",
+    )
+    args = parser.parse_args()
+    for spec in args.layouts:
+        run(count=args.count, spec=spec, scratch=Path(args.scratch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import os
+from typing import List
+
+from environment import Timer
+
+from co.deability.identifier.api.app import app
+
+"""
+Compares reading --count entities, and the current data of --count identifiers, with one GET
+request each against reading them with POST /identifier/entity/read/batch and
+POST /identifier/data/current/batch requests of --batch-size identifiers each. The entities and
+data are created beforehand (untimed.) With --cold, the data path's files are evicted from the page
+cache before each pass (see os.posix_fadvise), so that reads wait on the disk; the number of read
+threads is set with IDENTIFIER_READ_THREADS:
+
+    python benchmarks/bench_multi_get.py --count 1000 --batch-size 100 --cold
+"""
+
+
+def evict(path: str) -> None:
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                descriptor: int = os.open(os.path.join(directory, name), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.posix_fadvise(descriptor, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(descriptor)
+
+
+def compare(
+    client, label: str, single: str, batch: str, identifiers: List[str], args
+) -> None:
+    singles, batches = Timer(), Timer()
+    if args.cold:
+        evict(os.environ["IDENTIFIER_DATA_PATH"])
+    for identifier in identifiers:
+        with singles.time():
+            assert client.get(f"{single}/{identifier}").status_code == 200
+    if args.cold:
+        evict(os.environ["IDENTIFIER_DATA_PATH"])
+    for start in range(0, len(identifiers), args.batch_size):
+        with batches.time():
+            response = client.post(
+                batch, json=identifiers[start : start + args.batch_size]
+            )
+        assert response.status_code == 200
+    print(singles.report(f"{label}: single requests"))
+    print(batches.report(f"{label}: batches of {args.batch_size}"))
+    print(
+        f"{label} reads/s: single={len(identifiers) / singles.total:.1f} "
+        f"batch={len(identifiers) / batches.total:.1f} "
+        f"speedup={singles.total / batches.total:.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--cold", action="store_true")
+    args = parser.parse_args()
+    with app.test_client() as client:
+        client.post(
+            "/identifier/entity/schema/add/benchmark",
+            json={"type": "object", "properties": {"name": {"type": "string"}}},
+        )
+        response = client.post(
+            "/identifier/entity/add/bulk/benchmark",
+            json=[{"name": f"entity {number}"} for number in range(args.count)],
+        )
+        entity_ids: List[str] = [result["created"] for result in response.json]
+        data_ids: List[str] = client.post(
+            "/identifier/new/batch", json={"count": args.count}
+        ).json["created"]
+        for identifier in data_ids:
+            client.post(f"/identifier/data/add/{identifier}", json={"id": identifier})
+        compare(
+            client=client,
+            label="entities",
+            single="/identifier/entity/read",
+            batch="/identifier/entity/read/batch",
+            identifiers=entity_ids,
+            args=args,
+        )
+        compare(
+            client=client,
+            label="current data",
+            single="/identifier/data/current",
+            batch="/identifier/data/current/batch",
+            identifiers=data_ids,
+            args=args,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+from typing import Dict, Any, List, Tuple
+
+import jsonschema
+from environment import Timer
+from jsonschema.validators import validator_for
+
+from co.deability.identifier.services import schema_compiler
+
+"""
+Compares the ways an entity can be validated against its schema, for a few typical entity shapes:
+jsonschema.validate (which builds a validator and checks the schema on every call), a reused
+jsonschema validator (IDENTIFIER_VALIDATOR_ENGINE=jsonschema), and a generated validator
+(IDENTIFIER_VALIDATOR_ENGINE=compiled). Each is timed against a valid and an invalid entity:
+
+    python benchmarks/bench_validators.py --count 1000
+"""
+
+PERSON = {
+    "type": "object",
+    "required": ["given name", "family name", "email"],
+    "properties": {
+        "given name": {"type": "string", "minLength": 1, "maxLength": 100},
+        "family name": {"type": "string", "minLength": 1, "maxLength": 100},
+        "email": {"type": "string", "pattern": "^[^@]+@[^@]+$"},
+        "age": {"type": "integer", "minimum": 0},
+        "status": {"enum": ["active", "inactive"], "x-index": True},
+    },
+}
+PLACE = {
+    "type": "object",
+    "required": ["name", "address"],
+    "properties": {
+        "name": {"type": "string"},
+        "address": {
+            "type": "object",
+            "required": ["street", "city", "postal code"],
+            "additionalProperties": False,
+            "properties": {
+                "street": {"type": "string"},
+                "city": {"type": "string", "x-index": True},
+                "postal code": {"type": "string", "pattern": "^[0-9]{5}$"},
+            },
+        },
+        "location": {
+            "type": "object",
+            "properties": {
+                "latitude": {"type": "number", "minimum": -90, "maximum": 90},
+                "longitude": {"type": "number", "minimum": -180, "maximum": 180},
+            },
+        },
+    },
+}
+ORDER = {
+    "type": "object",
+    "required": ["customer", "lines"],
+    "properties": {
+        "customer": {"type": "string", "minLength": 32, "maxLength": 32},
+        "lines": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["sku", "quantity"],
+                "properties": {
+                    "sku": {"type": "string"},
+                    "quantity": {"type": "integer", "exclusiveMinimum": 0},
+                    "price": {"type": "number", "minimum": 0},
+                },
+            },
+        },
+    },
+}
+CASES: List[Tuple[str, Dict[str, Any], Dict[str, Any], Dict[str, Any]]] = [
+    (
+        "person",
+        PERSON,
+        {
+            "given name": "Ann",
+            "family name": "Smith",
+            "email": "ann@example.com",
+            "age": 42,
+            "status": "active",
+        },
+        {"given name": "Ann", "family name": "Smith", "email": "ann", "age": -1},
+    ),
+    (
+        "place",
+        PLACE,
+        {
+            "name": "Union Station",
+            "address": {
+                "street": "1701 Wynkoop St",
+                "city": "Denver",
+                "postal code": "80202",
+            },
+            "location": {"latitude": 39.75, "longitude": -105.0},
+        },
+        {"name": "Union Station", "address": {"street": "1701 Wynkoop St"}},
+    ),
+    (
+        "order",
+        ORDER,
+        {
+            "customer": "c963ef49afa5483bb1326e9525727140",
+            "lines": [
+                {"sku": f"sku-{line}", "quantity": line + 1, "price": 9.99}
+                for line in range(10)
+            ],
+        },
+        {
+            "customer": "c963ef49afa5483bb1326e9525727140",
+            "lines": [{"sku": "sku-0", "quantity": 0}],
+        },
+    ),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000)
+    args = parser.parse_args()
+    for name, schema, valid, invalid in CASES:
+        interpreted = validator_for(schema)(schema)
+        compiled = schema_compiler.compile_schema(schema=schema)
+        assert compiled, f"the {name} schema should be supported by the compiler"
+        engines = {
+            "jsonschema.validate": lambda instance: jsonschema.validate(
+                instance=instance, schema=schema
+            ),
+            "jsonschema validator": interpreted.validate,
+            "compiled validator": compiled.validate,
+        }
+        for label, instance in (("valid", valid), ("invalid", invalid)):
+            for engine, validate in engines.items():
+                timer = Timer()
+                for _ in range(args.count):
+                    with timer.time():
+                        try:
+                            validate(instance)
+                        except jsonschema.ValidationError:
+                            assert label == "invalid"
+                print(timer.report(f"{name} {label} {engine}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+"""
+Shared setup for the benchmark scripts in this directory. Importing this module points the
+Identifier config at a scratch data directory (unless IDENTIFIER_DATA_PATH is already set) and puts
+the package source on the path, the same way src/tests/conftest.py does for the tests.
+"""
+
+sys.path.insert(0, str(Path(Path(__file__).parent.parent, "src")))
+os.environ.setdefault(
+    "IDENTIFIER_DATA_PATH", tempfile.mkdtemp(prefix="identifier-benchmark-")
+)
+os.environ.setdefault("IDENTIFIER_LOG_LEVEL", "WARNING")
+os.environ.setdefault("ROOT_LOG_LEVEL", "WARNING")
+os.environ.setdefault("FLASK_ENV", "production")
+
+
+class Timer:
+    """
+    Collects the elapsed time of each timed block so that totals and percentiles can be reported.
+    """
+
+    def __init__(self) -> None:
+        self.samples: List[float] = []
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start: float = time.perf_counter()
+        yield
+        self.samples.append(time.perf_counter() - start)
+
+    @property
+    def total(self) -> float:
+        return sum(self.samples)
+
+    def percentile(self, percent: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered: List[float] = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def report(self, label: str) -> str:
+        count: int = len(self.samples)
+        rate: float = count / self.total if self.total else 0.0
+        return (
+            f"{label:<32} n={count:<9} total={self.total:9.3f}s rate={rate:12.1f}/s "
+            f"p50={self.percentile(50) * 1e6:9.1f}us p99={self.percentile(99) * 1e6:9.1f}us"
+        )
+
+
+def used_inodes(path: Path) -> int:
+    """
+    Returns the number of inodes in use on the filesystem holding the supplied path.
+    """
+    stats = os.statvfs(path)
+    return stats.f_files - stats.f_ffree
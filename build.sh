@@ -53,6 +53,32 @@ podman build \
 --env IDENTIFIER_DATA_PATH="$IDENTIFIER_DATA_PATH" \
 --env IDENTIFIER_MAX_READER_COUNT="$IDENTIFIER_MAX_READER_COUNT" \
 --env IDENTIFIER_MAX_RETRIES="$IDENTIFIER_MAX_RETRIES" \
+--env IDENTIFIER_SHARD_WIDTHS="$IDENTIFIER_SHARD_WIDTHS" \
+--env IDENTIFIER_STORAGE_ENGINE="$IDENTIFIER_STORAGE_ENGINE" \
+--env IDENTIFIER_SEGMENT_SIZE="$IDENTIFIER_SEGMENT_SIZE" \
+--env IDENTIFIER_BLOOM_FILTER="$IDENTIFIER_BLOOM_FILTER" \
+--env IDENTIFIER_BLOOM_CAPACITY="$IDENTIFIER_BLOOM_CAPACITY" \
+--env IDENTIFIER_BLOOM_ERROR_RATE="$IDENTIFIER_BLOOM_ERROR_RATE" \
+--env IDENTIFIER_ID_INDEX="$IDENTIFIER_ID_INDEX" \
+--env IDENTIFIER_ID_INDEX_MERGE_SIZE="$IDENTIFIER_ID_INDEX_MERGE_SIZE" \
+--env IDENTIFIER_CACHE_SIZE="$IDENTIFIER_CACHE_SIZE" \
+--env IDENTIFIER_NEGATIVE_CACHE_TTL="$IDENTIFIER_NEGATIVE_CACHE_TTL" \
+--env IDENTIFIER_MAX_BATCH_SIZE="$IDENTIFIER_MAX_BATCH_SIZE" \
+--env IDENTIFIER_MAX_BULK_SIZE="$IDENTIFIER_MAX_BULK_SIZE" \
+--env IDENTIFIER_MAX_EXISTS_BATCH_SIZE="$IDENTIFIER_MAX_EXISTS_BATCH_SIZE" \
+--env IDENTIFIER_MAX_MULTI_GET_SIZE="$IDENTIFIER_MAX_MULTI_GET_SIZE" \
+--env IDENTIFIER_READ_THREADS="$IDENTIFIER_READ_THREADS" \
+--env IDENTIFIER_LEASE_PREFIX_WIDTH="$IDENTIFIER_LEASE_PREFIX_WIDTH" \
+--env IDENTIFIER_LEASE_TTL="$IDENTIFIER_LEASE_TTL" \
+--env IDENTIFIER_INDEX_FORMAT="$IDENTIFIER_INDEX_FORMAT" \
+--env IDENTIFIER_POSTINGS_BUFFER_SIZE="$IDENTIFIER_POSTINGS_BUFFER_SIZE" \
+--env IDENTIFIER_SCHEMA_REFRESH_INTERVAL="$IDENTIFIER_SCHEMA_REFRESH_INTERVAL" \
+--env IDENTIFIER_VALIDATOR_ENGINE="$IDENTIFIER_VALIDATOR_ENGINE" \
+--env IDENTIFIER_ENTITY_CACHE_SIZE="$IDENTIFIER_ENTITY_CACHE_SIZE" \
+--env IDENTIFIER_EXPORT_ENABLED="$IDENTIFIER_EXPORT_ENABLED" \
+--env IDENTIFIER_ASGI_THREADS="$IDENTIFIER_ASGI_THREADS" \
+--env IDENTIFIER_POOL_SIZE="$IDENTIFIER_POOL_SIZE" \
+--env IDENTIFIER_POOL_LOW_WATER="$IDENTIFIER_POOL_LOW_WATER" \
 --env IDENTIFIER_TEXT_ENCODING="$IDENTIFIER_TEXT_ENCODING" \
 --env FLASK_ENV="$FLASK_ENV" \
 --build-arg uuid=1001 \
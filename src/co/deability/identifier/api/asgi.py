@@ -0,0 +1,247 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import asyncio
+import contextvars
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from co.deability.identifier import config
+from co.deability.identifier.config import LOG
+
+"""
+An ASGI entry point for the Identifier API. AsgiAdapter serves the (WSGI) Flask application, and
+so exactly the same routes and error handling, to an ASGI server such as uvicorn. Connections are
+accepted and request and response bodies are transferred on the server's event loop, while the
+application itself, and so every call it makes to the repositories, runs in a bounded pool of
+config.ASGI_THREADS threads. A worker therefore keeps accepting requests while others are waiting
+on the file system, instead of being tied up by each one as a synchronous WSGI worker is.
+"""
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+WsgiApp = Callable[[Dict[str, Any], Callable], Iterable[bytes]]
+
+
+class _Response:
+    """
+    Collects the status and headers passed to a WSGI application's start_response, and anything
+    the application passes to the write callable that start_response returns.
+    """
+
+    def __init__(self) -> None:
+        self.status: int = 500
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.content_length: Optional[int] = None
+        self._written: List[bytes] = []
+
+    def start_response(
+        self, status: str, headers: List[Tuple[str, str]], exc_info: Any = None
+    ) -> Callable[[bytes], None]:
+        self.status = int(status.split(" ", 1)[0])
+        self.headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers
+        ]
+        self.content_length = next(
+            (int(value) for name, value in headers if name.lower() == "content-length"),
+            None,
+        )
+        return self._write
+
+    def _write(self, content: bytes) -> None:
+        if content:
+            self._written.append(bytes(content))
+
+    def drain(self) -> List[bytes]:
+        """
+        Returns what's been passed to the write callable since this was last called.
+        """
+        written: List[bytes] = self._written
+        self._written = []
+        return written
+
+
+class AsgiAdapter:
+    """
+    An ASGI application that serves the supplied WSGI application, which is called in a bounded
+    pool of threads.
+    """
+
+    def __init__(self, wsgi_app: WsgiApp, threads: int = config.ASGI_THREADS) -> None:
+        self.wsgi_app: WsgiApp = wsgi_app
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="identifier-asgi"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive=receive, send=send)
+            return
+        if scope["type"] == "websocket":
+            # Closing before accepting refuses the handshake (with a 403)
+            await receive()
+            await send({"type": "websocket.close", "code": 1000})
+            return
+        if scope["type"] != "http":
+            LOG.warning(
+                f"Ignoring a {scope['type']} connection, which isn't supported."
+            )
+            return
+        body: bytes = await _read_body(receive=receive)
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        response: _Response = _Response()
+        # Every step of a request runs in the same context, whichever thread it's run in, so that
+        # the application context of a streamed response is still there for its later chunks.
+        context: contextvars.Context = contextvars.copy_context()
+        chunks, remainder = await loop.run_in_executor(
+            self.executor,
+            context.run,
+            self._start,
+            _environ(scope=scope, body=body),
+            response,
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status,
+                "headers": response.headers,
+            }
+        )
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        if remainder is not None:
+            # A streamed response; each further chunk is produced in the pool as well.
+            result, iterator = remainder
+            try:
+                while True:
+                    chunk: Optional[bytes] = await loop.run_in_executor(
+                        self.executor, context.run, next, iterator, None
+                    )
+                    for written in response.drain() + [chunk or b""]:
+                        if written:
+                            await send(
+                                {
+                                    "type": "http.response.body",
+                                    "body": written,
+                                    "more_body": True,
+                                }
+                            )
+                    if chunk is None:
+                        break
+            finally:
+                if hasattr(result, "close"):
+                    await loop.run_in_executor(self.executor, context.run, result.close)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _start(
+        self, environ: Dict[str, Any], response: _Response
+    ) -> Tuple[List[bytes], Optional[Tuple[Iterable[bytes], Iterator[bytes]]]]:
+        """
+        Runs in the pool. Calls the WSGI application and returns the chunks of its response that
+        are ready: the whole response if its length is known (as it is for everything but streamed
+        responses, which are already in memory), and the first chunk otherwise, along with the
+        response and its iterator if there's more to come.
+        """
+        result: Iterable[bytes] = self.wsgi_app(environ, response.start_response)
+        iterator: Iterator[bytes] = iter(result)
+        chunks: List[bytes] = response.drain()
+        try:
+            for chunk in iterator:
+                chunks.extend(response.drain())
+                if chunk:
+                    chunks.append(chunk)
+                    if response.content_length is None:
+                        return chunks, (result, iterator)
+        except BaseException:
+            if hasattr(result, "close"):
+                result.close()
+            raise
+        if hasattr(result, "close"):
+            result.close()
+        return chunks + response.drain(), None
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message: Dict[str, Any] = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Waits for requests still in the pool without blocking the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.executor.shutdown
+                )
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        message: Dict[str, Any] = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+    """
+    Returns the WSGI environment (see PEP 3333) for the supplied ASGI HTTP scope and request body.
+    """
+    server: Tuple[str, int] = scope.get("server") or ("localhost", 80)
+    client: Optional[Tuple[str, int]] = scope.get("client")
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key: str = name.decode("latin-1").upper().replace("-", "_")
+        if key == "CONTENT_LENGTH":
+            continue
+        if key != "CONTENT_TYPE":
+            key = f"HTTP_{key}"
+        text: str = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{text}" if key in environ else text
+    return environ
@@ -13,12 +13,21 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import json
 from http import HTTPStatus
-from typing import Final, Tuple
-
-from flask import Blueprint, jsonify, make_response, request, Response
+from typing import Final, Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import (
+    Blueprint,
+    jsonify,
+    make_response,
+    request,
+    Response,
+    stream_with_context,
+)
 
 from co.deability.identifier.api.services import entity_service
+from co.deability.identifier.errors.BadRequestError import BadRequestError
 from co.deability.identifier.services.validator_service import validate_entity
 
 entity_blueprint: Blueprint = Blueprint(
@@ -26,6 +35,31 @@ entity_blueprint: Blueprint = Blueprint(
 )
 
 EMPTY_SUCCESS_RESPONSE: Final[Tuple[str, int]] = ("", HTTPStatus.NO_CONTENT)
+JSON_MIMETYPE: Final[str] = "application/json"
+NDJSON_MIMETYPE: Final[str] = "application/x-ndjson"
+
+
+def _wants_ndjson() -> bool:
+    """
+    Returns True if the client prefers newline-delimited JSON to JSON.
+    """
+    return (
+        request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE])
+        == NDJSON_MIMETYPE
+    )
+
+
+def _ndjson_response(found: Iterator[Tuple[str, Dict[str, Any]]]) -> Response:
+    """
+    Returns a response that streams each supplied entity as a {identifier: entity} JSON object on
+    its own line, as it's read, rather than collecting them all first.
+    """
+    lines: Iterator[str] = (
+        json.dumps({identifier: entity}) + "\n" for identifier, entity in found
+    )
+    return Response(
+        stream_with_context(lines), status=HTTPStatus.OK, mimetype=NDJSON_MIMETYPE
+    )
 
 
 @entity_blueprint.get("/read/<identifier>")
@@ -35,9 +69,22 @@ def get_entity(identifier: str):
     )
 
 
+@entity_blueprint.post("/read/batch")
+def get_entities():
+    body: Any = request.get_json(silent=True)
+    identifiers: Any = body.get("identifiers") if isinstance(body, dict) else body
+    return make_response(
+        jsonify(entity_service.get_entities(identifiers=identifiers)), HTTPStatus.OK
+    )
+
+
 # todo add support for paging?
 @entity_blueprint.get("/read/all/<entity_type>")
 def get_all_entities(entity_type: str):
+    if _wants_ndjson():
+        return _ndjson_response(
+            found=entity_service.stream_all_entities(entity_type=entity_type)
+        )
     return make_response(
         jsonify(entity_service.get_all_entities(entity_type=entity_type)),
         HTTPStatus.OK,
@@ -55,6 +102,43 @@ def add_entity(entity_type: str) -> Response:
     )
 
 
+@entity_blueprint.post("/add/bulk/<entity_type>")
+def add_entities(entity_type: str) -> Response:
+    return make_response(
+        jsonify(
+            entity_service.add_entities(batch=_read_batch(), entity_type=entity_type)
+        ),
+        HTTPStatus.OK,
+    )
+
+
+def _read_batch() -> List[Any]:
+    """
+    Returns the entities in the body of the request, which is either a JSON array or (with a
+    Content-Type of application/x-ndjson) newline-delimited JSON. Lines that can't be parsed are
+    returned as None, to be reported as invalid along with the other results.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        return [
+            _parse_line(line=line)
+            for line in request.get_data(as_text=True).splitlines()
+            if line.strip()
+        ]
+    batch: Any = request.get_json(silent=True)
+    if not isinstance(batch, list):
+        raise BadRequestError(
+            message="The body must be a JSON array of entities or newline-delimited JSON."
+        )
+    return batch
+
+
+def _parse_line(line: str) -> Optional[Any]:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
 @entity_blueprint.delete("/archive/<identifier>")
 def remove_entity(identifier: str) -> Response:
     entity_service.remove_entity(identifier=identifier)
@@ -87,6 +171,10 @@ def remove_index() -> Response:
 
 @entity_blueprint.get("/search")
 def find_entities() -> Response:
+    if _wants_ndjson():
+        return _ndjson_response(
+            found=entity_service.stream_entities(search_terms=request.json)
+        )
     return make_response(
         jsonify(entity_service.search_for_entities(search_terms=request.json)),
         HTTPStatus.OK,
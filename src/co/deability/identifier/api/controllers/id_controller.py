@@ -15,16 +15,29 @@ limitations under the License.
 """
 import time
 from http import HTTPStatus
-from typing import Final, Any, Dict
-
-from flask import Blueprint, jsonify, make_response, request
-
-from co.deability.identifier.api.services import id_service
+from typing import Final, Any, Dict, Iterator
+
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    make_response,
+    request,
+    stream_with_context,
+)
+
+from co.deability.identifier.api.services import export_service, id_service
 from co.deability.identifier.api.services.id_service import IdCreator
 from co.deability.identifier import config
+from co.deability.identifier.errors.BadRequestError import BadRequestError
+from co.deability.identifier.errors.NoSuchEntityError import NoSuchEntityError
 
 id_blueprint: Blueprint = Blueprint("identifier", __name__, url_prefix="/identifier")
 ID_CREATOR: Final[IdCreator] = IdCreator()
+EXPORT_MIMETYPES: Final[Dict[str, str]] = {
+    "ndjson": "application/x-ndjson",
+    "tar": "application/x-tar",
+}
 
 
 @id_blueprint.get("/")
@@ -35,6 +48,8 @@ def health_check():
         "timestamp": time.strftime(dt_format, time.gmtime()),
         "status": "OK",
     }
+    if id_service.ID_POOL:
+        content.update({"pool": id_service.pool_stats()})
     # Use assertion to allow config exposure in pre-production environments
     assert (
         content.update(
@@ -45,7 +60,8 @@ def health_check():
                     "DATA_PATH": f"{config.DATA_PATH}",
                     "MAX_READER_COUNT": f"{config.MAX_READER_COUNT}",
                     "MAX_WRITE_RETRIES": f"{config.MAX_WRITE_RETRIES}",
-                }
+                },
+                "cache": id_service.cache_stats(),
             }
         )
         is None
@@ -58,6 +74,17 @@ def get_new_id():
     return make_response(jsonify(ID_CREATOR.get_new_id()), HTTPStatus.CREATED)
 
 
+@id_blueprint.post("/new/batch")
+def get_new_ids():
+    count: Any = request.args.get("count", type=int)
+    if count is None:
+        body: Any = request.get_json(silent=True)
+        count = body.get("count") if isinstance(body, dict) else None
+    return make_response(
+        jsonify(ID_CREATOR.get_new_ids(count=count)), HTTPStatus.CREATED
+    )
+
+
 @id_blueprint.get("/exists/<identifier>")
 def check_id_exists(identifier: str):
     return make_response(
@@ -65,6 +92,21 @@ def check_id_exists(identifier: str):
     )
 
 
+@id_blueprint.post("/exists/batch")
+def check_ids_exist():
+    body: Any = request.get_json(silent=True)
+    identifiers: Any = body.get("identifiers") if isinstance(body, dict) else body
+    return make_response(
+        jsonify(
+            id_service.exists_batch(
+                identifiers=identifiers,
+                exists_format=request.args.get("format", "map"),
+            )
+        ),
+        HTTPStatus.OK,
+    )
+
+
 @id_blueprint.post("/data/add/<identifier>")
 def add_data(identifier: str):
     return make_response(
@@ -80,8 +122,47 @@ def get_current_data(identifier: str):
     )
 
 
+@id_blueprint.post("/data/current/batch")
+def get_current_data_batch():
+    body: Any = request.get_json(silent=True)
+    identifiers: Any = body.get("identifiers") if isinstance(body, dict) else body
+    return make_response(
+        jsonify(id_service.get_current_data_batch(identifiers=identifiers)),
+        HTTPStatus.OK,
+    )
+
+
 @id_blueprint.get("/data/all/<identifier>")
 def get_all_data(identifier: str):
     return make_response(
-        jsonify(id_service.get_all_data(identifier=identifier)), HTTPStatus.OK
+        jsonify(
+            id_service.get_all_data(
+                identifier=identifier,
+                since=request.args.get("since"),
+                until=request.args.get("until"),
+                limit=request.args.get("limit"),
+                cursor=request.args.get("cursor"),
+            )
+        ),
+        HTTPStatus.OK,
+    )
+
+
+@id_blueprint.get("/export")
+def export_data():
+    if not config.EXPORT_ENABLED:
+        raise NoSuchEntityError(message="Exporting is not enabled on this instance.")
+    export_format: str = request.args.get("format", "ndjson")
+    if export_format not in EXPORT_MIMETYPES:
+        raise BadRequestError(
+            message=f"The format must be one of {', '.join(EXPORT_MIMETYPES)}."
+        )
+    content: Iterator[bytes] = export_service.export(export_format=export_format)
+    return Response(
+        stream_with_context(content),
+        status=HTTPStatus.OK,
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={
+            "Content-Disposition": f"attachment; filename=identifier.{export_format}"
+        },
     )
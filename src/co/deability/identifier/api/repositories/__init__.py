@@ -14,10 +14,13 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import logging
+import os
 from pathlib import Path
-from typing import Final
+from typing import Final, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from co.deability.identifier import config
+from co.deability.identifier.api.repositories.bloom_filter import BloomFilter
+from co.deability.identifier.api.repositories.id_index import IdIndex
 from co.deability.identifier.errors.BadRepositoryError import BadRepositoryError
 from co.deability.identifier.errors.IdentifierAlreadyExistsError import (
     IdentifierAlreadyExistsError,
@@ -25,6 +28,8 @@ from co.deability.identifier.errors.IdentifierAlreadyExistsError import (
 from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
 from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
 from co.deability.identifier.errors.NoSuchEntityError import NoSuchEntityError
+from co.deability.identifier.services import layout_service
+from co.deability.identifier.values.Identifier import Identifier
 
 """
 A collection of functions and constants used by different Identifier repository implementations that 
@@ -56,11 +61,13 @@ def calculate_identifier(identifier_path: Path) -> str:
 
 def calculate_path(identifier: str) -> Path:
     """
-    Returns a file path for a directory derived from this instance's base_path and the
-    supplied identifier that takes the form of a single-character directory structure.
-    E.g., for a UuidRepository instance with a base_path of "/foo/bar" and an identifier
-    value of "c963ef49afa5483bb1326e9525727140", the returned value would be
-    "/foo/bar/c/9/6/3/e/f/4/9/a/f/a/5/4/8/3/b/b/1/3/2/6/e/9/5/2/5/7/2/7/1/4/0"
+    Returns a file path for a directory derived from BASE_PATH and the supplied identifier
+    that takes the form of the directory structure configured by config.SHARD_WIDTHS. E.g., for
+    a BASE_PATH of "/foo/bar" and an identifier value of "c963ef49afa5483bb1326e9525727140", the
+    returned value would be
+    "/foo/bar/c/9/6/3/e/f/4/9/a/f/a/5/4/8/3/b/b/1/3/2/6/e/9/5/2/5/7/2/7/1/4/0" with the default
+    single-character layout, or "/foo/bar/c9/63/ef49afa5483bb1326e9525727140" with shard widths
+    of (2, 2).
 
     Raises an IllegalIdentifierError if the supplied identifier is not valid
     (see is_valid_identifier, below)
@@ -70,7 +77,7 @@ def calculate_path(identifier: str) -> Path:
     """
     if not is_valid_identifier(identifier=identifier):
         raise IllegalIdentifierError()
-    return Path(BASE_PATH, "/".join(identifier))
+    return layout_service.identifier_path(base_path=BASE_PATH, identifier=identifier)
 
 
 def create_identifier_path(identifier: str) -> Path:
@@ -96,9 +103,69 @@ def create_identifier_path(identifier: str) -> Path:
             stack_info=True,
         )
         raise ex
+    _index(identifiers=[identifier])
     return file_path
 
 
+def create_identifier_paths(identifiers: Iterable[str]) -> Dict[str, Path]:
+    """
+    Creates directories for those of the supplied identifiers that don't exist yet, and returns
+    their paths. The identifiers are created in sorted order, so that identifiers sharing parent
+    directories are adjacent and each parent only needs to be created once.
+
+    :param identifiers: The identifiers to be created on disk.
+    :return: The path of each identifier that was created, by identifier.
+    """
+    identifiers = sorted(set(identifiers))
+    created: Dict[str, Path] = {}
+    previous: Tuple[str, ...] = BASE_PATH.parts
+    try:
+        for identifier in identifiers:
+            file_path: Path = calculate_path(identifier=identifier)
+            parts: Tuple[str, ...] = file_path.parts
+            # Only the directories below those shared with the previous identifier can be
+            # missing, and they're created from the top down, so each takes a single call.
+            shared: int = next(
+                (
+                    index
+                    for index, (part, previous_part) in enumerate(zip(parts, previous))
+                    if part != previous_part
+                ),
+                min(len(parts), len(previous)),
+            )
+            previous = parts
+            for depth in range(max(shared, 1), len(parts) - 1):
+                try:
+                    os.mkdir(os.path.join(*parts[: depth + 1]))
+                except FileExistsError:
+                    pass
+            try:
+                os.mkdir(file_path)
+            except FileExistsError:
+                continue
+            created[identifier] = file_path
+    finally:
+        # Including those created before a failure, but never those that weren't created
+        _index(identifiers=list(created))
+    return created
+
+
+def _index(identifiers: List[str]) -> None:
+    """
+    Adds the supplied identifiers, whose directories have been created, to the identifier index
+    and the Bloom filter (if they're enabled.) They're only added once their directories exist,
+    since the index is taken as definitive (see identifier_exists.)
+    """
+    if not identifiers:
+        return
+    id_index: Optional[IdIndex] = get_id_index()
+    if id_index:
+        id_index.add_all(identifiers=identifiers)
+    bloom_filter: Optional[BloomFilter] = get_bloom_filter()
+    if bloom_filter:
+        bloom_filter.add_all(identifiers=identifiers)
+
+
 def identifier_exists(identifier: str) -> bool:
     """
     Returns True if the supplied identifier already exists in this instance's repository;
@@ -112,7 +179,15 @@ def identifier_exists(identifier: str) -> bool:
     :return: True if the supplied identifier is valid and exists in this identifier repository; False
     otherwise.
     """
+    id_index: Optional[IdIndex] = get_id_index()
+    if id_index and len(identifier) == 32:
+        if not is_valid_identifier(identifier=identifier):
+            raise IllegalIdentifierError()
+        return identifier in id_index
     file_path: Path = calculate_path(identifier=identifier)
+    bloom_filter: Optional[BloomFilter] = get_bloom_filter()
+    if bloom_filter and not bloom_filter.might_contain(identifier=identifier):
+        return False
     return file_path.exists()
 
 
@@ -124,12 +199,7 @@ def is_valid_identifier(identifier: str) -> bool:
     :param identifier:
     :return: True if the supplied identifier is valid for this Identifier instance; False otherwise.
     """
-    if len(identifier) != config.IDENTIFIER_LENGTH:
-        return False
-    for c in identifier:
-        if c not in VALID_CHARS:
-            return False
-    return True
+    return Identifier.is_valid(identifier=identifier, length=config.IDENTIFIER_LENGTH)
 
 
 def check_identifier(identifier: str) -> None:
@@ -143,3 +213,27 @@ def check_identifier(identifier: str) -> None:
     # No need for validity check here; it's in identifier_exists
     if not identifier_exists(identifier):
         raise NoSuchEntityError(message=f"The supplied identifier is not recognized.")
+
+
+def get_bloom_filter() -> Optional[BloomFilter]:
+    """
+    Returns the Bloom filter of every identifier under BASE_PATH if config.BLOOM_FILTER is enabled;
+    otherwise returns None.
+    """
+    if not config.BLOOM_FILTER:
+        return None
+    return BloomFilter.for_path(base_path=BASE_PATH, rebuild=_all_identifiers)
+
+
+def get_id_index() -> Optional[IdIndex]:
+    """
+    Returns the sorted index of every identifier under BASE_PATH if config.ID_INDEX is enabled;
+    otherwise returns None.
+    """
+    if not config.ID_INDEX:
+        return None
+    return IdIndex.for_path(base_path=BASE_PATH, rebuild=_all_identifiers)
+
+
+def _all_identifiers() -> Iterator[str]:
+    return (identifier for identifier, _ in layout_service.find_identifiers(BASE_PATH))
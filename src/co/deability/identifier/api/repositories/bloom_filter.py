@@ -0,0 +1,218 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import atexit
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+from os import PathLike
+from pathlib import Path
+from typing import Final, Callable, Dict, Iterable, List, Optional, Union
+
+from co.deability.identifier import config
+from co.deability.identifier.config import LOG
+from co.deability.identifier.errors.BadRepositoryError import BadRepositoryError
+
+"""
+A Bloom filter of every identifier in a data tree (see config.BLOOM_FILTER), kept in a snapshot
+file that every process memory-maps. Identifiers are added to the filter before they are created on
+disk, so an identifier the filter has never seen is definitely not in the tree, and checking for it
+doesn't need to touch the tree at all.
+
+Because every process maps the same file, bits set by one gunicorn worker are immediately visible
+to the others; writers take an exclusive lock on the file while setting bits so that concurrent
+updates to the same byte can't be lost. If the snapshot doesn't exist when a filter is opened, it is
+built from the data tree before it's used. Offline tools that add identifiers directly to the tree
+remove the snapshot so that it's rebuilt on the next start.
+"""
+
+BLOOM_FILE: Final[str] = ".identifiers.bloom"
+MAGIC: Final[bytes] = b"IDBLOOM1"
+# magic, bit count, hash count, (padding), identifier count
+HEADER: Final[struct.Struct] = struct.Struct("<8sQIIQ")
+SNAPSHOT_INTERVAL: Final[int] = 1000
+
+
+class BloomFilter:
+    """
+    A memory-mapped Bloom filter of identifiers. Instances are shared per snapshot file within a
+    process; use BloomFilter.for_path.
+    """
+
+    _filters: Dict[Path, "BloomFilter"] = {}
+    _filters_lock: threading.Lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        rebuild: Callable[[], Iterable[str]],
+        capacity: int = config.BLOOM_CAPACITY,
+        error_rate: float = config.BLOOM_ERROR_RATE,
+    ) -> None:
+        """
+        Opens the filter snapshot at the supplied path, building it from the identifiers produced by
+        rebuild if it doesn't exist yet.
+
+        :param path: The location of the snapshot file.
+        :param rebuild: A function returning every identifier already in the data tree.
+        :param capacity: The number of identifiers the filter is sized for.
+        :param error_rate: The false-positive rate the filter should have at capacity.
+        """
+        self.path: Path = Path(path).absolute()
+        self._lock: threading.Lock = threading.Lock()
+        self._unsnapshotted: int = 0
+        if not self.path.exists():
+            self._build(rebuild=rebuild, capacity=capacity, error_rate=error_rate)
+        self._descriptor: int = os.open(self.path, os.O_RDWR)
+        self._map: mmap.mmap = mmap.mmap(self._descriptor, 0)
+        magic, self.bit_count, self.hash_count, _, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise BadRepositoryError()
+        self.capacity: int = capacity
+        atexit.register(self.snapshot)
+
+    @classmethod
+    def for_path(
+        cls, base_path: Union[str, PathLike], rebuild: Callable[[], Iterable[str]]
+    ) -> "BloomFilter":
+        """
+        Returns the filter for the data tree at the supplied base path, opening it if this process
+        hasn't already done so.
+        """
+        key: Path = Path(base_path, BLOOM_FILE).absolute()
+        with cls._filters_lock:
+            bloom_filter: Optional[BloomFilter] = cls._filters.get(key)
+            if bloom_filter is None:
+                bloom_filter = BloomFilter(path=key, rebuild=rebuild)
+                cls._filters[key] = bloom_filter
+            return bloom_filter
+
+    def might_contain(self, identifier: str) -> bool:
+        """
+        Returns False if the supplied identifier has definitely never been added to the filter;
+        True if it probably has.
+        """
+        bits: mmap.mmap = self._map
+        for position in self._positions(identifier=identifier):
+            if not bits[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, identifier: str) -> None:
+        """
+        Adds the supplied identifier to the filter.
+        """
+        self.add_all(identifiers=[identifier])
+
+    def add_all(self, identifiers: Iterable[str]) -> None:
+        """
+        Adds the supplied identifiers to the filter under a single lock.
+        """
+        positions: List[int] = [
+            position
+            for identifier in identifiers
+            for position in self._positions(identifier=identifier)
+        ]
+        added: int = len(positions) // self.hash_count
+        with self._lock:
+            fcntl.flock(self._descriptor, fcntl.LOCK_EX)
+            try:
+                self._set(bits=self._map, positions=positions)
+                count: int = HEADER.unpack_from(self._map)[4] + added
+                struct.pack_into("<Q", self._map, HEADER.size - 8, count)
+            finally:
+                fcntl.flock(self._descriptor, fcntl.LOCK_UN)
+            self._unsnapshotted += added
+            if self._unsnapshotted >= SNAPSHOT_INTERVAL:
+                self.snapshot()
+        if count > self.capacity and count - added <= self.capacity:
+            LOG.warning(
+                f"The Bloom filter at {self.path} has exceeded its capacity of "
+                f"{self.capacity} identifiers; its false-positive rate will rise."
+            )
+
+    def snapshot(self) -> None:
+        """
+        Flushes the filter's bits to its snapshot file.
+        """
+        self._map.flush()
+        self._unsnapshotted = 0
+
+    def _positions(self, identifier: str) -> List[int]:
+        digest: bytes = hashlib.blake2b(
+            identifier.encode(config.TEXT_ENCODING), digest_size=16
+        ).digest()
+        first: int = int.from_bytes(digest[:8], "little")
+        second: int = int.from_bytes(digest[8:], "little") | 1
+        return [
+            (first + index * second) % self.bit_count
+            for index in range(self.hash_count)
+        ]
+
+    @staticmethod
+    def _set(bits: Union[mmap.mmap, bytearray], positions: Iterable[int]) -> None:
+        for position in positions:
+            bits[HEADER.size + (position >> 3)] |= 1 << (position & 7)
+
+    def _build(
+        self,
+        rebuild: Callable[[], Iterable[str]],
+        capacity: int,
+        error_rate: float,
+    ) -> None:
+        """
+        Builds the snapshot from the identifiers already in the data tree. Only one process builds
+        it; any others wait for it to be finished.
+        """
+        lock_path: Path = Path(f"{self.path}.lock")
+        descriptor: int = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o660)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            if self.path.exists():
+                return
+            LOG.info(f"Building the Bloom filter at {self.path}...")
+            self.bit_count = max(
+                8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+            )
+            self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+            bits: bytearray = bytearray(HEADER.size + (self.bit_count + 7) // 8)
+            count: int = 0
+            for identifier in rebuild():
+                self._set(bits=bits, positions=self._positions(identifier=identifier))
+                count += 1
+            HEADER.pack_into(bits, 0, MAGIC, self.bit_count, self.hash_count, 0, count)
+            temp_path: Path = Path(f"{self.path}.{os.getpid()}.tmp")
+            with open(temp_path, "wb") as temp_file:
+                temp_file.write(bits)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, self.path)
+            LOG.info(f"Built the Bloom filter at {self.path} with {count} identifiers.")
+        finally:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+            os.close(descriptor)
+
+
+def remove_snapshot(base_path: Union[str, PathLike]) -> None:
+    """
+    Removes the Bloom filter snapshot of the data tree at the supplied base path, if there is one,
+    so that it's rebuilt when the tree is next opened. Tools that add identifiers to a tree without
+    going through a BloomFilter must call this.
+    """
+    Path(base_path, BLOOM_FILE).unlink(missing_ok=True)
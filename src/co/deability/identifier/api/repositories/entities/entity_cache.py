@@ -0,0 +1,266 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from typing import Final, Dict, Iterator, Optional, Tuple, Union
+
+from co.deability.identifier import config
+from co.deability.identifier.config import LOG
+from co.deability.identifier.errors.BadRepositoryError import BadRepositoryError
+
+"""
+A cache of serialized entities (see config.ENTITY_CACHE_SIZE) in a file that every process
+memory-maps, so that the gunicorn workers of an instance share one copy of each hot entity rather
+than each keeping its own.
+
+The file holds a table of epochs followed by fixed-size slots, grouped into buckets of BUCKET_WAYS
+slots. An entity is cached in one of the slots of the bucket chosen by the hash of the identifier it
+was read by, evicting the bucket's least recently used entry if need be; entities too large for a
+slot aren't cached. Each entry records the epoch of the lineage (see entity_repository) it was read
+from, which is one of the table's epochs chosen by the hash of the lineage's root. Updating or
+deleting any version of an entity advances its lineage's epoch, which invalidates every entry read
+from that lineage at once, whichever of its identifiers they were read by.
+
+Readers don't take locks. Each slot has a sequence number which writers (who hold an exclusive lock
+on the file) make odd while they're changing the slot and even again afterwards, and each entry
+carries a checksum of its content, so a reader that overlaps a write sees a miss rather than a torn
+entry.
+"""
+
+CACHE_FILE: Final[str] = ".entities.cache"
+MAGIC: Final[bytes] = b"IDCACHE1"
+# magic, slot count, slot size, epoch count
+HEADER: Final[struct.Struct] = struct.Struct("<8sQQQ")
+# sequence, content length, checksum, epoch index, epoch, last used, key
+SLOT_HEADER: Final[struct.Struct] = struct.Struct("<IIIIQQ16s")
+EPOCH: Final[struct.Struct] = struct.Struct("<Q")
+SLOT_SIZE: Final[int] = 4096
+BUCKET_WAYS: Final[int] = 8
+EPOCH_COUNT: Final[int] = 65536
+
+
+class EntityCache:
+    """
+    A memory-mapped cache of serialized entities, shared by every process using the same cache
+    file. Instances are shared per cache file within a process; use EntityCache.for_path.
+    """
+
+    _caches: Dict[Path, "EntityCache"] = {}
+    _caches_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, path: Union[str, PathLike], size: int) -> None:
+        """
+        Opens the cache file at the supplied path, creating it with room for size bytes of slots if
+        it doesn't exist yet. An existing file keeps the size it was created with.
+
+        :param path: The location of the cache file.
+        :param size: The number of bytes of entries the cache holds.
+        """
+        self.path: Path = Path(path).absolute()
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._descriptor: int = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o660)
+        with self._file_lock():
+            if os.fstat(self._descriptor).st_size == 0:
+                self._create(size=size)
+        self._map: mmap.mmap = mmap.mmap(self._descriptor, 0)
+        magic, self.slot_count, self.slot_size, self.epoch_count = HEADER.unpack_from(
+            self._map
+        )
+        if magic != MAGIC:
+            raise BadRepositoryError()
+        if self.slot_count * self.slot_size != _slot_count(size=size) * SLOT_SIZE:
+            LOG.warning(
+                f"The entity cache at {self.path} holds {self.slot_count} entries; delete it "
+                "for a change to IDENTIFIER_ENTITY_CACHE_SIZE to take effect."
+            )
+        self._epochs_offset: int = HEADER.size
+        self._slots_offset: int = HEADER.size + self.epoch_count * EPOCH.size
+
+    @classmethod
+    def for_path(cls, base_path: Union[str, PathLike]) -> "EntityCache":
+        """
+        Returns the cache for the data tree at the supplied base path, opening it if this process
+        hasn't already done so.
+        """
+        key: Path = Path(base_path, CACHE_FILE).absolute()
+        with cls._caches_lock:
+            cache: Optional[EntityCache] = cls._caches.get(key)
+            if cache is None:
+                cache = EntityCache(path=key, size=config.ENTITY_CACHE_SIZE)
+                cls._caches[key] = cache
+            return cache
+
+    def epoch(self, root: str) -> int:
+        """
+        Returns the current epoch of the lineage with the supplied root identifier. It must be
+        read before the entity it's to be cached with, so that the entry is invalid from the start
+        if the lineage changes in between.
+        """
+        return EPOCH.unpack_from(
+            self._map, self._epochs_offset + self._epoch_index(root) * EPOCH.size
+        )[0]
+
+    def get(self, identifier: str) -> Optional[bytes]:
+        """
+        Returns the serialized entity cached under the supplied identifier, or None if there isn't
+        one or its lineage has changed since it was cached.
+        """
+        key: bytes = _key(identifier)
+        for offset in self._bucket(key=key):
+            (
+                sequence,
+                length,
+                checksum,
+                epoch_index,
+                epoch,
+                _,
+                slot_key,
+            ) = SLOT_HEADER.unpack_from(self._map, offset)
+            if slot_key != key or not length or sequence & 1:
+                continue
+            start: int = offset + SLOT_HEADER.size
+            content: bytes = self._map[start : start + length]
+            if (
+                SLOT_HEADER.unpack_from(self._map, offset)[0] == sequence
+                and zlib.crc32(content) == checksum
+                and EPOCH.unpack_from(
+                    self._map, self._epochs_offset + epoch_index * EPOCH.size
+                )[0]
+                == epoch
+            ):
+                # The recency of use is updated without the lock; a lost update only makes
+                # eviction a little less exact.
+                struct.pack_into("<Q", self._map, offset + 24, time.monotonic_ns())
+                self.hits += 1
+                return content
+            break
+        self.misses += 1
+        return None
+
+    def put(self, identifier: str, root: str, epoch: int, content: bytes) -> None:
+        """
+        Caches the supplied serialized entity under the supplied identifier, as read from the
+        lineage with the supplied root identifier while it was at the supplied epoch.
+        """
+        if SLOT_HEADER.size + len(content) > self.slot_size:
+            return
+        key: bytes = _key(identifier)
+        with self._file_lock():
+            offset: int = min(
+                self._bucket(key=key),
+                key=lambda slot: _victim_rank(
+                    SLOT_HEADER.unpack_from(self._map, slot), key=key
+                ),
+            )
+            sequence: int = SLOT_HEADER.unpack_from(self._map, offset)[0]
+            struct.pack_into("<I", self._map, offset, sequence + 1)
+            start: int = offset + SLOT_HEADER.size
+            self._map[start : start + len(content)] = content
+            SLOT_HEADER.pack_into(
+                self._map,
+                offset,
+                sequence + 1,
+                len(content),
+                zlib.crc32(content),
+                self._epoch_index(root),
+                epoch,
+                time.monotonic_ns(),
+                key,
+            )
+            struct.pack_into("<I", self._map, offset, sequence + 2)
+
+    def invalidate(self, root: str) -> None:
+        """
+        Invalidates every entry read from the lineage with the supplied root identifier.
+        """
+        offset: int = self._epochs_offset + self._epoch_index(root) * EPOCH.size
+        with self._file_lock():
+            EPOCH.pack_into(
+                self._map, offset, EPOCH.unpack_from(self._map, offset)[0] + 1
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "slots": self.slot_count}
+
+    def _bucket(self, key: bytes) -> Iterator[int]:
+        """
+        Returns the offsets of the slots in which the entry with the supplied key may be cached.
+        """
+        buckets: int = max(1, self.slot_count // BUCKET_WAYS)
+        first: int = (int.from_bytes(key[:8], "little") % buckets) * BUCKET_WAYS
+        return (
+            self._slots_offset + slot * self.slot_size
+            for slot in range(first, min(first + BUCKET_WAYS, self.slot_count))
+        )
+
+    def _epoch_index(self, root: str) -> int:
+        return int.from_bytes(_key(root)[:8], "little") % self.epoch_count
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        with self._lock:
+            fcntl.flock(self._descriptor, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._descriptor, fcntl.LOCK_UN)
+
+    def _create(self, size: int) -> None:
+        slot_count: int = _slot_count(size=size)
+        os.ftruncate(
+            self._descriptor,
+            HEADER.size + EPOCH_COUNT * EPOCH.size + slot_count * SLOT_SIZE,
+        )
+        os.pwrite(
+            self._descriptor,
+            HEADER.pack(MAGIC, slot_count, SLOT_SIZE, EPOCH_COUNT),
+            0,
+        )
+        LOG.info(f"Created the entity cache at {self.path} with {slot_count} slots.")
+
+
+def _key(identifier: str) -> bytes:
+    return hashlib.blake2b(
+        identifier.encode(config.TEXT_ENCODING), digest_size=16
+    ).digest()
+
+
+def _slot_count(size: int) -> int:
+    return max(BUCKET_WAYS, size // SLOT_SIZE)
+
+
+def _victim_rank(header: Tuple, key: bytes) -> Tuple[int, int]:
+    """
+    Orders the slots of a bucket by their suitability for a new entry with the supplied key: the
+    slot already holding the key, then empty slots, then the least recently used.
+    """
+    _, length, _, _, _, used, slot_key = header
+    if slot_key == key:
+        return 0, 0
+    if not length:
+        return 1, 0
+    return 2, used
@@ -14,8 +14,10 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import json
+import os
+import uuid
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Final, Dict, Any, Optional, List, Set
 
 from co.deability.identifier.errors.NoSuchSchemaError import NoSuchSchemaError
 from co.deability.identifier.errors.SchemaAlreadyExistsError import (
@@ -26,6 +28,7 @@ from co.deability.identifier.services import validator_service
 from co.deability.identifier import config
 from co.deability.identifier.api import repositories
 from co.deability.identifier.api.repositories import entities
+from co.deability.identifier.api.repositories.entities.entity_cache import EntityCache
 from co.deability.identifier.errors.NoSuchEntityError import NoSuchEntityError
 
 """
@@ -34,10 +37,53 @@ A repository that uses an entity's data to create an identifier for the entity.
 #todo add versioning for entity files.
 """
 
+# Information about an entity that isn't part of its content (and so of its identifier), such as
+# its type and the search terms added for it automatically, kept alongside its data files.
+METADATA_FILE: Final[str] = "metadata"
+# Marks a schema property whose values are added as search terms automatically
+INDEX_ANNOTATION: Final[str] = "x-index"
+# The versions of an entity form a lineage, named for the identifier of its first version (its root.)
+# Each later version records the root's identifier in its LINEAGE_FILE, and the root records the
+# identifier of the current version in its LATEST_FILE, so that the current version can be found
+# from any version, and changed, without visiting any of the versions in between.
+LINEAGE_FILE: Final[str] = "lineage"
+LATEST_FILE: Final[str] = "latest"
+
 
 def find_entity_path(identifier: str) -> Optional[Path]:
-    entity_file: Path = next(entities.get_data_file_paths(identifier=identifier), None)
-    return entity_file
+    """
+    Returns the path of the newest data file of the current version of the entity with the
+    supplied identifier, or None if there isn't one. The file is a symlink only if the entity has
+    been deleted.
+    """
+    return _newest_data_path(identifier=latest_identifier(identifier=identifier))
+
+
+def latest_identifier(identifier: str) -> str:
+    """
+    Returns the identifier of the current version of the entity which has (or had) the supplied
+    identifier, by way of the root of its lineage. The identifier is returned unchanged if it's
+    the current version's or if no entity has it.
+
+    An entity that's updated to the content of a version of another entity joins that entity's
+    lineage, and the root of its own lineage points there; entities updated before lineages were
+    recorded are followed through the links between their data files. Either adds a step to the
+    lookup.
+
+    :param identifier: The identifier of any version of an entity.
+    :return: The identifier of the entity's current version.
+    """
+    visited: Set[str] = set()
+    while identifier not in visited:
+        visited.add(identifier)
+        root: str = _root_identifier(identifier=identifier)
+        latest: Optional[str] = _read_pointer(
+            identifier=root, name=LATEST_FILE
+        ) or _linked_successor(identifier=root)
+        if not latest or latest == identifier:
+            break
+        identifier = latest
+    return identifier
 
 
 def create_entity(entity: Dict[str, Any]) -> str:
@@ -51,83 +97,144 @@ def create_entity(entity: Dict[str, Any]) -> str:
     return identifier
 
 
+def create_entities(entities_by_id: Dict[str, Dict[str, Any]]) -> Dict[str, Path]:
+    """
+    Writes each of the supplied entities that doesn't already exist to a data file under its
+    identifier, creating the identifiers' directories together (see
+    repositories.create_identifier_paths.)
+
+    :param entities_by_id: The entities to be created, by their (calculated) identifiers.
+    :return: The path of the data file of each entity that was created, by identifier.
+    """
+    created: Dict[str, Path] = {}
+    for identifier, identifier_path in repositories.create_identifier_paths(
+        identifiers=entities_by_id
+    ).items():
+        data_path: Path = entities.calculate_new_data_path(
+            identifier_path=identifier_path
+        )
+        data_path.write_text(
+            data=json.dumps(entities_by_id[identifier]), encoding=config.TEXT_ENCODING
+        )
+        created[identifier] = data_path
+    return created
+
+
 def read_entity(identifier: str) -> Optional[Dict[str, Any]]:
-    entity_file: Path = find_entity_path(identifier=identifier)
-    result = (
-        json.loads(entity_file.read_text(encoding=config.TEXT_ENCODING))
-        if entity_file
-        else None
-    )
+    """
+    Returns the current version of the entity which has (or had) the supplied identifier, or None
+    if there isn't one or it has been deleted. If config.ENTITY_CACHE_SIZE is set, entities are
+    served from (and added to) the cache shared by every worker.
+
+    :param identifier: The identifier of any version of an entity.
+    :return: The entity's current content, or None.
+    """
+    cache: Optional[EntityCache] = get_entity_cache()
+    if cache:
+        cached: Optional[bytes] = cache.get(identifier=identifier)
+        if cached is not None:
+            return json.loads(cached.decode(config.TEXT_ENCODING))
+        root: str = _root_identifier(identifier=identifier)
+        epoch: int = cache.epoch(root=root)
+    current_identifier: str = latest_identifier(identifier=identifier)
+    entity_file: Optional[Path] = _newest_data_path(identifier=current_identifier)
+    if not entity_file:
+        return None
+    content: bytes = entity_file.read_bytes()
+    result: Any = json.loads(content.decode(config.TEXT_ENCODING))
     if result == {}:
-        result = None
+        return None
+    # An entity reached through another lineage (after a merge) depends on more than one lineage's
+    # epoch, so it isn't cached.
+    if cache and (
+        current_identifier == identifier
+        or _root_identifier(identifier=current_identifier) == root
+    ):
+        cache.put(identifier=identifier, root=root, epoch=epoch, content=content)
     return result
 
 
 def update_entity(identifier: str, entity: Dict[str, Any]) -> str:
     """
-    Returns a new identifier for the supplied entity which was previously identified by the
-    supplied identifier.
-
-    If the entity's new identifier is equal to the previous identifier, the timestamp on the data
-    file is updated (though its contents will remain unchanged), and the previous identifier is
-    returned.
-
-    If the entity's new identifier is different, but resolves to a directory which already exists
-    and contains a file, and the file is not a symlink to another file,
-
-    If the supplied entity would result in the re-creation of an old version of itself, any symlinks
-    from intervening versions are updated to point to the latest version.
-
-    :param identifier:
-    :param entity:
-    :return:
+    Returns a new identifier for the supplied entity, which updates the entity that was previously
+    identified by the supplied identifier (or by any other version in its lineage.)
+
+    The entity is written to a new data file under its new identifier, which becomes the current
+    version of the lineage, and the current version's previous data file is replaced by a link to
+    the new one. If the new identifier is equal to the current one, the effect is only to update
+    the timestamp of the data file. If the new identifier already exists, e.g. because the entity
+    has been returned to an earlier version of itself, the new data file is added alongside the
+    existing ones. Either way, the cost of an update doesn't depend on the number of versions.
+
+    :param identifier: The identifier of any version of the entity to be updated.
+    :param entity: The new content of the entity.
+    :return: The identifier of the new current version.
     """
-    new_identifier: str = entities.calculate_id_from_data(data=entity)
-    old_data_path: Path = find_entity_path(identifier=identifier)
+    current_identifier: str = latest_identifier(identifier=identifier)
+    old_data_path: Optional[Path] = _newest_data_path(identifier=current_identifier)
     if not old_data_path:
         raise NoSuchEntityError(
             message=f"The supplied identifier is recognized, but no corresponding entity was found, so the update could not be applied."
         )
-    if new_identifier == identifier:
-        new_data_path: Path = entities.calculate_new_data_path(
-            identifier_path=old_data_path.parent
-        )
-        new_data_path.write_text(data=json.dumps(entity), encoding=config.TEXT_ENCODING)
-        if old_data_path.is_symlink():
-            _link_last(first_path=old_data_path.readlink(), target_path=new_data_path)
-        entities.update_link(old_path=old_data_path, new_path=new_data_path)
-    else:
-        new_identifier_path: Path = repositories.calculate_path(
-            identifier=new_identifier
-        )
-        if not new_identifier_path.exists():
-            repositories.create_identifier_path(identifier=new_identifier)
-            new_data_path: Path = entities.calculate_new_data_path(
-                identifier_path=new_identifier_path
-            )
-            new_data_path.write_text(
-                data=json.dumps(entity), encoding=config.TEXT_ENCODING
-            )
-            entities.update_link(old_path=old_data_path, new_path=new_data_path)
+    new_identifier: str = entities.calculate_id_from_data(data=entity)
+    new_identifier_path: Path = repositories.calculate_path(identifier=new_identifier)
+    is_new: bool = not new_identifier_path.exists()
+    if is_new:
+        repositories.create_identifier_path(identifier=new_identifier)
+    new_data_path: Path = entities.calculate_new_data_path(
+        identifier_path=new_identifier_path
+    )
+    new_data_path.write_text(data=json.dumps(entity), encoding=config.TEXT_ENCODING)
+    entities.update_link(old_path=old_data_path, new_path=new_data_path)
+    if new_identifier != current_identifier:
+        root: str = _root_identifier(identifier=current_identifier)
+        if is_new:
+            _write_pointer(identifier=new_identifier, name=LINEAGE_FILE, value=root)
         else:
-            update_entity(identifier=new_identifier, entity=entity)
+            other_root: str = _root_identifier(identifier=new_identifier)
+            if other_root != root:
+                _write_pointer(
+                    identifier=other_root, name=LATEST_FILE, value=new_identifier
+                )
+                _invalidate_cached(root=other_root)
+        _write_pointer(identifier=root, name=LATEST_FILE, value=new_identifier)
+        _invalidate_cached(root=root)
     return new_identifier
 
 
 def delete_entity(identifier: str) -> None:
-    entity_path: Path = find_entity_path(identifier=identifier)
+    current_identifier: str = latest_identifier(identifier=identifier)
+    entity_path: Optional[Path] = _newest_data_path(identifier=current_identifier)
     if not entity_path:
         raise NoSuchEntityError(
             message=f"There is no entity matching the supplied identifier, so no entity was deleted."
         )
-    elif entity_path.is_symlink():
-        _link_last(
-            first_path=entity_path.readlink(),
-            target_path=entities.DELETED_ENTITY_PATH,
-        )
     entities.update_link(old_path=entity_path, new_path=entities.DELETED_ENTITY_PATH)
     assert entity_path.is_symlink()
     assert entity_path.exists()
+    _invalidate_cached(root=_root_identifier(identifier=current_identifier))
+
+
+def read_metadata(identifier: str) -> Dict[str, Any]:
+    """
+    Returns the metadata recorded for the entity with the supplied identifier, or an empty
+    dictionary if there isn't any.
+    """
+    path: Path = Path(repositories.calculate_path(identifier=identifier), METADATA_FILE)
+    try:
+        return json.loads(path.read_text(encoding=config.TEXT_ENCODING))
+    except FileNotFoundError:
+        return {}
+
+
+def write_metadata(identifier: str, metadata: Dict[str, Any]) -> None:
+    """
+    Atomically replaces the metadata recorded for the entity with the supplied identifier.
+    """
+    _replace_file(
+        path=Path(repositories.calculate_path(identifier=identifier), METADATA_FILE),
+        text=json.dumps(metadata),
+    )
 
 
 def does_entity_exist(id_or_entity: [str, Dict[str, Any]]):
@@ -145,6 +252,7 @@ def add_schema(schema: Dict[str, Any], name: str) -> None:
     if path.exists():
         raise SchemaAlreadyExistsError(name=name)
     path.write_text(data=content, encoding=config.TEXT_ENCODING)
+    validator_service.invalidate()
 
 
 def update_schema(schema: Dict[str, Any], name: str) -> None:
@@ -152,7 +260,8 @@ def update_schema(schema: Dict[str, Any], name: str) -> None:
     path = Path(config.SCHEMA_PATH, f"{name.lower()}.json")
     if not path.exists():
         raise NoSuchSchemaError()
-    path.write_text(data=content, encoding=config.TEXT_ENCODING)
+    _replace_file(path=path, text=content)
+    validator_service.invalidate()
 
 
 def remove_schema(name: str) -> None:
@@ -160,6 +269,7 @@ def remove_schema(name: str) -> None:
     if not path.exists():
         raise NoSuchSchemaError()
     path.unlink(missing_ok=True)
+    validator_service.invalidate()
 
 
 def get_schema(name: Optional[str] = None) -> Dict[str, Any]:
@@ -172,16 +282,81 @@ def get_schema(name: Optional[str] = None) -> Dict[str, Any]:
     return {name: schema}
 
 
-def _link_last(first_path: Path, target_path: Path):
-    if first_path:
-        if first_path.is_symlink():
-            next_path = first_path.readlink()
-            while next_path and next_path.is_symlink():
-                current_path = next_path
-                next_path = next_path.readlink()
-                if not next_path:
-                    entities.update_link(old_path=current_path, new_path=target_path)
-            if next_path:
-                entities.update_link(old_path=next_path, new_path=target_path)
-        else:
-            entities.update_link(old_path=first_path, new_path=target_path)
+def get_indexed_fields(entity_type: Optional[str]) -> List[str]:
+    """
+    Returns the names of the properties that the schema for the supplied entity type marks with
+    INDEX_ANNOTATION, e.g. {"properties": {"city": {"type": "string", "x-index": true}}}. If
+    there's no such schema, the list is empty.
+    """
+    if not entity_type:
+        return []
+    schema: Dict[str, Any] = (
+        validator_service.get_schema(entity_type=entity_type.lower()) or {}
+    )
+    return [
+        name
+        for name, definition in schema.get("properties", {}).items()
+        if isinstance(definition, dict) and definition.get(INDEX_ANNOTATION) is True
+    ]
+
+
+def get_entity_cache() -> Optional[EntityCache]:
+    """
+    Returns the entity cache shared by the workers using BASE_PATH if config.ENTITY_CACHE_SIZE is
+    set; otherwise returns None.
+    """
+    if not config.ENTITY_CACHE_SIZE:
+        return None
+    return EntityCache.for_path(base_path=repositories.BASE_PATH)
+
+
+def _invalidate_cached(root: str) -> None:
+    cache: Optional[EntityCache] = get_entity_cache()
+    if cache:
+        cache.invalidate(root=root)
+
+
+def _newest_data_path(identifier: str) -> Optional[Path]:
+    return max(entities.get_data_file_paths(identifier=identifier), default=None)
+
+
+def _root_identifier(identifier: str) -> str:
+    return _read_pointer(identifier=identifier, name=LINEAGE_FILE) or identifier
+
+
+def _linked_successor(identifier: str) -> Optional[str]:
+    """
+    Returns the identifier of the version that an entity updated before lineages were recorded was
+    updated to, which its newest data file links to, or None if there isn't one.
+    """
+    data_path: Optional[Path] = _newest_data_path(identifier=identifier)
+    if not data_path or not data_path.is_symlink():
+        return None
+    target_path: Path = data_path.readlink()
+    if (
+        target_path.parent == data_path.parent
+        or target_path == entities.DELETED_ENTITY_PATH
+    ):
+        return None
+    return repositories.calculate_identifier(identifier_path=target_path.parent)
+
+
+def _read_pointer(identifier: str, name: str) -> Optional[str]:
+    try:
+        return Path(repositories.calculate_path(identifier=identifier), name).read_text(
+            encoding=config.TEXT_ENCODING
+        )
+    except FileNotFoundError:
+        return None
+
+
+def _write_pointer(identifier: str, name: str, value: str) -> None:
+    _replace_file(
+        path=Path(repositories.calculate_path(identifier=identifier), name), text=value
+    )
+
+
+def _replace_file(path: Path, text: str) -> None:
+    temporary: Path = Path(path.parent, f".{path.name}.{uuid.uuid4().hex}")
+    temporary.write_text(data=text, encoding=config.TEXT_ENCODING)
+    os.replace(temporary, path)
@@ -14,16 +14,29 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import json
+import os
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Iterator
+from typing import Final, Dict, Any, List, Optional, Iterator, Set, Tuple
 
 from co.deability.identifier import config
 from co.deability.identifier.api import repositories
 from co.deability.identifier.api.repositories import entities
 from co.deability.identifier.api.repositories.entities import entity_repository
+from co.deability.identifier.api.repositories.entities.posting_list import PostingList
+from co.deability.identifier.errors.IdentifierAlreadyExistsError import (
+    IdentifierAlreadyExistsError,
+)
 from co.deability.identifier.errors.BadRequestError import BadRequestError
 from co.deability.identifier.errors.NoSuchEntityError import NoSuchEntityError
 
+# Operators combining individually indexed search terms; see find_matching_entity_ids.
+AND: Final[str] = "$and"
+OR: Final[str] = "$or"
+NOT: Final[str] = "$not"
+# The approximate number of bytes a directory's size grows by per entry, used to estimate the
+# number of entries in a large index without listing it (see _count_links)
+DIRECTORY_ENTRY_SIZE: Final[int] = 48
+
 
 def create_index(identifier: str, index: Dict[str, Any]) -> None:
     """
@@ -39,9 +52,19 @@ def create_index(identifier: str, index: Dict[str, Any]) -> None:
     if not target_path:
         raise NoSuchEntityError(message="The target identifier is not recognized.")
     index_identifier: str = entities.calculate_id_from_data(data=index)
+    if config.INDEX_FORMAT == "postings":
+        if not repositories.identifier_exists(identifier=index_identifier):
+            try:
+                repositories.create_identifier_path(identifier=index_identifier)
+            except IdentifierAlreadyExistsError:
+                pass  # created concurrently by another request
+        PostingList(path=repositories.calculate_path(identifier=index_identifier)).add(
+            identifier=identifier
+        )
+        return
     index_identifier_path: Path = (
         repositories.create_identifier_path(identifier=index_identifier)
-        if not entities.find_identifier(data=index)
+        if not repositories.identifier_exists(identifier=index_identifier)
         else repositories.calculate_path(identifier=index_identifier)
     )
     new_data_path: Path = entities.calculate_new_data_path(
@@ -50,6 +73,41 @@ def create_index(identifier: str, index: Dict[str, Any]) -> None:
     new_data_path.symlink_to(target=target_path)
 
 
+def create_index_entries(targets: Dict[str, Path], index: Dict[str, Any]) -> None:
+    """
+    Adds entries to the supplied index for many entities at once, looking up the index only once.
+    Unlike create_index, the entities aren't looked up.
+
+    :param targets: The path of the data file of each entity, by the entity's identifier.
+    :param index: The index to which the entries are added.
+    """
+    if not index:
+        raise BadRequestError("The index terms cannot be empty.")
+    if not targets:
+        return
+    index_identifier: str = entities.calculate_id_from_data(data=index)
+    if not repositories.identifier_exists(identifier=index_identifier):
+        try:
+            repositories.create_identifier_path(identifier=index_identifier)
+        except IdentifierAlreadyExistsError:
+            pass  # created concurrently by another request
+    index_identifier_path: Path = repositories.calculate_path(
+        identifier=index_identifier
+    )
+    if config.INDEX_FORMAT == "postings":
+        PostingList(path=index_identifier_path).add_all(identifiers=targets)
+        return
+    for target_path in targets.values():
+        while True:
+            try:
+                entities.calculate_new_data_path(
+                    identifier_path=index_identifier_path
+                ).symlink_to(target=target_path)
+                break
+            except FileExistsError:
+                continue  # the entries are named for the microsecond they were added
+
+
 def delete_index(index_identifier: [str]) -> None:
     index_identifier_paths: Iterator[Path] = entities.get_data_file_paths(
         identifier=index_identifier
@@ -63,47 +121,261 @@ def delete_index(index_identifier: [str]) -> None:
             entities.update_link(
                 old_path=index_identifier_path, new_path=entities.DELETED_ENTITY_PATH
             )
+    if repositories.identifier_exists(identifier=index_identifier):
+        PostingList(
+            path=repositories.calculate_path(identifier=index_identifier)
+        ).remove_all()
+
+
+def remove_index_entry(identifier: str, index: Dict[str, Any]) -> None:
+    """
+    Removes the entry (if any) that was added to the supplied index for the entity with the
+    supplied identifier, leaving the index's other entries in place.
+
+    :param identifier: The identifier the entry was added for, which may since have been updated.
+    :param index: The index from which the entry is removed.
+    """
+    index_identifier_path: Optional[Path] = _get_index_identifier_path(index=index)
+    if not index_identifier_path:
+        return
+    postings: PostingList = PostingList(path=index_identifier_path)
+    if postings.exists():
+        postings.remove(identifier=identifier)
+    entity_path: Path = repositories.calculate_path(identifier=identifier)
+    index_identifier: str = repositories.calculate_identifier(
+        identifier_path=index_identifier_path
+    )
+    for entry_path in entities.get_data_file_paths(identifier=index_identifier):
+        if entry_path.is_symlink() and entry_path.readlink().parent == entity_path:
+            entities.update_link(
+                old_path=entry_path, new_path=entities.DELETED_ENTITY_PATH
+            )
 
 
 def find_entity_ids(index: Dict[str, Any]) -> List[str]:
     found_entity_ids: List[str] = []
-    entity_paths: List[Path] = _get_entity_paths(index=index)
-    for entity_path in entity_paths:
-        found_entity_ids.append(
-            repositories.calculate_identifier(identifier_path=entity_path.resolve())
-        )
+    for entity_path in _get_entity_paths(index=index):
+        identifier: Optional[str] = _entity_identifier(entity_path=entity_path)
+        if identifier:
+            found_entity_ids.append(identifier)
     return found_entity_ids
 
 
 def find_entities(index: Dict[str, Any]) -> Dict[str, Any]:
-    found_entities: Dict[str, Any] = {}
-    entity_paths = _get_entity_paths(index=index)
-    for entity_path in entity_paths:
+    return dict(iter_entities(index=index))
+
+
+def iter_entities(index: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Returns a generator that produces the identifier and content of each (non-deleted) entity
+    matching the supplied index, reading each entity only when it's requested, so that callers can
+    stream any number of matches without holding their content in memory.
+
+    :param index: The index terms the entities must match.
+    :return: A generator of (identifier, entity) pairs.
+    """
+    for entity_path in _get_entity_paths(index=index):
         entity = json.loads(entity_path.read_text(encoding=config.TEXT_ENCODING))
         if entity:
-            identifier: str = repositories.calculate_identifier(
-                identifier_path=entity_path.resolve()
+            identifier: str = _entity_identifier(entity_path=entity_path)
+            yield identifier, entity
+
+
+def is_query(search_terms: Dict[str, Any]) -> bool:
+    """
+    Returns True if the supplied search terms are a combination of other search terms using one of
+    the AND, OR, or NOT operators, rather than a search term to be matched exactly.
+    """
+    return (
+        isinstance(search_terms, dict)
+        and len(search_terms) == 1
+        and next(iter(search_terms)) in (AND, OR, NOT)
+    )
+
+
+def find_matching_entity_ids(query: Dict[str, Any]) -> List[str]:
+    """
+    Returns the identifiers of the entities matching the supplied query, in which individually
+    indexed search terms are combined with operators, e.g.:
+
+        {"$and": [{"entity type": "person"}, {"$or": [{"city": "Denver"}, {"city": "Boulder"}]},
+                  {"$not": {"status": "inactive"}}]}
+
+    NOT is only allowed among the operands of an AND, so that a query can never match "everything
+    but" a set. Operands of an AND are evaluated in order of the estimated size of their results,
+    smallest first, and evaluation stops as soon as the intersection is empty. Only identifiers are
+    used to compute the answer; no entity is read.
+
+    :param query: The query to be evaluated.
+    :return: The sorted identifiers of the matching entities.
+    """
+    return sorted(_evaluate(query=query))
+
+
+def find_matching_entities(query: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(iter_matching_entities(query=query))
+
+
+def iter_matching_entities(
+    query: Dict[str, Any]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Returns a generator of the identifier and content of each entity matching the supplied query
+    (see find_matching_entity_ids.) The query is evaluated (and any error in it raised) before
+    this function returns, and entities are read only once the matches are known.
+    """
+    return _read_entities(identifiers=find_matching_entity_ids(query=query))
+
+
+def _read_entities(identifiers: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for identifier in identifiers:
+        entity: Optional[Dict[str, Any]] = entity_repository.read_entity(
+            identifier=identifier
+        )
+        if entity:
+            yield identifier, entity
+
+
+def _evaluate(query: Dict[str, Any]) -> Set[str]:
+    if not is_query(search_terms=query):
+        return set(find_entity_ids(index=query))
+    operator, operands = next(iter(query.items()))
+    if operator == NOT:
+        raise BadRequestError(message=f"{NOT} can only be used within {AND}.")
+    if (
+        not isinstance(operands, list)
+        or not operands
+        or not all(isinstance(operand, dict) and operand for operand in operands)
+    ):
+        raise BadRequestError(
+            message=f"{operator} requires a list of non-empty search terms."
+        )
+    for operand in operands:
+        if len(operand) > 1 and any(key in (AND, OR, NOT) for key in operand):
+            raise BadRequestError(
+                message="An operator must be the only key of the search terms it's in."
             )
-            found_entities.update({identifier: entity})
-    return found_entities
+    if operator == OR:
+        return set().union(*(_evaluate(query=operand) for operand in operands))
+    included: List[Dict[str, Any]] = [
+        operand for operand in operands if next(iter(operand)) != NOT
+    ]
+    excluded: List[Dict[str, Any]] = [
+        operand[NOT] for operand in operands if next(iter(operand)) == NOT
+    ]
+    if not included:
+        raise BadRequestError(
+            message=f"{AND} requires at least one search term that isn't negated."
+        )
+    included.sort(key=_estimate)
+    matches: Set[str] = _evaluate(query=included[0])
+    for operand in included[1:]:
+        if not matches:
+            return matches
+        matches &= _evaluate(query=operand)
+    for operand in excluded:
+        if not matches:
+            break
+        matches -= _evaluate(query=operand)
+    return matches
+
+
+def _estimate(query: Dict[str, Any]) -> int:
+    """
+    Returns a cheap estimate of the number of entities matching the supplied query, from the
+    size of each search term's index (see _count_links and PostingList.__len__.)
+    """
+    if not is_query(search_terms=query):
+        index_identifier_path: Optional[Path] = _get_index_identifier_path(index=query)
+        if not index_identifier_path:
+            return 0
+        return _count_links(index_identifier_path=index_identifier_path) + len(
+            PostingList(path=index_identifier_path)
+        )
+    operator, operands = next(iter(query.items()))
+    if not isinstance(operands, list) or not all(
+        isinstance(operand, dict) for operand in operands
+    ):
+        return 0  # rejected when it's evaluated
+    if operator == OR:
+        return sum(_estimate(query=operand) for operand in operands)
+    return min(
+        (
+            _estimate(query=operand)
+            for operand in operands
+            if operand and next(iter(operand)) != NOT
+        ),
+        default=0,
+    )
+
+
+def _count_links(index_identifier_path: Path) -> int:
+    """
+    Returns the number of symlink entries in the supplied index directory: exactly, if the
+    directory fits in a single block and so is cheap to list, and otherwise estimated from its size
+    without listing it.
+    """
+    stat: os.stat_result = index_identifier_path.stat()
+    if stat.st_size > stat.st_blksize:
+        return stat.st_size // DIRECTORY_ENTRY_SIZE
+    with os.scandir(index_identifier_path) as entries:
+        return sum(
+            1 for entry in entries if entry.name.endswith(repositories.DATA_FILE)
+        )
+
+
+def _entity_identifier(entity_path: Path) -> Optional[str]:
+    """
+    Returns the identifier of the entity whose current data file is at the supplied path (see
+    _get_entity_paths), or None if the entity has been deleted.
+    """
+    if (
+        entity_path.is_symlink()
+        and entity_path.readlink() == entities.DELETED_ENTITY_PATH
+    ):
+        return None
+    return repositories.calculate_identifier(identifier_path=entity_path.parent)
 
 
 def _get_index_identifier_path(index: Dict[str, Any]) -> Optional[Path]:
     if not index:
         raise BadRequestError("The index terms cannot be empty.")
     index_identifier: str = entities.calculate_id_from_data(data=index)
-    index_identifier_path: Path = repositories.calculate_path(
-        identifier=index_identifier
-    )
-    return index_identifier_path if index_identifier_path.exists() else None
+    if not repositories.identifier_exists(identifier=index_identifier):
+        return None
+    return repositories.calculate_path(identifier=index_identifier)
 
 
-def _get_entity_paths(index: Dict[str, Any]) -> List[Path]:
+def _get_entity_paths(index: Dict[str, Any]) -> Iterator[Path]:
+    """
+    Returns a generator of the paths of the entity data files indexed under the supplied index,
+    whether the entries are stored as symlinks or in a posting list (see config.INDEX_FORMAT.)
+    Entries are resolved to the current version of each entity through its lineage (see
+    entity_repository.latest_identifier) rather than by following links from version to version,
+    and since several entries can resolve to the same version, each path is produced only once.
+    """
     index_identifier_path: Path = _get_index_identifier_path(index=index)
-    entity_paths: List[Path] = []
+    produced: Set[Path] = set()
     if index_identifier_path:
         index_identifier: str = repositories.calculate_identifier(
             identifier_path=index_identifier_path
         )
-        entity_paths += entities.get_data_file_paths(identifier=index_identifier)
-    return entity_paths
+        for entry_path in entities.get_data_file_paths(identifier=index_identifier):
+            target_path: Path = entry_path.readlink()
+            if target_path == entities.DELETED_ENTITY_PATH:
+                continue
+            entity_path: Optional[Path] = entity_repository.find_entity_path(
+                identifier=repositories.calculate_identifier(
+                    identifier_path=target_path.parent
+                )
+            )
+            if entity_path and entity_path not in produced:
+                produced.add(entity_path)
+                yield entity_path
+        for identifier in PostingList(path=index_identifier_path):
+            entity_path: Optional[Path] = entity_repository.find_entity_path(
+                identifier=identifier
+            )
+            if entity_path and entity_path not in produced:
+                produced.add(entity_path)
+                yield entity_path
@@ -0,0 +1,331 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import fcntl
+import heapq
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from typing import Final, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from co.deability.identifier import config
+from co.deability.identifier.config import LOG
+
+"""
+Posting lists of the entities indexed under an index identifier (see config.INDEX_FORMAT), kept in
+the index identifier's directory instead of one symlink per index entry.
+
+Entity identifiers are stored as fixed-width binary records: a compacted file (POSTINGS_FILE) holds
+them sorted and without duplicates, and additions and removals are appended to a buffer
+(BUFFER_FILE) with a single write each, as records prefixed with ADDED or REMOVED; the last change
+buffered for an identifier wins. Once the buffer holds config.POSTINGS_BUFFER_SIZE changes it's
+merged into the compacted file by a background thread. Appenders and readers hold a shared lock on LOCK_FILE, and
+compaction holds an exclusive one, so readers always see either the old or the new files; readers
+only hold the lock long enough to open the files, and then read them without blocking compaction.
+"""
+
+POSTINGS_FILE: Final[str] = "postings.bin"
+BUFFER_FILE: Final[str] = "postings.buf"
+COMPACTING_FILE: Final[str] = "postings.buf.compacting"
+LOCK_FILE: Final[str] = "postings.lock"
+READ_SIZE: Final[int] = 64 * 1024
+ADDED: Final[bytes] = b"+"
+REMOVED: Final[bytes] = b"-"
+
+_compactor: Optional[ThreadPoolExecutor] = None
+_compactor_lock: threading.Lock = threading.Lock()
+_scheduled: Set[Path] = set()
+
+
+class PostingList:
+    """
+    The set of entity identifiers indexed under one index identifier.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        identifier_length: int = config.IDENTIFIER_LENGTH,
+        buffer_size: int = config.POSTINGS_BUFFER_SIZE,
+    ) -> None:
+        """
+        :param path: The directory of the index identifier.
+        :param identifier_length: The length of the (hexadecimal) entity identifiers.
+        :param buffer_size: The number of buffered entries that triggers compaction.
+        """
+        self.path: Path = Path(path)
+        self.width: int = identifier_length // 2
+        self.buffer_size: int = buffer_size
+
+    def exists(self) -> bool:
+        """
+        Returns True if any entries have been added to this posting list.
+        """
+        return any(
+            Path(self.path, name).exists()
+            for name in (POSTINGS_FILE, BUFFER_FILE, COMPACTING_FILE)
+        )
+
+    def add(self, identifier: str) -> None:
+        """
+        Adds the supplied entity identifier to the posting list.
+        """
+        self._buffer(records=ADDED + bytes.fromhex(identifier))
+
+    def add_all(self, identifiers: Iterable[str]) -> None:
+        """
+        Adds the supplied entity identifiers to the posting list with a single write.
+        """
+        records: bytes = b"".join(
+            ADDED + bytes.fromhex(identifier) for identifier in identifiers
+        )
+        if records:
+            self._buffer(records=records)
+
+    def remove(self, identifier: str) -> None:
+        """
+        Removes the supplied entity identifier from the posting list.
+        """
+        self._buffer(records=REMOVED + bytes.fromhex(identifier))
+
+    def _buffer(self, records: bytes) -> None:
+        """
+        Appends the supplied changes to the buffer, scheduling compaction if the buffer has filled
+        up.
+        """
+        with self._locked(operation=fcntl.LOCK_SH):
+            descriptor: int = os.open(
+                Path(self.path, BUFFER_FILE),
+                os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o660,
+            )
+            try:
+                os.write(descriptor, records)
+                buffered: int = os.fstat(descriptor).st_size // (self.width + 1)
+            finally:
+                os.close(descriptor)
+        if buffered >= self.buffer_size:
+            _schedule(posting_list=self)
+
+    def remove_all(self) -> None:
+        """
+        Removes every entry from the posting list.
+        """
+        with self._locked(operation=fcntl.LOCK_EX):
+            for name in (POSTINGS_FILE, BUFFER_FILE, COMPACTING_FILE):
+                Path(self.path, name).unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of entries in the posting list, counting every buffered change as an
+        addition; it's meant as a cheap estimate.
+        """
+        total: int = 0
+        for name in (POSTINGS_FILE, BUFFER_FILE, COMPACTING_FILE):
+            width: int = self.width if name == POSTINGS_FILE else self.width + 1
+            try:
+                total += Path(self.path, name).stat().st_size // width
+            except FileNotFoundError:
+                pass
+        return total
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Returns a generator of the entity identifiers in the posting list, in sorted order and
+        without duplicates. The compacted file is streamed, so memory use is bounded by the size of
+        the buffer.
+        """
+        with self._locked(operation=fcntl.LOCK_SH):
+            files: Dict[str, Optional[int]] = {
+                name: _open_if_exists(path=Path(self.path, name))
+                for name in (POSTINGS_FILE, BUFFER_FILE, COMPACTING_FILE)
+            }
+        yield from self._merged(files=files)
+
+    def __contains__(self, identifier: str) -> bool:
+        """
+        Returns True if the supplied entity identifier is in the posting list, using a binary search
+        of the compacted file.
+        """
+        record: bytes = bytes.fromhex(identifier)
+        with self._locked(operation=fcntl.LOCK_SH):
+            files: Dict[str, Optional[int]] = {
+                name: _open_if_exists(path=Path(self.path, name))
+                for name in (POSTINGS_FILE, BUFFER_FILE, COMPACTING_FILE)
+            }
+        try:
+            added: Optional[bool] = self._changes(files=files).get(record)
+            if added is not None:
+                return added
+            return self._search(descriptor=files[POSTINGS_FILE], record=record)
+        finally:
+            _close(files=files)
+
+    def compact(self) -> None:
+        """
+        Merges the buffer into the compacted file.
+        """
+        with self._locked(operation=fcntl.LOCK_EX):
+            buffer: Path = Path(self.path, BUFFER_FILE)
+            compacting: Path = Path(self.path, COMPACTING_FILE)
+            if buffer.exists():
+                if compacting.exists():
+                    # Left by an interrupted compaction; keep both
+                    with open(buffer, "rb") as source, open(compacting, "ab") as target:
+                        target.write(source.read())
+                    buffer.unlink()
+                else:
+                    os.rename(buffer, compacting)
+            if not compacting.exists():
+                return
+            files: Dict[str, Optional[int]] = {
+                POSTINGS_FILE: _open_if_exists(path=Path(self.path, POSTINGS_FILE)),
+                BUFFER_FILE: None,
+                COMPACTING_FILE: _open_if_exists(path=compacting),
+            }
+            temporary: Path = Path(self.path, f".{POSTINGS_FILE}.{os.getpid()}")
+            with open(temporary, "wb") as target:
+                chunk: List[bytes] = []
+                for identifier in self._merged(files=files):
+                    chunk.append(bytes.fromhex(identifier))
+                    if len(chunk) * self.width >= READ_SIZE:
+                        target.write(b"".join(chunk))
+                        chunk = []
+                target.write(b"".join(chunk))
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temporary, Path(self.path, POSTINGS_FILE))
+            compacting.unlink()
+
+    def _merged(self, files: Dict[str, Optional[int]]) -> Iterator[str]:
+        try:
+            changes: Dict[bytes, bool] = self._changes(files=files)
+            added: List[bytes] = sorted(
+                record for record, is_added in changes.items() if is_added
+            )
+            compacted: Iterator[bytes] = (
+                record
+                for record in self._stream(descriptor=files[POSTINGS_FILE])
+                if record not in changes
+            )
+            previous: Optional[bytes] = None
+            for record in heapq.merge(compacted, added):
+                if record != previous:
+                    yield record.hex()
+                previous = record
+        finally:
+            _close(files=files)
+
+    def _changes(self, files: Dict[str, Optional[int]]) -> Dict[bytes, bool]:
+        """
+        Returns the buffered changes, oldest first, as a dictionary of each changed identifier to
+        True if it was last added or False if it was last removed.
+        """
+        changes: Dict[bytes, bool] = {}
+        width: int = self.width + 1
+        for name in (COMPACTING_FILE, BUFFER_FILE):
+            descriptor: Optional[int] = files[name]
+            if descriptor is None:
+                continue
+            content: bytes = os.pread(descriptor, os.fstat(descriptor).st_size, 0)
+            for offset in range(0, len(content) - width + 1, width):
+                changes[content[offset + 1 : offset + width]] = (
+                    content[offset : offset + 1] == ADDED
+                )
+        return changes
+
+    def _stream(self, descriptor: Optional[int]) -> Iterator[bytes]:
+        if descriptor is None:
+            return
+        chunk_size: int = READ_SIZE - READ_SIZE % self.width
+        offset: int = 0
+        while True:
+            content: bytes = os.pread(descriptor, chunk_size, offset)
+            if not content:
+                return
+            for start in range(0, len(content), self.width):
+                yield content[start : start + self.width]
+            offset += len(content)
+
+    def _search(self, descriptor: Optional[int], record: bytes) -> bool:
+        if descriptor is None or not os.fstat(descriptor).st_size:
+            return False
+        with mmap.mmap(descriptor, 0, access=mmap.ACCESS_READ) as postings:
+            low, high = 0, len(postings) // self.width
+            while low < high:
+                middle: int = (low + high) // 2
+                found: bytes = postings[middle * self.width : (middle + 1) * self.width]
+                if found == record:
+                    return True
+                if found < record:
+                    low = middle + 1
+                else:
+                    high = middle
+        return False
+
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
+        descriptor: int = os.open(
+            Path(self.path, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o660
+        )
+        try:
+            fcntl.flock(descriptor, operation)
+            yield
+        finally:
+            os.close(descriptor)
+
+
+def _open_if_exists(path: Path) -> Optional[int]:
+    try:
+        return os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+
+
+def _close(files: Dict[str, Optional[int]]) -> None:
+    for name, descriptor in files.items():
+        if descriptor is not None:
+            os.close(descriptor)
+            files[name] = None
+
+
+def _schedule(posting_list: PostingList) -> None:
+    """
+    Compacts the supplied posting list on this process's background compaction thread, unless it's
+    already waiting to be compacted.
+    """
+    global _compactor
+    with _compactor_lock:
+        if posting_list.path in _scheduled:
+            return
+        _scheduled.add(posting_list.path)
+        if _compactor is None:
+            _compactor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="identifier-compactor"
+            )
+    _compactor.submit(_compact, posting_list)
+
+
+def _compact(posting_list: PostingList) -> None:
+    with _compactor_lock:
+        _scheduled.discard(posting_list.path)
+    try:
+        posting_list.compact()
+    except Exception as ex:
+        LOG.error(f"Unable to compact the posting list at {posting_list.path}: {ex}")
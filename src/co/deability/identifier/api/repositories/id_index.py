@@ -0,0 +1,541 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import bisect
+import fcntl
+import heapq
+import mmap
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from typing import (
+    Final,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from co.deability.identifier import config
+from co.deability.identifier.config import LOG
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
+
+"""
+A sorted index of every 32-character identifier in a data tree (see config.ID_INDEX), stored in the
+INDEX_DIR directory of the tree as packed 16-byte records, so that whether an identifier exists can
+be answered without looking up its directory.
+
+The index consists of sorted, duplicate-free segment files, listed (oldest first) in MANIFEST_FILE,
+and a delta file to which new identifiers are appended with a single write per batch. Each process
+memory-maps the segments, which are searched by binary search (narrowed by a list of every
+FENCE_INTERVAL-th record), and keeps the identifiers in the delta in a set, reading only what's been
+appended since its last look. Once the delta holds config.ID_INDEX_MERGE_SIZE identifiers, a
+background thread sorts it into a new segment and merges the newest segments whenever the newer of
+the two is at least half the size of the older, so there are only ever a few segments, of roughly
+doubling size.
+
+Appending to the delta and replacing the manifest are done under an exclusive lock on LOCK_FILE,
+which also holds a version number that's incremented by each change and memory-mapped by every
+process. Readers don't lock at all: an identifier that's found is there for good, and one that
+isn't is only looked for again if the version has changed, after checking the manifest and delta
+(and that the manifest didn't change while they were reading the delta.) If the index doesn't exist
+when it's opened, it's built from the data tree.
+"""
+
+INDEX_DIR: Final[str] = ".identifiers.index"
+MANIFEST_FILE: Final[str] = "manifest"
+DELTA_FILE: Final[str] = "delta"
+MERGING_FILE: Final[str] = "delta.merging"
+LOCK_FILE: Final[str] = "lock"
+MERGE_LOCK_FILE: Final[str] = "merge.lock"
+SEGMENT_PREFIX: Final[str] = "segment-"
+RECORD_SIZE: Final[int] = 16
+VERSION: Final[struct.Struct] = struct.Struct("<Q")
+# Every FENCE_INTERVAL-th record of each segment is kept in memory to narrow its binary search
+FENCE_INTERVAL: Final[int] = 64
+READ_SIZE: Final[int] = 64 * 1024
+# The number of identifiers sorted in memory at a time while the index is built
+BUILD_CHUNK_SIZE: Final[int] = 1 << 18
+
+_merger: Optional[ThreadPoolExecutor] = None
+_merger_lock: threading.Lock = threading.Lock()
+_scheduled: Set[Path] = set()
+
+
+class IdIndex:
+    """
+    The sorted index of the identifiers in a data tree. Instances are shared per index directory
+    within a process; use IdIndex.for_path.
+    """
+
+    _indexes: Dict[Path, "IdIndex"] = {}
+    _indexes_lock: threading.Lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        rebuild: Callable[[], Iterable[str]],
+        merge_size: int = config.ID_INDEX_MERGE_SIZE,
+    ) -> None:
+        """
+        Opens the index in the directory at the supplied path, building it from the identifiers
+        produced by rebuild if it doesn't exist yet.
+
+        :param path: The index directory.
+        :param rebuild: A function returning every identifier already in the data tree.
+        :param merge_size: The number of identifiers in the delta that triggers a merge.
+        """
+        self.path: Path = Path(path).absolute()
+        self.merge_size: int = merge_size
+        self._rebuild: Callable[[], Iterable[str]] = rebuild
+        self._lock: threading.Lock = threading.Lock()
+        self._state_descriptor: Optional[int] = None
+        self._state: Optional[mmap.mmap] = None
+        self._version: Optional[int] = None
+        self._manifest_stamp: Optional[Tuple[int, int]] = None
+        self._segments: List[Tuple[mmap.mmap, List[bytes]]] = []
+        self._pending: Set[bytes] = set()
+        # The number of bytes of each delta file (by inode) already read into _pending
+        self._offsets: Dict[int, int] = {}
+        self._open()
+
+    @classmethod
+    def for_path(
+        cls, base_path: Union[str, PathLike], rebuild: Callable[[], Iterable[str]]
+    ) -> "IdIndex":
+        """
+        Returns the index of the data tree at the supplied base path, opening it if this process
+        hasn't already done so.
+        """
+        # Keyed by the base path as supplied, so that finding an index that's already open takes a
+        # single dictionary lookup; two spellings of the same path just share the index through
+        # its files, as separate processes do.
+        index: Optional[IdIndex] = cls._indexes.get(base_path)
+        if index is None:
+            with cls._indexes_lock:
+                index = cls._indexes.get(base_path)
+                if index is None:
+                    index = IdIndex(path=Path(base_path, INDEX_DIR), rebuild=rebuild)
+                    cls._indexes[base_path] = index
+        return index
+
+    def add(self, identifier: str) -> None:
+        """
+        Adds the supplied identifier to the index.
+        """
+        self.add_all(identifiers=[identifier])
+
+    def add_all(self, identifiers: Union[IdentifierArray, Iterable[str]]) -> None:
+        """
+        Adds the supplied identifiers to the index with a single write, scheduling a merge if the
+        delta has filled up. Identifiers that aren't 32 characters long are ignored.
+        """
+        if isinstance(identifiers, IdentifierArray):
+            # Already packed as records
+            records: bytes = (
+                bytes(identifiers) if identifiers.length == 2 * RECORD_SIZE else b""
+            )
+        else:
+            records = b"".join(
+                bytes.fromhex(identifier)
+                for identifier in identifiers
+                if len(identifier) == 2 * RECORD_SIZE
+            )
+        if not records:
+            return
+        with self._lock:
+            self._reopen_if_removed()
+        with self._locked(name=LOCK_FILE, operation=fcntl.LOCK_EX):
+            descriptor: int = os.open(
+                Path(self.path, DELTA_FILE),
+                os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o660,
+            )
+            try:
+                os.write(descriptor, records)
+                size: int = os.fstat(descriptor).st_size
+            finally:
+                os.close(descriptor)
+            self._increment_version()
+        if size >= self.merge_size * RECORD_SIZE:
+            _schedule(index=self)
+
+    def __contains__(self, identifier: str) -> bool:
+        """
+        Returns True if the supplied identifier is in the index.
+        """
+        record: bytes = bytes.fromhex(identifier)
+        with self._lock:
+            self._reopen_if_removed()
+            if self._contains(record=record):
+                return True
+            return self._refresh() and self._contains(record=record)
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Returns a generator of the identifiers in the index, in sorted order and without duplicates.
+        """
+        with self._lock:
+            self._reopen_if_removed()
+            self._refresh()
+            segments: List[mmap.mmap] = [segment for segment, _ in self._segments]
+            pending: List[bytes] = sorted(self._pending)
+        for record in _unique(
+            heapq.merge(*(_records(segment) for segment in segments), pending)
+        ):
+            yield record.hex()
+
+    def merge(self) -> None:
+        """
+        Sorts the delta into a new segment, and merges the newest segments while the newer of the
+        two is at least half the size of the older.
+        """
+        with self._locked(name=MERGE_LOCK_FILE, operation=fcntl.LOCK_EX):
+            delta: Path = Path(self.path, DELTA_FILE)
+            merging: Path = Path(self.path, MERGING_FILE)
+            with self._locked(name=LOCK_FILE, operation=fcntl.LOCK_EX):
+                if delta.exists():
+                    if merging.exists():
+                        # Left by an interrupted merge; keep both
+                        with open(delta, "rb") as source, open(merging, "ab") as target:
+                            target.write(source.read())
+                        delta.unlink()
+                    else:
+                        os.rename(delta, merging)
+            if not merging.exists():
+                return
+            content: bytes = merging.read_bytes()
+            records: List[bytes] = sorted(
+                {
+                    content[offset : offset + RECORD_SIZE]
+                    for offset in range(0, len(content) - RECORD_SIZE + 1, RECORD_SIZE)
+                }
+            )
+            current: List[str] = self._read_manifest()
+            segments: List[str] = list(current)
+            if records:
+                segments.append(self._write_segment(records=records))
+            segments = self._merge_tiers(segments=segments)
+            with self._locked(name=LOCK_FILE, operation=fcntl.LOCK_EX):
+                self._write_manifest(segments=segments)
+                merging.unlink()
+                self._increment_version()
+            for name in set(current) - set(segments):
+                Path(self.path, name).unlink(missing_ok=True)
+
+    def _contains(self, record: bytes) -> bool:
+        return record in self._pending or any(
+            _search(segment=segment, fences=fences, record=record)
+            for segment, fences in self._segments
+        )
+
+    def _refresh(self) -> bool:
+        """
+        Brings this process's view of the index up to date with the manifest and the delta, unless
+        the index hasn't changed since it was last brought up to date. Must be called with
+        self._lock held.
+
+        :return: True if the index had changed; False otherwise.
+        """
+        version: int = VERSION.unpack_from(self._state)[0]
+        if version == self._version:
+            return False
+        self._version = version
+        while True:
+            stamp: Optional[Tuple[int, int]] = _stamp(Path(self.path, MANIFEST_FILE))
+            if stamp is None:
+                # Removed (see remove_index) since it was opened
+                self._open()
+                continue
+            if stamp != self._manifest_stamp:
+                try:
+                    self._segments = [
+                        _load(Path(self.path, name)) for name in self._read_manifest()
+                    ]
+                except FileNotFoundError:
+                    # Replaced by a merge while it was being read
+                    continue
+                self._manifest_stamp = stamp
+                self._pending = set()
+                self._offsets = {}
+            for name in (MERGING_FILE, DELTA_FILE):
+                self._read_delta(path=Path(self.path, name))
+            # A merge that finished meanwhile may have moved some of the delta into a segment
+            # that isn't mapped yet.
+            if _stamp(Path(self.path, MANIFEST_FILE)) == stamp:
+                return True
+
+    def _read_delta(self, path: Path) -> None:
+        try:
+            descriptor: int = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            status: os.stat_result = os.fstat(descriptor)
+            offset: int = self._offsets.get(status.st_ino, 0)
+            if status.st_size <= offset:
+                return
+            content: bytes = os.pread(descriptor, status.st_size - offset, offset)
+        finally:
+            os.close(descriptor)
+        length: int = len(content) - len(content) % RECORD_SIZE
+        self._pending.update(
+            content[start : start + RECORD_SIZE]
+            for start in range(0, length, RECORD_SIZE)
+        )
+        self._offsets[status.st_ino] = offset + length
+
+    def _open(self) -> None:
+        """
+        Maps the version in LOCK_FILE, creating the index directory if it doesn't exist, and builds
+        the index if it hasn't been built.
+        """
+        self.path.mkdir(exist_ok=True)
+        descriptor: int = os.open(
+            Path(self.path, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o660
+        )
+        if os.fstat(descriptor).st_size < VERSION.size:
+            os.ftruncate(descriptor, VERSION.size)
+        self._state = mmap.mmap(descriptor, VERSION.size)
+        if self._state_descriptor is not None:
+            os.close(self._state_descriptor)
+        # Kept open to notice if the index is removed
+        self._state_descriptor = descriptor
+        self._version = None
+        self._manifest_stamp = None
+        self._segments = []
+        self._pending = set()
+        self._offsets = {}
+        if not Path(self.path, MANIFEST_FILE).exists():
+            self._build()
+
+    def _reopen_if_removed(self) -> None:
+        """
+        Opens the index afresh if it's been removed (see remove_index) since it was opened. Must be
+        called with self._lock held.
+        """
+        if os.fstat(self._state_descriptor).st_nlink == 0:
+            self._open()
+
+    def _increment_version(self) -> None:
+        """
+        Tells every process that the index has changed. Must be called with LOCK_FILE locked
+        exclusively.
+        """
+        VERSION.pack_into(self._state, 0, VERSION.unpack_from(self._state)[0] + 1)
+
+    def _build(self) -> None:
+        """
+        Builds the index from the identifiers already in the data tree, sorting them a chunk at a
+        time. Only one process builds it; any others wait for it to be finished.
+        """
+        with self._locked(name=LOCK_FILE, operation=fcntl.LOCK_EX):
+            if Path(self.path, MANIFEST_FILE).exists():
+                return
+            LOG.info(f"Building the identifier index at {self.path}...")
+            segments: List[str] = []
+            chunk: Set[bytes] = set()
+            count: int = 0
+            for identifier in self._rebuild():
+                if len(identifier) != 2 * RECORD_SIZE:
+                    continue
+                chunk.add(bytes.fromhex(identifier))
+                count += 1
+                if len(chunk) == BUILD_CHUNK_SIZE:
+                    segments.append(self._write_segment(records=sorted(chunk)))
+                    segments = self._merge_tiers(segments=segments)
+                    chunk = set()
+            if chunk:
+                segments.append(self._write_segment(records=sorted(chunk)))
+            while len(segments) > 1:
+                segments[-2:] = [self._merge_segments(names=segments[-2:])]
+            self._write_manifest(segments=segments)
+            self._increment_version()
+            LOG.info(
+                f"Built the identifier index at {self.path} with {count} identifiers."
+            )
+
+    def _merge_tiers(self, segments: List[str]) -> List[str]:
+        segments = list(segments)
+        while len(segments) > 1 and 2 * _size(Path(self.path, segments[-1])) >= _size(
+            Path(self.path, segments[-2])
+        ):
+            segments[-2:] = [self._merge_segments(names=segments[-2:])]
+        return segments
+
+    def _merge_segments(self, names: List[str]) -> str:
+        """
+        Merges the supplied segments into a new one, which replaces them, and returns its name.
+        """
+        segments: List[mmap.mmap] = [_map(Path(self.path, name)) for name in names]
+        name: str = self._write_segment(
+            records=_unique(heapq.merge(*(_records(segment) for segment in segments)))
+        )
+        for segment in segments:
+            segment.close()
+        for old_name in names:
+            # Segments that aren't in the manifest yet can go at once; the others are removed once
+            # the manifest no longer lists them.
+            if old_name not in self._read_manifest():
+                Path(self.path, old_name).unlink(missing_ok=True)
+        return name
+
+    def _write_segment(self, records: Iterable[bytes]) -> str:
+        name: str = f"{SEGMENT_PREFIX}{time.time_ns():020d}"
+        temporary: Path = Path(self.path, f".{name}.{os.getpid()}")
+        with open(temporary, "wb") as target:
+            chunk: List[bytes] = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) * RECORD_SIZE >= READ_SIZE:
+                    target.write(b"".join(chunk))
+                    chunk = []
+            target.write(b"".join(chunk))
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temporary, Path(self.path, name))
+        return name
+
+    def _read_manifest(self) -> List[str]:
+        try:
+            return Path(self.path, MANIFEST_FILE).read_text().split()
+        except FileNotFoundError:
+            return []
+
+    def _write_manifest(self, segments: List[str]) -> None:
+        temporary: Path = Path(self.path, f".{MANIFEST_FILE}.{os.getpid()}")
+        temporary.write_text("\n".join(segments))
+        os.replace(temporary, Path(self.path, MANIFEST_FILE))
+
+    @contextmanager
+    def _locked(self, name: str, operation: int) -> Iterator[None]:
+        descriptor: int = os.open(Path(self.path, name), os.O_RDWR | os.O_CREAT, 0o660)
+        try:
+            fcntl.flock(descriptor, operation)
+            yield
+        finally:
+            os.close(descriptor)
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        status: os.stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return status.st_ino, status.st_mtime_ns
+
+
+def _size(path: Path) -> int:
+    return path.stat().st_size
+
+
+def _map(path: Path) -> mmap.mmap:
+    with open(path, "rb") as segment:
+        return mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _load(path: Path) -> Tuple[mmap.mmap, List[bytes]]:
+    """
+    Returns the supplied segment, memory-mapped, and every FENCE_INTERVAL-th record in it.
+    """
+    segment: mmap.mmap = _map(path)
+    step: int = FENCE_INTERVAL * RECORD_SIZE
+    return segment, [
+        segment[offset : offset + RECORD_SIZE]
+        for offset in range(0, len(segment), step)
+    ]
+
+
+def _records(segment: mmap.mmap) -> Iterator[bytes]:
+    for offset in range(0, len(segment), RECORD_SIZE):
+        yield segment[offset : offset + RECORD_SIZE]
+
+
+def _unique(records: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Returns a generator of the supplied sorted records without duplicates.
+    """
+    previous: Optional[bytes] = None
+    for record in records:
+        if record != previous:
+            yield record
+        previous = record
+
+
+def _search(segment: mmap.mmap, fences: List[bytes], record: bytes) -> bool:
+    fence: int = bisect.bisect_right(fences, record) - 1
+    if fence < 0:
+        return False
+    low: int = fence * FENCE_INTERVAL
+    high: int = min(low + FENCE_INTERVAL, len(segment) // RECORD_SIZE)
+    while low < high:
+        middle: int = (low + high) // 2
+        found: bytes = segment[middle * RECORD_SIZE : (middle + 1) * RECORD_SIZE]
+        if found == record:
+            return True
+        if found < record:
+            low = middle + 1
+        else:
+            high = middle
+    return False
+
+
+def _schedule(index: IdIndex) -> None:
+    """
+    Merges the supplied index on this process's background merge thread, unless it's already
+    waiting to be merged.
+    """
+    global _merger
+    with _merger_lock:
+        if index.path in _scheduled:
+            return
+        _scheduled.add(index.path)
+        if _merger is None:
+            _merger = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="identifier-index-merger"
+            )
+    _merger.submit(_merge, index)
+
+
+def _merge(index: IdIndex) -> None:
+    with _merger_lock:
+        _scheduled.discard(index.path)
+    try:
+        index.merge()
+    except Exception as ex:
+        LOG.error(f"Unable to merge the identifier index at {index.path}: {ex}")
+
+
+def remove_index(base_path: Union[str, PathLike]) -> None:
+    """
+    Removes the identifier index of the data tree at the supplied base path, if there is one, so
+    that it's rebuilt when the tree is next opened. Tools that add identifiers to a tree without
+    going through an IdIndex must call this.
+    """
+    index_path: Path = Path(base_path, INDEX_DIR)
+    if index_path.is_dir():
+        for entry in os.scandir(index_path):
+            os.unlink(entry.path)
+        os.rmdir(index_path)
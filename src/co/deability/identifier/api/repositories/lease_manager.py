@@ -0,0 +1,215 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import atexit
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from os import PathLike
+from pathlib import Path
+from typing import Final, Any, Dict, Optional, Union
+
+from co.deability.identifier import config
+from co.deability.identifier.config import LOG
+from co.deability.identifier.errors.TooManyRetriesError import TooManyRetriesError
+
+"""
+Leases of identifier prefix blocks (see config.LEASE_PREFIX_WIDTH), so that the gunicorn workers
+sharing a data tree each mint identifiers in a block that no other live worker is using.
+
+A lease is a file named "<prefix>.lease" under LEASE_DIR in the data path, created with O_EXCL so
+that only one process can hold a prefix at a time. It records the holder's host, pid, and a random
+token, and the holder touches it periodically. A lease whose holder has died (on this host, its pid
+no longer exists; on any other host, it hasn't been touched for config.LEASE_TTL seconds) is
+reclaimed by renaming it aside, which only one contender can do, before creating a new lease.
+"""
+
+LEASE_DIR: Final[str] = ".leases"
+LEASE_SUFFIX: Final[str] = ".lease"
+MAX_ACQUIRE_ATTEMPTS: Final[int] = 100
+
+
+class LeaseManager:
+    """
+    Holds this process's lease on a block of identifiers beginning with the same prefix. Instances
+    are shared per data tree within a process; use LeaseManager.for_path.
+    """
+
+    _managers: Dict[Path, "LeaseManager"] = {}
+    _managers_lock: threading.Lock = threading.Lock()
+
+    def __init__(
+        self,
+        base_path: Union[str, PathLike],
+        width: int = config.LEASE_PREFIX_WIDTH,
+        ttl: float = config.LEASE_TTL,
+    ) -> None:
+        """
+        :param base_path: The data tree in which the leased identifiers are created.
+        :param width: The number of hexadecimal characters in a leased prefix.
+        :param ttl: Seconds after which a lease held from another host is considered abandoned.
+        """
+        self.path: Path = Path(base_path, LEASE_DIR).absolute()
+        self.width: int = width
+        self.ttl: float = ttl
+        self._lock: threading.Lock = threading.Lock()
+        self._prefix: Optional[str] = None
+        self._lease: Optional[Path] = None
+        self._token: Optional[str] = None
+        self._pid: Optional[int] = None
+        self._renewed: float = 0.0
+
+    @classmethod
+    def for_path(cls, base_path: Union[str, PathLike]) -> "LeaseManager":
+        """
+        Returns the lease manager for the data tree at the supplied base path.
+        """
+        key: Path = Path(base_path).absolute()
+        with cls._managers_lock:
+            manager: Optional[LeaseManager] = cls._managers.get(key)
+            if manager is None:
+                manager = LeaseManager(base_path=key)
+                cls._managers[key] = manager
+            return manager
+
+    def prefix(self) -> str:
+        """
+        Returns the prefix leased by this process, acquiring a lease first if this process doesn't
+        hold one, and renewing it if it's due.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._acquire()  # a forked child mustn't share its parent's lease
+            elif time.monotonic() - self._renewed > self.ttl / 3:
+                self._renew()
+            return self._prefix
+
+    def release(self) -> None:
+        """
+        Gives up this process's lease, if it holds one.
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._holds_lease():
+                self._lease.unlink()
+            self._prefix = self._lease = self._token = self._pid = None
+
+    def _acquire(self) -> None:
+        self.path.mkdir(exist_ok=True)
+        for _ in range(MAX_ACQUIRE_ATTEMPTS):
+            prefix: str = f"{random.getrandbits(4 * self.width):0{self.width}x}"
+            lease: Path = Path(self.path, f"{prefix}{LEASE_SUFFIX}")
+            token: str = uuid.uuid4().hex
+            if not self._create(lease=lease, token=token):
+                abandoned: Optional[os.stat_result] = self._abandoned(lease=lease)
+                if not abandoned or not self._reclaim(lease=lease, abandoned=abandoned):
+                    continue
+                if not self._create(lease=lease, token=token):
+                    continue
+            if self._pid is None:
+                atexit.register(self.release)
+            self._prefix, self._lease, self._token = prefix, lease, token
+            self._pid = os.getpid()
+            self._renewed = time.monotonic()
+            LOG.info(f"Process {self._pid} leased identifier prefix {prefix}")
+            return
+        raise TooManyRetriesError(retries=MAX_ACQUIRE_ATTEMPTS)
+
+    def _renew(self) -> None:
+        """
+        Touches the lease file, or acquires a new lease if this process's lease was reclaimed by
+        another process (e.g., after a long pause.)
+        """
+        if not self._holds_lease():
+            LOG.warning(f"The lease on identifier prefix {self._prefix} was lost")
+            self._acquire()
+            return
+        os.utime(self._lease)
+        self._renewed = time.monotonic()
+
+    def _holds_lease(self) -> bool:
+        holder: Optional[Dict[str, Any]] = _read(lease=self._lease)
+        return bool(holder) and holder.get("token") == self._token
+
+    @staticmethod
+    def _create(lease: Path, token: str) -> bool:
+        try:
+            descriptor: int = os.open(
+                lease, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o660
+            )
+        except FileExistsError:
+            return False
+        holder: Dict[str, Any] = {
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "token": token,
+            "acquired": time.time(),
+        }
+        with os.fdopen(descriptor, "w", encoding=config.TEXT_ENCODING) as lease_file:
+            json.dump(holder, lease_file)
+        return True
+
+    def _abandoned(self, lease: Path) -> Optional[os.stat_result]:
+        """
+        Returns the status of the supplied lease file if its holder is no longer alive; None
+        otherwise.
+        """
+        try:
+            status: os.stat_result = lease.stat()
+        except FileNotFoundError:
+            return None
+        holder: Optional[Dict[str, Any]] = _read(lease=lease)
+        if holder and holder.get("host") == socket.gethostname():
+            try:
+                os.kill(holder["pid"], 0)
+            except ProcessLookupError:
+                return status
+            except PermissionError:
+                pass  # alive, but run by another user
+            return None
+        # A lease from another host, or one whose holder died before finishing writing it
+        return status if time.time() - status.st_mtime > self.ttl else None
+
+    @staticmethod
+    def _reclaim(lease: Path, abandoned: os.stat_result) -> bool:
+        """
+        Removes the supplied abandoned lease, returning False if another process got to it first.
+        """
+        aside: Path = lease.with_name(f".{lease.name}.{os.getpid()}")
+        try:
+            os.rename(lease, aside)
+        except FileNotFoundError:
+            return False
+        if aside.stat().st_ino != abandoned.st_ino:
+            # Another process reclaimed the lease and took it out again in the meantime, so put
+            # its new lease back (unless yet another process has already replaced it.)
+            try:
+                os.link(aside, lease)
+            except FileExistsError:
+                pass
+            aside.unlink()
+            return False
+        aside.unlink()
+        return True
+
+
+def _read(lease: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(lease.read_text(encoding=config.TEXT_ENCODING))
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,98 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Final, Any, Dict, Hashable, Optional, Tuple
+
+MISSING: Final[object] = object()
+
+
+class LruCache:
+    """
+    A thread-safe cache holding at most max_size entries, evicting the least recently used entry
+    when it's full. Entries may be given a time-to-live after which they are treated as missing,
+    which allows answers that can change (such as "this identifier doesn't exist") to be cached
+    briefly without being trusted forever.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[
+            Hashable, Tuple[Any, Optional[float]]
+        ] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Returns the value cached under the supplied key, or MISSING if there isn't one or it has
+        expired.
+        """
+        with self._lock:
+            entry: Optional[Tuple[Any, Optional[float]]] = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Caches the supplied value under the supplied key. If a ttl (in seconds) is supplied, the
+        entry expires after that long; a ttl of zero or less means the value isn't cached at all,
+        and any existing entry for the key is removed.
+        """
+        with self._lock:
+            if ttl is not None and ttl <= 0:
+                self._entries.pop(key, None)
+                return
+            if self.max_size <= 0:
+                return
+            expires: Optional[float] = None if ttl is None else time.monotonic() + ttl
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Removes any entry cached under the supplied key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the size of the cache and its hit, miss and eviction counts.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,347 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from typing import Final, Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from co.deability.identifier import config
+from co.deability.identifier.services import time_service
+
+"""
+An append-only storage engine for UuidRepository (see config.STORAGE_ENGINE) that records
+identifiers and their data as lines in rolling segment files instead of as directories and files.
+
+Each line of a segment is either an identifier record:
+
+    <identifier>\\n
+
+or a data record:
+
+    <identifier> <name> <data as JSON>\\n
+
+where the name is the same "<timestamp>_data.json" key that the directory engine uses for its data
+files. An in-memory index of every identifier and the location of every data record is rebuilt from
+the segments when the store is first opened, and is brought up to date with records appended by
+other processes before any lookup that depends on them. Only the newest segment is kept open;
+segments that have rolled over are opened for each read.
+"""
+
+SEGMENT_DIR: Final[str] = "segments"
+SEGMENT_SUFFIX: Final[str] = ".seg"
+LOCK_FILE: Final[str] = ".lock"
+DATA_SUFFIX: Final[str] = "_data.json"
+TIME_LENGTH: Final[int] = 12
+
+# The location of a data record: (segment sequence number, payload offset, payload length, name)
+Location = Tuple[int, int, int, str]
+
+
+class SegmentStore:
+    """
+    A store of identifiers and their data held in append-only segment files under a single
+    directory. Instances are shared per directory within a process; use SegmentStore.for_path.
+    """
+
+    _stores: Dict[Path, "SegmentStore"] = {}
+    _stores_lock: threading.Lock = threading.Lock()
+
+    def __init__(
+        self, path: Union[str, PathLike], max_segment_size: int = config.SEGMENT_SIZE
+    ) -> None:
+        self.path: Path = Path(path).absolute()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_segment_size: int = max_segment_size
+        self._identifiers: Set[str] = set()
+        self._records: Dict[str, List[Location]] = {}
+        self._positions: Dict[int, int] = {}  # bytes indexed so far, per segment
+        self._descriptors: Dict[int, int] = {}
+        self._lock: threading.RLock = threading.RLock()
+        self._lock_descriptor: int = os.open(
+            Path(self.path, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o660
+        )
+        self._refresh()
+        atexit.register(self.close)
+
+    @classmethod
+    def for_path(cls, path: Union[str, PathLike]) -> "SegmentStore":
+        """
+        Returns the store for the supplied directory, opening it (and rebuilding its index) if this
+        process hasn't already done so.
+        """
+        key: Path = Path(path).absolute()
+        with cls._stores_lock:
+            store: Optional[SegmentStore] = cls._stores.get(key)
+            if store is None:
+                store = SegmentStore(path=key)
+                cls._stores[key] = store
+            return store
+
+    def close(self) -> None:
+        """
+        Closes the store's files; it can't be used once it's been closed, but SegmentStore.for_path
+        opens the directory again.
+        """
+        with self._stores_lock:
+            if SegmentStore._stores.get(self.path) is self:
+                del SegmentStore._stores[self.path]
+        with self._lock:
+            for sequence in list(self._descriptors):
+                os.close(self._descriptors.pop(sequence))
+            if self._lock_descriptor >= 0:
+                os.close(self._lock_descriptor)
+                self._lock_descriptor = -1
+        atexit.unregister(self.close)
+
+    def add_identifier(self, identifier: str) -> bool:
+        """
+        Returns True if the supplied identifier was not already in the store and has been appended
+        to it; False otherwise.
+        """
+        with self._write_lock():
+            if identifier in self._identifiers:
+                return False
+            self._append(records=[(identifier, None, None)])
+            return True
+
+    def add_identifiers(self, identifiers: List[str]) -> List[str]:
+        """
+        Appends those of the supplied identifiers that are not already in the store in a single
+        write, and returns them.
+        """
+        with self._write_lock():
+            added: List[str] = [
+                identifier
+                for identifier in dict.fromkeys(identifiers)
+                if identifier not in self._identifiers
+            ]
+            if added:
+                self._append(records=[(identifier, None, None) for identifier in added])
+            return added
+
+    def contains(self, identifier: str) -> bool:
+        """
+        Returns True if the supplied identifier has been added to the store; False otherwise.
+        """
+        if identifier in self._identifiers:
+            return True
+        with self._lock:
+            self._refresh()
+            return identifier in self._identifiers
+
+    def append_data(self, identifier: str, data: Dict[str, Any]) -> str:
+        """
+        Appends the supplied data to the ledger of the supplied identifier, and returns the name
+        under which it was recorded. Names increase strictly with each write to an identifier.
+        """
+        with self._write_lock():
+            name: str = self._next_name(identifier=identifier)
+            self._append(records=[(identifier, name, json.dumps(data))])
+            return name
+
+    def current_data(self, identifier: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Returns the name and content of the most recent data recorded for the supplied identifier,
+        or None if there isn't any.
+        """
+        with self._lock:
+            self._refresh()
+            locations: List[Location] = self._records.get(identifier)
+            if not locations:
+                return None
+            return locations[-1][3], self._read(location=locations[-1])
+
+    def all_data(self, identifier: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Returns the name and content of all data recorded for the supplied identifier, oldest first.
+        """
+        with self._lock:
+            self._refresh()
+            locations: List[Location] = list(self._records.get(identifier, []))
+        return [(location[3], self._read(location=location)) for location in locations]
+
+    def data_names(self, identifier: str) -> List[str]:
+        """
+        Returns the names of all data recorded for the supplied identifier, oldest first, without
+        reading the data.
+        """
+        with self._lock:
+            self._refresh()
+            return [location[3] for location in self._records.get(identifier, [])]
+
+    def read_data(self, identifier: str, names: List[str]) -> List[Dict[str, Any]]:
+        """
+        Returns the content of the data recorded for the supplied identifier under each of the
+        supplied names (see data_names), in the same order.
+        """
+        with self._lock:
+            self._refresh()
+            locations: Dict[str, Location] = {
+                location[3]: location for location in self._records.get(identifier, [])
+            }
+        return [self._read(location=locations[name]) for name in names]
+
+    def _next_name(self, identifier: str) -> str:
+        timestamp: int = time_service.now_epoch_micro()
+        locations: List[Location] = self._records.get(identifier)
+        if locations:
+            last: int = int(locations[-1][3][: -len(DATA_SUFFIX)])
+            timestamp = max(timestamp, last + 1)
+        return f"{timestamp}".zfill(TIME_LENGTH) + DATA_SUFFIX
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """
+        Serializes writers within this process (via the thread lock) and across processes (via an
+        exclusive lock on the store's lock file), and brings the index up to date once acquired.
+        """
+        with self._lock:
+            fcntl.flock(self._lock_descriptor, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(self._lock_descriptor, fcntl.LOCK_UN)
+
+    def _append(self, records: List[Tuple[str, Optional[str], Optional[str]]]) -> None:
+        """
+        Appends the supplied (identifier, name, payload) records to the active segment in a single
+        write and indexes them. Must be called while holding the write lock.
+        """
+        sequence: int = self._active_segment()
+        descriptor: int = self._descriptor(sequence=sequence)
+        position: int = self._positions[sequence]
+        # Anything beyond the last complete record is the torn tail of a write interrupted by a
+        # crash; it's cut off so that the new records don't run into it.
+        if os.fstat(descriptor).st_size > position:
+            os.ftruncate(descriptor, position)
+        lines: List[bytes] = []
+        for identifier, name, payload in records:
+            lines.append(
+                f"{identifier}\n".encode(config.TEXT_ENCODING)
+                if name is None
+                else f"{identifier} {name} {payload}\n".encode(config.TEXT_ENCODING)
+            )
+        content: bytes = b"".join(lines)
+        written: int = os.write(descriptor, content)
+        if written != len(content):
+            raise OSError(f"Short write to segment {sequence}: {written} bytes.")
+        self._index(sequence=sequence, start=position, content=content)
+
+    def _active_segment(self) -> int:
+        sequence: int = max(self._positions) if self._positions else 0
+        if self._positions.get(sequence, 0) >= self.max_segment_size:
+            sequence += 1
+        self._positions.setdefault(sequence, 0)
+        return sequence
+
+    def _descriptor(self, sequence: int) -> int:
+        """
+        Returns the open descriptor of the supplied segment, which must be the newest, closing
+        those of any segments that have since rolled over.
+        """
+        descriptor: Optional[int] = self._descriptors.get(sequence)
+        if descriptor is None:
+            descriptor = os.open(
+                self._segment_path(sequence=sequence),
+                os.O_RDWR | os.O_APPEND | os.O_CREAT,
+                0o660,
+            )
+            for earlier in [known for known in self._descriptors if known < sequence]:
+                os.close(self._descriptors.pop(earlier))
+            self._descriptors[sequence] = descriptor
+        return descriptor
+
+    def _pread(self, sequence: int, length: int, offset: int) -> bytes:
+        with self._lock:
+            if sequence == max(self._positions):
+                return os.pread(self._descriptor(sequence=sequence), length, offset)
+        descriptor: int = os.open(self._segment_path(sequence=sequence), os.O_RDONLY)
+        try:
+            return os.pread(descriptor, length, offset)
+        finally:
+            os.close(descriptor)
+
+    def _segment_path(self, sequence: int) -> Path:
+        return Path(self.path, f"{sequence:08d}{SEGMENT_SUFFIX}")
+
+    def _refresh(self) -> None:
+        """
+        Indexes any records appended to the segments (by this or any other process) since they
+        were last read. Only the newest known segment and its successors can have grown.
+        """
+        with self._lock:
+            sequence: int = max(self._positions) if self._positions else 0
+            if not self._positions:
+                existing: List[int] = sorted(
+                    int(segment.stem)
+                    for segment in self.path.glob(f"*{SEGMENT_SUFFIX}")
+                )
+                for earlier in existing[:-1]:
+                    self._catch_up(sequence=earlier)
+                sequence = existing[-1] if existing else 0
+            while self._catch_up(sequence=sequence):
+                sequence += 1
+
+    def _catch_up(self, sequence: int) -> bool:
+        """
+        Indexes any complete records in the supplied segment beyond those already indexed, and
+        returns True if the segment exists.
+        """
+        segment: Path = self._segment_path(sequence=sequence)
+        try:
+            size: int = segment.stat().st_size
+        except FileNotFoundError:
+            return False
+        position: int = self._positions.get(sequence, 0)
+        self._positions[sequence] = position
+        if size > position:
+            content: bytes = self._pread(
+                sequence=sequence, length=size - position, offset=position
+            )
+            complete: int = content.rfind(b"\n") + 1
+            self._index(sequence=sequence, start=position, content=content[:complete])
+        return True
+
+    def _index(self, sequence: int, start: int, content: bytes) -> None:
+        offset: int = start
+        for line in content.splitlines(keepends=True):
+            fields: List[bytes] = line.rstrip(b"\n").split(b" ", 2)
+            identifier: str = fields[0].decode(config.TEXT_ENCODING)
+            if len(fields) == 1:
+                self._identifiers.add(identifier)
+            else:
+                payload_offset: int = offset + len(fields[0]) + len(fields[1]) + 2
+                self._records.setdefault(identifier, []).append(
+                    (
+                        sequence,
+                        payload_offset,
+                        len(fields[2]),
+                        fields[1].decode(config.TEXT_ENCODING),
+                    )
+                )
+            offset += len(line)
+        self._positions[sequence] = offset
+
+    def _read(self, location: Location) -> Dict[str, Any]:
+        sequence, offset, length, _ = location
+        content: bytes = self._pread(sequence=sequence, length=length, offset=offset)
+        return json.loads(content.decode(config.TEXT_ENCODING))
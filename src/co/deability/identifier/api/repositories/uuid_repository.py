@@ -13,19 +13,31 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import fcntl
 import getpass
 import json
 import logging
+import os
 import random
+import threading
 import time
 import uuid
-from functools import cache
+from functools import lru_cache
+from itertools import groupby
 from os import path, PathLike
 from pathlib import Path
-from typing import Final, Any, Dict, List, Optional
+from typing import Final, Any, Dict, Iterator, List, Optional, Tuple
 
 from co.deability.identifier import config
+from co.deability.identifier.api.repositories.bloom_filter import BloomFilter
+from co.deability.identifier.api.repositories.id_index import IdIndex
 from co.deability.identifier.api.repositories.id_repository_type import IdRepositoryType
+from co.deability.identifier.api.repositories.lease_manager import LeaseManager
+from co.deability.identifier.api.repositories.lru_cache import LruCache, MISSING
+from co.deability.identifier.api.repositories.segment_store import (
+    SEGMENT_DIR,
+    SegmentStore,
+)
 from co.deability.identifier.errors.BadProcessError import BadProcessError
 from co.deability.identifier.errors.BadRepositoryError import BadRepositoryError
 from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
@@ -35,12 +47,20 @@ from co.deability.identifier.errors.TooManyRetriesError import TooManyRetriesErr
 from co.deability.identifier.errors.UnsupportedOperationError import (
     UnsupportedOperationError,
 )
-from co.deability.identifier.services import time_service
+from co.deability.identifier.services import layout_service, time_service
+from co.deability.identifier.values.Identifier import Identifier
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
 
 VALID_CHARS: Final[str] = "0123456789abcdef"
 # The filename for data related to an identifier
 DATA_FILE: Final[str] = "_data.json"
 TIME_LENGTH: Final[int] = 12
+# A symlink to the newest data file of an identifier, so that the current data can be read without
+# listing the identifier's directory
+CURRENT_FILE: Final[str] = "current"
+# Parent directories shared by at least this many identifiers in a batch existence check are opened
+# once and their children looked up relative to them, rather than each by its full path.
+SHARED_PARENT_MIN: Final[int] = 2
 
 
 def _is_valid(identifier: str) -> bool:
@@ -51,19 +71,14 @@ def _is_valid(identifier: str) -> bool:
     This function was built under the assumption that the identifier is based on the string
     representation of a uuid.uuid4() call after the dashes (-) have been removed from the string;
     hence the length and content constraints. Also see VALID_CHARS, above, and _generate_id(),
-    below.
+    below. The characters are checked all at once (see Identifier.is_valid.)
 
     :param identifier: The identifier to be validated.
     :return: True if identifier is 32 characters long and composed entirely of numbers (0-9) and
     lower-case letters in the range a-f; False otherwise.
 
     """
-    if len(identifier) != 32:
-        return False
-    for c in identifier:
-        if c not in VALID_CHARS:
-            return False
-    return True
+    return Identifier.is_valid(identifier=identifier)
 
 
 def _generate_id() -> str:
@@ -74,7 +89,52 @@ def _generate_id() -> str:
 
     :return: A string that can be used to uniquely identify an entity.
     """
-    return str(uuid.uuid4()).replace("-", "", 4)
+    return uuid.uuid4().hex
+
+
+def data_timestamp(name: str) -> Optional[int]:
+    """
+    Returns the time (in microseconds since the epoch) in the supplied data file name, or None if
+    it isn't the name of a data file.
+    """
+    if not name.endswith(DATA_FILE) or not name[: -len(DATA_FILE)].isdecimal():
+        return None
+    return int(name[: -len(DATA_FILE)])
+
+
+@lru_cache(maxsize=config.CACHE_SIZE)
+def _identifier_path(base_path: Path, identifier: str) -> Path:
+    return layout_service.identifier_path(base_path=base_path, identifier=identifier)
+
+
+def _existing_children(parent: str, identifiers: List[str], width: int) -> List[str]:
+    """
+    Returns those of the supplied identifiers whose directories, named by their last width
+    characters, exist beneath parent. When several share the parent, it's opened once and the
+    directories are looked up relative to it, so its path is only resolved once; if it doesn't
+    exist, none of them do.
+    """
+    if len(identifiers) < SHARED_PARENT_MIN:
+        return [
+            identifier
+            for identifier in identifiers
+            if path.exists(parent + os.sep + identifier[-width:])
+        ]
+    try:
+        parent_fd: int = os.open(parent, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return []
+    existing: List[str] = []
+    try:
+        for identifier in identifiers:
+            try:
+                os.stat(identifier[-width:], dir_fd=parent_fd)
+            except OSError:
+                continue
+            existing.append(identifier)
+    finally:
+        os.close(parent_fd)
+    return existing
 
 
 class UuidRepository:
@@ -90,13 +150,14 @@ class UuidRepository:
     _reader_index: int = 0
     _serialization_failures: int = 0  # A crude indicator of what's going on that can be
     # included in log messages. May be removed or replaced in a future release.
+    # Existence caches, shared by all instances with the same base_path
+    _exists_caches: Dict[Path, LruCache] = {}
 
     def __init__(
         self,
         repository_type: IdRepositoryType,
         base_path: (str, PathLike) = config.DATA_PATH,
     ) -> None:
-
         if not isinstance(repository_type, IdRepositoryType):
             raise IllegalArgumentError("type must be an IdRepositoryType.")
         if not base_path or not isinstance(base_path, (str, PathLike)):
@@ -111,20 +172,74 @@ class UuidRepository:
         user: str = str(getpass.getuser())
         if not owner == user and not owner == "root":
             raise BadProcessError(data_owner=owner, pid_user=user)
+        # With the segment storage engine, identifiers and their data are kept in segment files
+        # rather than in directories (see config.STORAGE_ENGINE and SegmentStore.)
+        self.segment_store: Optional[SegmentStore] = (
+            SegmentStore.for_path(path=Path(self.base_path, SEGMENT_DIR))
+            if config.STORAGE_ENGINE == "segment"
+            else None
+        )
+        self._exists_cache: LruCache = UuidRepository._exists_caches.setdefault(
+            self.base_path, LruCache(max_size=config.CACHE_SIZE)
+        )
+        # The segment engine's index already answers existence checks from memory.
+        self.id_index: Optional[IdIndex] = (
+            IdIndex.for_path(base_path=self.base_path, rebuild=self._all_identifiers)
+            if config.ID_INDEX and not self.segment_store
+            else None
+        )
+        # The identifier index answers negative existence checks as well as a Bloom filter would.
+        self.bloom_filter: Optional[BloomFilter] = (
+            BloomFilter.for_path(
+                base_path=self.base_path, rebuild=self._all_identifiers
+            )
+            if config.BLOOM_FILTER and not self.segment_store and not self.id_index
+            else None
+        )
+        # With a leased prefix, identifiers minted by this process can't collide with those of any
+        # other live writer, so they're created without first checking whether they exist.
+        self.lease_manager: Optional[LeaseManager] = (
+            LeaseManager.for_path(base_path=self.base_path)
+            if config.LEASE_PREFIX_WIDTH
+            and repository_type == IdRepositoryType.WRITER
+            and not self.segment_store
+            else None
+        )
+
+    def _new_id(self) -> str:
+        """
+        Returns a new identifier from _generate_id, beginning with this process's leased prefix if
+        leasing is enabled (see LeaseManager.)
+        """
+        identifier: str = _generate_id()
+        if self.lease_manager:
+            prefix: str = self.lease_manager.prefix()
+            identifier = prefix + identifier[len(prefix) :]
+        return identifier
+
+    def _new_ids(self, count: int) -> IdentifierArray:
+        """
+        Returns count new identifiers, each beginning with this process's leased prefix if leasing
+        is enabled (see _new_id.)
+        """
+        return IdentifierArray.random(
+            count=count,
+            prefix=self.lease_manager.prefix() if self.lease_manager else "",
+        )
 
-    @cache
     def _path_calculator(self, identifier: str) -> Path:
         """
         Returns a file path for a directory derived from this instance's base_path and the
-        supplied identifier that takes the form of a single-character directory structure.
-        E.g., for an UuidRepository instance with a base_path of "/foo/bar" and an identifier
-        value of "c963ef49afa5483bb1326e9525727140", the returned value would be
-        "/foo/bar/c/9/6/3/e/f/4/9/a/f/a/5/4/8/3/b/b/1/3/2/6/e/9/5/2/5/7/2/7/1/4/0"
+        supplied identifier that takes the form of the directory structure configured by
+        config.SHARD_WIDTHS. E.g., for an UuidRepository instance with a base_path of "/foo/bar"
+        and an identifier value of "c963ef49afa5483bb1326e9525727140", the returned value would
+        be "/foo/bar/c/9/6/3/e/f/4/9/a/f/a/5/4/8/3/b/b/1/3/2/6/e/9/5/2/5/7/2/7/1/4/0" with the
+        default single-character layout. (See layout_service.identifier_parts.)
 
         :param identifier: The identifier to be transmogrified into a file path.
         :return: A file path for a directory that's suitable for serialization to disk.
         """
-        return Path(self.base_path, "/".join(identifier))
+        return _identifier_path(base_path=self.base_path, identifier=identifier)
 
     def create_id(self, retries: int = 0) -> str:
         """
@@ -147,22 +262,80 @@ class UuidRepository:
             )
         if self.type != IdRepositoryType.WRITER:
             raise UnsupportedOperationError()
-        new_id: str = _generate_id()
+        new_id: str = self._new_id()
         while retries >= 0:
             if self._serialize(identifier=new_id):
                 return new_id
-            new_id = _generate_id()
+            new_id = self._new_id()
+            retries -= 1
+            time.sleep(0.01)  # Give the CPU a break
+        raise TooManyRetriesError(retries=retries)
+
+    def create_ids(self, count: int, retries: int = 0) -> List[str]:
+        """
+        Returns a list of count identifiers that have been serialized out to disk, each with the
+        same guarantees as an identifier returned by create_id. See create_id_array.
+
+        :param count: The number of identifiers to create.
+        :param retries: The number of times to replace identifiers that could not be serialized
+        before erroring out.
+        :return: The serialized identifiers, in the order they were created.
+        """
+        return self.create_id_array(count=count, retries=retries).hexes()
+
+    def create_id_array(self, count: int, retries: int = 0) -> IdentifierArray:
+        """
+        Returns an array of count identifiers that have been serialized out to disk, each with the
+        same guarantees as an identifier returned by create_id. The identifiers are minted
+        together (see IdentifierArray.random), and are only converted to strings to build their
+        paths, so callers that hold on to them (see IdPool) can keep them packed.
+
+        The identifiers are serialized together, which amortizes the cost of serialization
+        across the batch: with the segment storage engine they're appended in a single write,
+        and otherwise they're created in sorted order so that each parent directory they share
+        is created only once.
+
+        Exceptions will be raised under the same conditions as create_id, or if count is not an
+        integer greater than zero.
+
+        :param count: The number of identifiers to create.
+        :param retries: The number of times to replace identifiers that could not be serialized
+        before erroring out.
+        :return: The serialized identifiers, in the order they were created.
+        """
+        if not isinstance(count, int) or count < 1:
+            raise IllegalArgumentError(
+                message="count must be an integer greater than zero."
+            )
+        if not isinstance(retries, int) or retries < 0:
+            raise IllegalArgumentError(
+                message="retries must be an integer greater than or equal to zero."
+            )
+        if self.type != IdRepositoryType.WRITER:
+            raise UnsupportedOperationError()
+        created: IdentifierArray = IdentifierArray()
+        while retries >= 0:
+            created.extend(
+                self._serialize_all(
+                    identifiers=self._new_ids(count=count - len(created))
+                )
+            )
+            if len(created) == count:
+                return created
             retries -= 1
             time.sleep(0.01)  # Give the CPU a break
         raise TooManyRetriesError(retries=retries)
 
-    @cache
     def exists(self, identifier: str) -> bool:
         """
         Returns True if the supplied identifier already exists in this UuidRepository instance;
         False otherwise. An identifier exists in an UuidRepository if it has already been
         serialized to disk in the form of a directory.
 
+        Answers are cached (see LruCache): an identifier that exists always will, so positive
+        answers are kept until evicted, but negative answers are only kept for
+        config.NEGATIVE_CACHE_TTL seconds, since another process may create the identifier.
+
         If the supplied identifier is not valid, an exception will be raised.
 
         :param identifier: The identifier to be checked to determine whether it is already known to
@@ -172,6 +345,92 @@ class UuidRepository:
         """
         if not _is_valid(identifier=identifier):
             raise IllegalIdentifierError()
+        result: Any = self._exists_cache.get(identifier)
+        if result is MISSING:
+            result = self._exists(identifier=identifier)
+            self._exists_cache.put(
+                identifier,
+                result,
+                ttl=None if result else config.NEGATIVE_CACHE_TTL,
+            )
+        return result
+
+    def exists_many(self, identifiers: IdentifierArray) -> List[bool]:
+        """
+        Returns whether each of the supplied identifiers exists in this UuidRepository, in the
+        order they were supplied. Cached answers are used where there are any, and the remaining
+        identifiers are looked up together (see _existing.) Unlike with exists, the answers aren't
+        cached, so that one large batch doesn't evict the answers for frequently checked
+        identifiers.
+
+        :param identifiers: The identifiers to be checked.
+        :return: A list with True for each of the supplied identifiers that exists in this
+        UuidRepository and False for each that doesn't.
+        """
+        hexes: List[str] = identifiers.hexes()
+        answers: Dict[str, Any] = {}
+        unknown: List[str] = []
+        for identifier in hexes:
+            if identifier not in answers:
+                answers[identifier] = self._exists_cache.get(identifier)
+                if answers[identifier] is MISSING:
+                    unknown.append(identifier)
+        for identifier in unknown:
+            answers[identifier] = False
+        for identifier in self._existing(identifiers=unknown):
+            answers[identifier] = True
+        return [answers[identifier] for identifier in hexes]
+
+    def _existing(self, identifiers: List[str]) -> List[str]:
+        """
+        Returns those of the supplied identifiers that exist in this UuidRepository. Without the
+        segment engine or an identifier index to answer from memory, the identifiers are sorted so
+        that those sharing a parent directory are adjacent, and each parent is visited once (see
+        _existing_children.)
+        """
+        if self.segment_store:
+            return [
+                identifier
+                for identifier in identifiers
+                if self.segment_store.contains(identifier=identifier)
+            ]
+        if self.id_index:
+            return [
+                identifier for identifier in identifiers if identifier in self.id_index
+            ]
+        if self.bloom_filter:
+            identifiers = [
+                identifier
+                for identifier in identifiers
+                if self.bloom_filter.might_contain(identifier)
+            ]
+        if not identifiers:
+            return []
+        # Every identifier's own directory name is the same width, and the rest of its path is
+        # determined by the characters before it.
+        width: int = len(layout_service.identifier_parts(identifier=identifiers[0])[-1])
+        existing: List[str] = []
+        for _, group in groupby(
+            sorted(identifiers), key=lambda identifier: identifier[:-width]
+        ):
+            siblings: List[str] = list(group)
+            parts: List[str] = layout_service.identifier_parts(identifier=siblings[0])
+            existing.extend(
+                _existing_children(
+                    parent=os.sep.join([str(self.base_path), *parts[:-1]]),
+                    identifiers=siblings,
+                    width=width,
+                )
+            )
+        return existing
+
+    def _exists(self, identifier: str) -> bool:
+        if self.segment_store:
+            return self.segment_store.contains(identifier=identifier)
+        if self.id_index:
+            return identifier in self.id_index
+        if self.bloom_filter and not self.bloom_filter.might_contain(identifier):
+            return False
         file_path: Path = self._path_calculator(identifier=identifier)
         return path.exists(file_path)
 
@@ -188,12 +447,25 @@ class UuidRepository:
         serialized to disk; False otherwise.
         """
 
-        file_path: Path = self._path_calculator(identifier=identifier)
-        if file_path.exists():
-            return False
         try:
-            file_path.mkdir(parents=True, exist_ok=False)
-            return True
+            if self.segment_store:
+                serialized: bool = self.segment_store.add_identifier(
+                    identifier=identifier
+                )
+            else:
+                file_path: Path = self._path_calculator(identifier=identifier)
+                if not self.lease_manager and self._exists(identifier=identifier):
+                    return False
+                file_path.mkdir(parents=True, exist_ok=False)
+                # Only indexed once its directory exists; the index is taken as definitive
+                if self.id_index:
+                    self.id_index.add(identifier=identifier)
+                if self.bloom_filter:
+                    self.bloom_filter.add(identifier=identifier)
+                serialized = True
+            if serialized:
+                self._exists_cache.put(identifier, True)
+            return serialized
         except FileExistsError:
             logging.warning(msg=f"Identifier {identifier} already exists.")
         except Exception as ex:
@@ -209,6 +481,77 @@ class UuidRepository:
             )
         return False
 
+    def _index(self, identifiers: IdentifierArray) -> None:
+        """
+        Adds the supplied identifiers, whose directories have been created, to the identifier index
+        and the Bloom filter (if they're enabled.)
+        """
+        if not len(identifiers):
+            return
+        if self.id_index:
+            self.id_index.add_all(identifiers=identifiers)
+        if self.bloom_filter:
+            self.bloom_filter.add_all(identifiers=identifiers.hexes())
+
+    def _serialize_all(self, identifiers: IdentifierArray) -> IdentifierArray:
+        """
+        Returns those of the supplied identifiers that were not already in the system and have
+        been successfully serialized to disk. As with _serialize, exceptions are logged rather
+        than raised.
+
+        :param identifiers: The identifiers to be stored on disk.
+        :return: The identifiers that were serialized.
+        """
+        identifiers = identifiers.sorted()
+        # Sorted identifiers that share parent directories are adjacent, so each parent only
+        # needs to be created once.
+        hexes: List[str] = identifiers.hexes()
+        serialized: List[str] = []
+        try:
+            if self.segment_store:
+                serialized = self.segment_store.add_identifiers(identifiers=hexes)
+            else:
+                parent: Optional[Path] = None
+                try:
+                    for identifier in hexes:
+                        file_path: Path = self._path_calculator(identifier=identifier)
+                        if file_path.parent != parent:
+                            parent = file_path.parent
+                            parent.mkdir(parents=True, exist_ok=True)
+                        try:
+                            file_path.mkdir(exist_ok=False)
+                        except FileExistsError:
+                            logging.warning(
+                                msg=f"Identifier {identifier} already exists."
+                            )
+                            continue
+                        serialized.append(identifier)
+                finally:
+                    # Only those whose directories were created (even if a later one failed)
+                    self._index(
+                        identifiers=identifiers
+                        if len(serialized) == len(identifiers)
+                        else IdentifierArray.from_hex(
+                            identifiers=serialized, length=identifiers.length
+                        )
+                    )
+        except Exception as ex:
+            self._serialization_failures += 1
+            message = (
+                f"Unable to serialize a batch of {len(identifiers)} identifiers. Total "
+                f"serialization failures: {self._serialization_failures}"
+            )
+            logging.error(
+                msg=message,
+                exc_info=ex,
+                stack_info=True,
+            )
+        for identifier in serialized:
+            self._exists_cache.put(identifier, True)
+        if len(serialized) == len(identifiers):
+            return identifiers
+        return IdentifierArray.from_hex(identifiers=serialized)
+
     def __new__(cls, *args, **kwargs) -> "UuidRepository":
         """
         Returns a singleton if the caller requests a WRITER; otherwise returns a new or existing
@@ -234,6 +577,30 @@ class UuidRepository:
             cls._readers.append(new_reader)
             return new_reader
 
+    def _all_identifiers(self) -> Iterator[str]:
+        """
+        Returns a generator of every identifier stored under this instance's base_path.
+        """
+        return (
+            identifier
+            for identifier, _ in layout_service.find_identifiers(self.base_path)
+        )
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the size and hit/miss counts of the caches used by this instance.
+        """
+        path_info = _identifier_path.cache_info()
+        return {
+            "exists": self._exists_cache.stats(),
+            "paths": {
+                "size": path_info.currsize,
+                "max size": path_info.maxsize,
+                "hits": path_info.hits,
+                "misses": path_info.misses,
+            },
+        }
+
     def get_type(self) -> IdRepositoryType:
         """
         Returns the type of this repository instance. (See IdRepositoryType)
@@ -258,6 +625,9 @@ class UuidRepository:
         if self.type != IdRepositoryType.WRITER:
             raise UnsupportedOperationError()
         self._check_identifier(identifier=identifier)
+        if self.segment_store:
+            self.segment_store.append_data(identifier=identifier, data=data)
+            return self
         data_path: Path = self._create_data_path(identifier=identifier)
         retries: int = 0
         while data_path.exists() and retries <= config.MAX_WRITE_RETRIES:
@@ -267,19 +637,63 @@ class UuidRepository:
             if retries == config.MAX_WRITE_RETRIES:
                 raise TooManyRetriesError(retries=retries)
         data_path.write_text(data=json.dumps(data), encoding=config.TEXT_ENCODING)
+        self._point_current(data_path=data_path)
         return self
 
+    def _point_current(self, data_path: Path) -> None:
+        """
+        Points the CURRENT_FILE symlink in the supplied data file's directory at that file, unless
+        it already points at a newer one. The link is replaced atomically, under a lock on the
+        directory, so that concurrent writers can't move it backwards and readers always find a
+        complete data file at the end of it.
+
+        :param data_path: The path of a data file that has just been written.
+        """
+        id_folder: Path = data_path.parent
+        current: Path = Path(id_folder, CURRENT_FILE)
+        descriptor: int = os.open(id_folder, os.O_RDONLY)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX)
+            try:
+                if os.readlink(current) >= data_path.name:
+                    return
+            except FileNotFoundError:
+                pass
+            temporary: Path = Path(
+                id_folder, f".{CURRENT_FILE}.{os.getpid()}.{threading.get_ident()}"
+            )
+            os.symlink(data_path.name, temporary)
+            os.replace(temporary, current)
+        finally:
+            os.close(descriptor)
+
     def get_current_data(self, identifier: str) -> Optional[Dict[str, Any]]:
         """
         Returns the most recent data stored under the supplied identifier, or None if the
         identifier is recognized and no data regarding that identifier is available. If
         the identifier is not recognized, an error will be raised.
 
+        The most recent data is found through the CURRENT_FILE pointer maintained by add_data, so
+        reading it doesn't depend on how many times data has been added.
+
         :param identifier: The identifier (unique within the context of this UuidRepository
         instance, and which already exists therein) of the entity represented by the returned data.
         :return: the most recent data stored under the supplied identifier.
         """
         self._check_identifier(identifier=identifier)
+        if self.segment_store:
+            current = self.segment_store.current_data(identifier=identifier)
+            return {current[0]: current[1]} if current else None
+        id_folder: Path = self._path_calculator(identifier=identifier)
+        try:
+            name: str = os.readlink(Path(id_folder, CURRENT_FILE))
+            return {
+                name: json.loads(
+                    Path(id_folder, name).read_text(encoding=config.TEXT_ENCODING)
+                )
+            }
+        except FileNotFoundError:
+            pass  # no data, or data written before the pointer was introduced
         data_files: list[Path] = self._get_all_data_file_paths(identifier=identifier)
         if not data_files:
             return None
@@ -290,24 +704,101 @@ class UuidRepository:
             )
         }
 
-    def get_all_data(self, identifier: str) -> Dict[str, Any]:
+    def get_all_data(
+        self,
+        identifier: str,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
-        Returns all available data stored under the supplied identifier as a dictionary. The keys
-        of the returned dictionary are the name of the data file, and the values are the data
-        the file contains.
+        Returns the data stored under the supplied identifier as a dictionary, optionally limited
+        to a window of its history (see get_data_page.) The keys of the returned dictionary are the
+        name of the data file, and the values are the data the file contains.
 
         :param identifier: The identifier of the entity represented by the returned data.
-        :return: A list containing all available data associated with the supplied identifier,
-        with the most recent data at the top of the list.
+        :param since: If supplied, only data recorded at or after this time (in microseconds since
+        the epoch) is returned.
+        :param until: If supplied, only data recorded before this time (in microseconds since the
+        epoch) is returned.
+        :param limit: If supplied, no more than this many of the most recent data are returned.
+        :param cursor: If supplied, only data recorded before the data with this name is returned.
+        :return: A dictionary containing the requested data associated with the supplied
+        identifier, with the most recent data first.
         """
-        self._check_identifier(identifier=identifier)
-        data_files: list[Path] = self._get_all_data_file_paths(identifier=identifier)
-        results: Dict[str, Any] = {}
-        for file in data_files:
-            results.update(
-                {file.name: json.loads(file.read_text(encoding=config.TEXT_ENCODING))}
+        return self.get_data_page(
+            identifier=identifier, since=since, until=until, limit=limit, cursor=cursor
+        )[0]
+
+    def get_data_page(
+        self,
+        identifier: str,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Returns a page of the data stored under the supplied identifier, most recent first, along
+        with the cursor from which the next page can be requested (or None if there are no more
+        pages.) Only the names of the data files are listed to find the page, so only the data on
+        the page is ever read.
+
+        :param identifier: The identifier of the entity represented by the returned data.
+        :param since: If supplied, only data recorded at or after this time (in microseconds since
+        the epoch) is returned.
+        :param until: If supplied, only data recorded before this time (in microseconds since the
+        epoch) is returned.
+        :param limit: If supplied, no more than this many data are returned.
+        :param cursor: If supplied, only data recorded before the data with this name (i.e., the
+        cursor returned with the previous page) is returned.
+        :return: A dictionary of data file names to the data they contain, and the next cursor.
+        """
+        if limit is not None and (not isinstance(limit, int) or limit < 1):
+            raise IllegalArgumentError(
+                message="limit must be an integer greater than zero."
             )
-        return results
+        before: Optional[int] = data_timestamp(name=cursor) if cursor else None
+        if cursor and before is None:
+            raise IllegalArgumentError(
+                message="cursor must be the name of a data file."
+            )
+        self._check_identifier(identifier=identifier)
+        names: List[str] = []
+        for name in self._data_file_names(identifier=identifier):
+            timestamp: Optional[int] = data_timestamp(name=name)
+            if (
+                timestamp is None
+                or (since is not None and timestamp < since)
+                or (until is not None and timestamp >= until)
+                or (before is not None and timestamp >= before)
+            ):
+                continue
+            names.append(name)
+        names.sort(key=data_timestamp, reverse=True)
+        page: List[str] = names[:limit] if limit else names
+        next_cursor: Optional[str] = page[-1] if len(names) > len(page) else None
+        return (
+            dict(zip(page, self._read_data(identifier=identifier, names=page))),
+            next_cursor,
+        )
+
+    def _data_file_names(self, identifier: str) -> List[str]:
+        if self.segment_store:
+            return self.segment_store.data_names(identifier=identifier)
+        id_folder: Path = self._path_calculator(identifier=identifier)
+        with os.scandir(id_folder) as entries:
+            return [entry.name for entry in entries if entry.name.endswith(DATA_FILE)]
+
+    def _read_data(self, identifier: str, names: List[str]) -> List[Any]:
+        if self.segment_store:
+            return self.segment_store.read_data(identifier=identifier, names=names)
+        id_folder: Path = self._path_calculator(identifier=identifier)
+        return [
+            json.loads(Path(id_folder, name).read_text(encoding=config.TEXT_ENCODING))
+            for name in names
+        ]
 
     def _get_all_data_file_paths(self, identifier: str) -> List[Path]:
         """
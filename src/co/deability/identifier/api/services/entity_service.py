@@ -13,14 +13,26 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Final, Dict, Any, Iterator, List, Optional, Set, Tuple
 
+from jsonschema.exceptions import ValidationError
+
+from co.deability.identifier import config
 from co.deability.identifier.api import repositories
 from co.deability.identifier.api.repositories import entities
 from co.deability.identifier.api.repositories.entities import (
     entity_repository,
     index_repository,
 )
+from co.deability.identifier.api.services import read_pool
+from co.deability.identifier.errors.BadRequestError import BadRequestError
+from co.deability.identifier.errors.UnknownEntityTypeError import UnknownEntityTypeError
+from co.deability.identifier.services import validator_service
+
+# Keys of the entity metadata maintained by this module
+ENTITY_TYPE: Final[str] = "entity type"
+INDEXES: Final[str] = "indexes"
 
 
 def add_entity(entity: Dict[str, Any], entity_type: str) -> Dict[str, str]:
@@ -29,9 +41,68 @@ def add_entity(entity: Dict[str, Any], entity_type: str) -> Dict[str, str]:
         identifier=identifier,
         search_terms=_entity_type_search_terms(entity_type=entity_type),
     )
+    index_fields(
+        identifier=identifier, entity=entity, metadata={ENTITY_TYPE: entity_type}
+    )
     return {"created": identifier}
 
 
+def add_entities(batch: List[Any], entity_type: str) -> List[Dict[str, str]]:
+    """
+    Adds the supplied entities of the supplied type, returning a result for each, in order:
+    {"created": identifier}, {"exists": identifier} if the entity (or an equal one earlier in the
+    list) already exists, or {"invalid": reason} if it isn't a non-empty JSON object or fails
+    validation against the schema for the type. Invalid entities don't prevent the others from
+    being added.
+
+    The entities are validated with a single (compiled) validator, their directories are created
+    together, and their entity type search term is added for all of them at once.
+
+    :param batch: The entities to be added.
+    :param entity_type: The type of every entity.
+    :return: The result for each entity.
+    """
+    if len(batch) > config.MAX_BULK_SIZE:
+        raise BadRequestError(
+            message=f"No more than {config.MAX_BULK_SIZE} entities can be added at once."
+        )
+    validator: Optional[
+        validator_service.SchemaValidator
+    ] = validator_service.get_validator(entity_type=entity_type)
+    if not validator and not config.DEBUG:
+        raise UnknownEntityTypeError()
+    results: List[Dict[str, str]] = []
+    pending: Dict[str, Dict[str, Any]] = {}
+    for entity in batch:
+        reason: Optional[str] = _find_invalidity(entity=entity, validator=validator)
+        if reason:
+            results.append({"invalid": reason})
+            continue
+        identifier: str = entities.calculate_id_from_data(data=entity)
+        pending.setdefault(identifier, entity)
+        results.append({"created": identifier})
+    created: Dict[str, Path] = entity_repository.create_entities(entities_by_id=pending)
+    index_repository.create_index_entries(
+        targets=created, index=_entity_type_search_terms(entity_type=entity_type)
+    )
+    for identifier in created:
+        index_fields(
+            identifier=identifier,
+            entity=pending[identifier],
+            metadata={ENTITY_TYPE: entity_type},
+        )
+    unreported: Set[str] = set(created)
+    for result in results:
+        identifier = result.get("created")
+        if not identifier:
+            continue
+        if identifier in unreported:
+            unreported.remove(identifier)
+        else:
+            result["exists"] = result.pop("created")
+    return results
+
+
 def remove_entity(identifier: str) -> None:
     repositories.check_identifier(identifier=identifier)
     entity_repository.delete_entity(identifier=identifier)
@@ -39,22 +110,132 @@ def remove_entity(identifier: str) -> None:
 
 def update_entity(identifier: str, entity: Dict[str, Any]) -> Dict[str, str]:
     repositories.check_identifier(identifier=identifier)
+    current_identifier: str = entity_repository.latest_identifier(identifier=identifier)
+    metadata: Dict[str, Any] = entity_repository.read_metadata(
+        identifier=current_identifier
+    )
+    joined: Dict[str, Any] = _joined_metadata(
+        current_identifier=current_identifier, entity=entity
+    )
     new_identifier: str = entity_repository.update_entity(
-        identifier=identifier, entity=entity
+        identifier=current_identifier, entity=entity
     )
+    if joined:
+        metadata = _join_indexes(metadata=metadata, joined=joined, entity=entity)
+    if new_identifier != current_identifier and metadata:
+        index_fields(identifier=new_identifier, entity=entity, metadata=metadata)
     return {"updated": new_identifier}
 
 
+def _joined_metadata(current_identifier: str, entity: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the metadata of the current version of the other lineage that updating the entity
+    whose current version has the supplied identifier to the supplied content would join (because
+    an entity in that lineage has the same content), or an empty dictionary if it wouldn't join one.
+    """
+    new_identifier: str = entities.calculate_id_from_data(data=entity)
+    if not repositories.identifier_exists(identifier=new_identifier):
+        return {}
+    other_identifier: str = entity_repository.latest_identifier(
+        identifier=new_identifier
+    )
+    if other_identifier == current_identifier:
+        return {}
+    return entity_repository.read_metadata(identifier=other_identifier)
+
+
+def _join_indexes(
+    metadata: Dict[str, Any], joined: Dict[str, Any], entity: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Returns the supplied metadata with the index entries recorded in the joined metadata (see
+    _joined_metadata) added to it, so that they're still recorded once both lineages share a
+    current version. Where both record an entry for a field, the one whose value the entity still
+    has is kept, and the other is removed.
+    """
+    recorded: Dict[str, Any] = dict(metadata.get(INDEXES, {}))
+    for field, entry in joined.get(INDEXES, {}).items():
+        kept: Optional[Dict[str, Any]] = recorded.get(field)
+        if kept is None or (
+            kept["value"] != entity.get(field) and entry["value"] == entity.get(field)
+        ):
+            recorded[field], entry = entry, kept
+        if entry and entry != recorded[field]:
+            index_repository.remove_index_entry(
+                identifier=entry["entry"], index={field: entry["value"]}
+            )
+    return (metadata or joined) | {INDEXES: recorded}
+
+
+def index_fields(
+    identifier: str, entity: Dict[str, Any], metadata: Dict[str, Any]
+) -> None:
+    """
+    Brings the search terms added automatically for the entity with the supplied identifier up to
+    date with the fields its schema marks for indexing (see entity_repository.get_indexed_fields),
+    and records them in the entity's metadata.
+
+    Each indexed field with a value in the entity is added as a search term {field: value}. The
+    supplied metadata, e.g. that of the entity's previous version, records the value and entry of
+    each term already added; entries for unchanged values are kept (they follow the entity through
+    updates), and entries for values that changed or are no longer indexed are removed.
+
+    :param identifier: The identifier of the entity.
+    :param entity: The entity's content.
+    :param metadata: The entity's current metadata, which must include its type.
+    """
+    recorded: Dict[str, Any] = metadata.get(INDEXES, {})
+    indexes: Dict[str, Any] = {}
+    for field in entity_repository.get_indexed_fields(
+        entity_type=metadata.get(ENTITY_TYPE)
+    ):
+        if field not in entity:
+            continue
+        previous: Optional[Dict[str, Any]] = recorded.get(field)
+        if previous and previous["value"] == entity[field]:
+            indexes[field] = previous
+            continue
+        index_repository.create_index(
+            identifier=identifier, index={field: entity[field]}
+        )
+        indexes[field] = {"value": entity[field], "entry": identifier}
+    for field, previous in recorded.items():
+        if indexes.get(field) is not previous:
+            index_repository.remove_index_entry(
+                identifier=previous["entry"], index={field: previous["value"]}
+            )
+    entity_repository.write_metadata(
+        identifier=identifier, metadata=metadata | {INDEXES: indexes}
+    )
+
+
 def get_entity(identifier: str) -> Dict[str, Any]:
     repositories.check_identifier(identifier=identifier)
     return entity_repository.read_entity(identifier=identifier)
 
 
+def get_entities(identifiers: Any) -> Dict[str, Any]:
+    return read_pool.read_all(
+        identifiers=identifiers, read=_read_entity, length=config.IDENTIFIER_LENGTH
+    )
+
+
+def _read_entity(identifier: str) -> Optional[Dict[str, Any]]:
+    if not repositories.identifier_exists(identifier=identifier):
+        return None
+    return entity_repository.read_entity(identifier=identifier)
+
+
 def get_all_entities(entity_type: str) -> Dict[str, Any]:
     search_terms = _entity_type_search_terms(entity_type=entity_type)
     return search_for_entities(search_terms=search_terms)
 
 
+def stream_all_entities(entity_type: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    search_terms = _entity_type_search_terms(entity_type=entity_type)
+    return stream_entities(search_terms=search_terms)
+
+
 def add_search_terms(identifier: str, search_terms: Dict[str, Any]) -> None:
     entities.check_if_empty(data=search_terms)
     repositories.check_identifier(identifier=identifier)
@@ -69,11 +250,24 @@ def remove_search_terms(search_terms: Dict[str, Any]) -> None:
 
 def search_for_entities(search_terms: Dict[str, Any]) -> Dict[str, Any]:
     entities.check_if_empty(data=search_terms)
+    if index_repository.is_query(search_terms=search_terms):
+        return index_repository.find_matching_entities(query=search_terms)
     return index_repository.find_entities(index=search_terms)
 
 
+def stream_entities(
+    search_terms: Dict[str, Any]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    entities.check_if_empty(data=search_terms)
+    if index_repository.is_query(search_terms=search_terms):
+        return index_repository.iter_matching_entities(query=search_terms)
+    return index_repository.iter_entities(index=search_terms)
+
+
 def search_for_entity_ids(search_terms: Dict[str, Any]) -> List[str]:
     entities.check_if_empty(data=search_terms)
+    if index_repository.is_query(search_terms=search_terms):
+        return index_repository.find_matching_entity_ids(query=search_terms)
     return index_repository.find_entity_ids(index=search_terms)
 
 
@@ -95,5 +289,18 @@ def get_schema(name: str = None) -> Dict[str, Any]:
     return entity_repository.get_schema(name=name)
 
 
+def _find_invalidity(
+    entity: Any, validator: Optional[validator_service.SchemaValidator]
+) -> Optional[str]:
+    if not isinstance(entity, dict) or not entity:
+        return "The entity must be a non-empty JSON object."
+    if validator:
+        try:
+            validator.validate(entity)
+        except ValidationError as ve:
+            return f"The entity cannot be validated against the specified entity type: {ve.message}"
+    return None
+
+
 def _entity_type_search_terms(entity_type: str) -> Dict[str, str]:
     return {"entity type": entity_type}
@@ -0,0 +1,614 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import base64
+import io
+import itertools
+import json
+import os
+import shutil
+import tarfile
+from pathlib import Path
+from typing import (
+    Final,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories import entities
+from co.deability.identifier.api.repositories.bloom_filter import BLOOM_FILE
+from co.deability.identifier.api.repositories.id_index import INDEX_DIR
+from co.deability.identifier.api.repositories.entities.entity_cache import CACHE_FILE
+from co.deability.identifier.api.repositories.lease_manager import LEASE_DIR
+from co.deability.identifier.api.services.id_pool import POOL_DIR
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.services import layout_service
+
+"""
+Functions that export an entire data tree (identifiers and their data, entities, search terms,
+schema, and segment files) as a single stream, and that restore such a stream into a new data tree.
+
+The tree is walked with os.scandir and streamed one file at a time (and large files one chunk at a
+time), so memory use doesn't grow with the size of the tree. Two formats are supported:
+
+  * "ndjson": one JSON record per line. Files in identifier directories are recorded by identifier
+    and file name rather than by path, and links into the tree by the identifier and file name
+    they point at, so the stream can be restored into a tree with a different layout (see
+    config.SHARD_WIDTHS.)
+  * "tar": a tar archive of the tree, with links into the tree made relative so that the archive
+    can be unpacked anywhere. It can only be restored into a tree with the same layout.
+
+Per-process state (the Bloom filter snapshot, the entity cache, identifier leases and spilled
+identifier pools) and
+temporary files aren't exported. The export reflects whatever is on disk as the tree is walked, so
+it should be taken from a node that isn't accepting writes if it's meant to be a consistent
+snapshot.
+"""
+
+FORMATS: Final[Tuple[str, ...]] = ("ndjson", "tar")
+EXPORT_VERSION: Final[int] = 1
+# Files larger than this are exported in chunks, each in its own record
+CHUNK_SIZE: Final[int] = 1024 * 1024
+# The NDJSON stream is handed on in blocks of at least this many bytes
+BLOCK_SIZE: Final[int] = 64 * 1024
+EXCLUDED: Final[Set[str]] = {
+    BLOOM_FILE,
+    CACHE_FILE,
+    INDEX_DIR,
+    LEASE_DIR,
+    POOL_DIR,
+}
+TEMP_SUFFIX: Final[str] = ".tmp"
+# The links read by a restore are spilled to this file in the target tree until they're created
+LINKS_FILE: Final[str] = f".restored_links{TEMP_SUFFIX}"
+# The tar archive records the layout of the exported tree in this PAX header
+SHARD_WIDTHS_HEADER: Final[str] = "IDENTIFIER.shard_widths"
+
+# A walked path relative to the base path, the identifier directory it's in (if any), and its
+# directory entry (None for an identifier directory itself)
+_Item = Tuple[str, Optional[str], Optional[os.DirEntry]]
+
+
+def export(
+    base_path: Union[str, os.PathLike] = config.DATA_PATH,
+    export_format: str = "ndjson",
+    shard_widths: Optional[Sequence[int]] = None,
+) -> Iterator[bytes]:
+    """
+    Returns a generator of the blocks of bytes that make up an export of the data tree at the
+    supplied base path.
+
+    :param base_path: The root of the data tree to be exported.
+    :param export_format: Either "ndjson" or "tar"; see FORMATS.
+    :param shard_widths: The shard widths of the tree; defaults to config.SHARD_WIDTHS.
+    :return: A generator of the exported bytes.
+    """
+    if export_format not in FORMATS:
+        raise IllegalArgumentError(
+            message=f"The export format must be one of {', '.join(FORMATS)}."
+        )
+    widths: Tuple[int, ...] = tuple(
+        config.SHARD_WIDTHS if shard_widths is None else shard_widths
+    )
+    base_path = Path(base_path).absolute()
+    if export_format == "tar":
+        return _export_tar(base_path=base_path, shard_widths=widths)
+    return _export_ndjson(base_path=base_path, shard_widths=widths)
+
+
+def restore(
+    source: BinaryIO,
+    target: Union[str, os.PathLike] = config.DATA_PATH,
+    shard_widths: Optional[Sequence[int]] = None,
+) -> int:
+    """
+    Restores an export (in either format, which is detected from its first byte) into the supplied
+    target directory, which must not contain any files yet (other than the placeholder for deleted
+    entities written when the package is imported, which is replaced), and returns the number of
+    identifiers restored.
+
+    :param source: The export, opened for reading in binary mode.
+    :param target: The root of the data tree to be restored.
+    :param shard_widths: The shard widths of the restored tree; defaults to config.SHARD_WIDTHS.
+    :return: The number of identifiers restored.
+    """
+    widths: Tuple[int, ...] = tuple(
+        config.SHARD_WIDTHS if shard_widths is None else shard_widths
+    )
+    target = Path(target).absolute()
+    target.mkdir(parents=True, exist_ok=True)
+    placeholder: Path = Path(target, entities.DELETED_ENTITY_PATH.name)
+    for dir_path, _, file_names in os.walk(target):
+        for file_name in file_names:
+            path: Path = Path(dir_path, file_name)
+            if path != placeholder or path.is_symlink() or path.read_bytes() != b"{}":
+                raise IllegalArgumentError(message=f"The target {target} is not empty.")
+    placeholder.unlink(missing_ok=True)
+    if not isinstance(source, io.BufferedReader):
+        source = io.BufferedReader(source)
+    with _Links(target=target) as links:
+        if source.peek(1)[:1] in (b"{", b""):
+            restored: int = _restore_ndjson(
+                source=source, target=target, shard_widths=widths, links=links
+            )
+        else:
+            restored = _restore_tar(
+                source=source, target=target, shard_widths=widths, links=links
+            )
+        links.create()
+    if not placeholder.exists():
+        placeholder.write_text("{}")
+    return restored
+
+
+def _walk(base_path: Path, shard_widths: Tuple[int, ...]) -> Iterator[_Item]:
+    """
+    Returns a generator of every identifier directory, file and link beneath the supplied base
+    path, except for those in EXCLUDED.
+    """
+    lengths: Set[int] = {32, config.IDENTIFIER_LENGTH}
+    max_depth: int = max(
+        layout_service.identifier_depth(
+            identifier_length=length, shard_widths=shard_widths
+        )
+        for length in lengths
+    )
+
+    def visit(
+        directory: str, parts: Tuple[str, ...], in_layout: bool
+    ) -> Iterator[_Item]:
+        relative: str = "/".join(parts)
+        identifier: Optional[str] = (
+            _identifier_at(parts=parts, shard_widths=shard_widths, lengths=lengths)
+            if in_layout
+            else None
+        )
+        if identifier:
+            yield relative, identifier, None
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(TEMP_SUFFIX) or (
+                    not parts and entry.name in EXCLUDED
+                ):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    yield from visit(
+                        directory=entry.path,
+                        parts=parts + (entry.name,),
+                        in_layout=in_layout
+                        and layout_service.is_hex(entry.name)
+                        and len(parts) < max_depth,
+                    )
+                else:
+                    yield f"{relative}/{entry.name}".lstrip("/"), identifier, entry
+
+    return visit(directory=str(base_path), parts=(), in_layout=True)
+
+
+def _identifier_at(
+    parts: Sequence[str], shard_widths: Tuple[int, ...], lengths: Set[int]
+) -> Optional[str]:
+    """
+    Returns the identifier represented by the supplied directory names (relative to a base path),
+    or None if they don't make up an identifier directory.
+    """
+    identifier: str = "".join(parts)
+    if (
+        len(identifier) in lengths
+        and layout_service.is_hex(identifier)
+        and layout_service.identifier_parts(identifier, shard_widths=shard_widths)
+        == list(parts)
+    ):
+        return identifier
+    return None
+
+
+def _export_ndjson(base_path: Path, shard_widths: Tuple[int, ...]) -> Iterator[bytes]:
+    lines: List[bytes] = []
+    size: int = 0
+    for record in itertools.chain(
+        [
+            {
+                "export": EXPORT_VERSION,
+                "shard_widths": list(shard_widths),
+                "identifier_length": config.IDENTIFIER_LENGTH,
+            }
+        ],
+        _records(base_path=base_path, shard_widths=shard_widths),
+    ):
+        line: bytes = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        lines.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            yield b"".join(lines)
+            lines = []
+            size = 0
+    yield b"".join(lines)
+
+
+def _records(
+    base_path: Path, shard_widths: Tuple[int, ...]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Returns a generator of the NDJSON records for the tree at the supplied base path.
+    """
+    lengths: Set[int] = {32, config.IDENTIFIER_LENGTH}
+    for relative, identifier, entry in _walk(
+        base_path=base_path, shard_widths=shard_widths
+    ):
+        if entry is None:
+            yield {"identifier": identifier}
+            continue
+        key: Dict[str, str] = (
+            {"identifier": identifier, "name": entry.name}
+            if identifier
+            else {"path": relative}
+        )
+        if entry.is_symlink():
+            yield {
+                **key,
+                "link": _link_record(
+                    link_target=os.readlink(entry.path),
+                    base_path=base_path,
+                    shard_widths=shard_widths,
+                    lengths=lengths,
+                ),
+            }
+            continue
+        with open(entry.path, "rb") as file:
+            offset: int = 0
+            chunk: bytes = file.read(CHUNK_SIZE)
+            while True:
+                following: bytes = file.read(CHUNK_SIZE) if chunk else b""
+                record: Dict[str, Any] = dict(key)
+                text: Optional[str] = (
+                    _decode(chunk) if not offset and not following else None
+                )
+                if offset:
+                    record["offset"] = offset
+                if text is not None:
+                    record["text"] = text
+                else:
+                    record["base64"] = base64.b64encode(chunk).decode("ascii")
+                yield record
+                if not following:
+                    break
+                offset += len(chunk)
+                chunk = following
+
+
+def _decode(content: bytes) -> Optional[str]:
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def _link_record(
+    link_target: str,
+    base_path: Path,
+    shard_widths: Tuple[int, ...],
+    lengths: Set[int],
+) -> Dict[str, str]:
+    """
+    Returns the NDJSON form of a link target: the identifier and file name it points at, its path
+    relative to the base path if it points elsewhere in the tree, or the target itself if it's
+    relative or points outside of the tree.
+    """
+    target: Path = Path(link_target)
+    if not target.is_absolute() or not target.is_relative_to(base_path):
+        return {"target": link_target}
+    relative: Path = target.relative_to(base_path)
+    identifier: Optional[str] = _identifier_at(
+        parts=relative.parent.parts, shard_widths=shard_widths, lengths=lengths
+    )
+    if identifier:
+        return {"identifier": identifier, "name": relative.name}
+    return {"path": relative.as_posix()}
+
+
+class _Sink:
+    """
+    A write-only file object that collects what's written to it until it's drained.
+    """
+
+    def __init__(self) -> None:
+        self._blocks: List[bytes] = []
+
+    def write(self, content: bytes) -> int:
+        self._blocks.append(bytes(content))
+        return len(content)
+
+    def drain(self) -> bytes:
+        content: bytes = b"".join(self._blocks)
+        self._blocks = []
+        return content
+
+
+def _export_tar(base_path: Path, shard_widths: Tuple[int, ...]) -> Iterator[bytes]:
+    sink: _Sink = _Sink()
+    with tarfile.open(
+        fileobj=sink,
+        mode="w|",
+        format=tarfile.PAX_FORMAT,
+        pax_headers={
+            SHARD_WIDTHS_HEADER: ",".join(str(width) for width in shard_widths)
+        },
+    ) as archive:
+        for relative, _, entry in _walk(base_path=base_path, shard_widths=shard_widths):
+            # Members are described from the directory entries, rather than with gettarinfo, to
+            # avoid looking up owners and writing a PAX header for each fractional mtime.
+            info: tarfile.TarInfo = tarfile.TarInfo(name=relative)
+            if entry is None:
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                archive.addfile(info)
+            elif entry.is_symlink():
+                info.type = tarfile.SYMTYPE
+                info.mode = 0o777
+                link_target: str = os.readlink(entry.path)
+                info.linkname = (
+                    os.path.relpath(link_target, start=os.path.dirname(entry.path))
+                    if Path(link_target).is_absolute()
+                    and Path(link_target).is_relative_to(base_path)
+                    else link_target
+                )
+                archive.addfile(info)
+            else:
+                with open(entry.path, "rb") as file:
+                    status: os.stat_result = os.fstat(file.fileno())
+                    info.size = status.st_size
+                    info.mtime = int(status.st_mtime)
+                    info.mode = status.st_mode & 0o777
+                    archive.addfile(info, fileobj=file)
+            content: bytes = sink.drain()
+            if content:
+                yield content
+    yield sink.drain()
+
+
+def _restore_ndjson(
+    source: BinaryIO, target: Path, shard_widths: Tuple[int, ...], links: "_Links"
+) -> int:
+    restored: int = 0
+    lengths: Set[int] = {32, config.IDENTIFIER_LENGTH}
+    created: Path = target
+    for number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            record: Any = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            raise IllegalArgumentError(
+                message=f"Line {number} of the export is not a JSON object."
+            )
+        if "export" in record:
+            if record["export"] != EXPORT_VERSION:
+                raise IllegalArgumentError(
+                    message=f"Version {record['export']} exports are not supported."
+                )
+            continue
+        path: Path = _record_path(
+            record=record, target=target, shard_widths=shard_widths, lengths=lengths
+        )
+        if "name" not in record and "path" not in record:
+            path.mkdir(parents=True, exist_ok=True)
+            created = path
+            restored += 1
+            continue
+        if path.parent != created:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            created = path.parent
+        if "link" in record:
+            link: Any = record["link"]
+            links.add(
+                link_target=link["target"]
+                if isinstance(link, dict) and "target" in link
+                else str(
+                    _record_path(
+                        record=link,
+                        target=target,
+                        shard_widths=shard_widths,
+                        lengths=lengths,
+                    )
+                ),
+                path=path,
+            )
+        elif "text" in record:
+            with _create(path=path, target=target) as file:
+                file.write(record["text"].encode("utf-8"))
+        else:
+            offset: int = record.get("offset", 0)
+            if offset != (path.lstat().st_size if offset else 0):
+                raise IllegalArgumentError(
+                    message=f"Line {number} of the export is out of order."
+                )
+            with _create(path=path, target=target, append=bool(offset)) as file:
+                file.write(base64.b64decode(record["base64"]))
+    return restored
+
+
+def _record_path(
+    record: Dict[str, Any],
+    target: Path,
+    shard_widths: Tuple[int, ...],
+    lengths: Set[int],
+) -> Path:
+    """
+    Returns the path in the target tree of the supplied NDJSON record (or link), raising an
+    IllegalArgumentError if it isn't an identifier directory, a file in one, or a path inside the
+    target tree.
+    """
+    if "identifier" in record:
+        identifier: Any = record["identifier"]
+        if not (
+            isinstance(identifier, str)
+            and len(identifier) in lengths
+            and layout_service.is_hex(identifier)
+        ):
+            raise IllegalArgumentError(
+                message=f"The export contains an invalid identifier, {identifier}."
+            )
+        directory: Path = layout_service.identifier_path(
+            base_path=target, identifier=identifier, shard_widths=shard_widths
+        )
+        if "name" not in record:
+            return directory
+        name: Any = record["name"]
+        if not isinstance(name, str) or name in ("", ".", "..") or "/" in name:
+            raise IllegalArgumentError(
+                message=f"The export contains an invalid file name, {name}."
+            )
+        return Path(directory, name)
+    return _inside(target=target, relative=record.get("path"))
+
+
+def _inside(target: Path, relative: Any) -> Path:
+    path: str = os.path.normpath(os.path.join(target, str(relative)))
+    if (
+        not isinstance(relative, str)
+        or relative.startswith("/")
+        or not path.startswith(f"{target}{os.sep}")
+    ):
+        raise IllegalArgumentError(
+            message=f"The export contains a path outside of the tree, {relative}."
+        )
+    return Path(path)
+
+
+def _check_parent(path: Path, target: Path) -> None:
+    """
+    Raises an IllegalArgumentError if the directory the supplied path is in resolves to somewhere
+    outside of the target tree, e.g. through a symlink.
+    """
+    if not path.parent.resolve().is_relative_to(target.resolve()):
+        raise IllegalArgumentError(
+            message=f"The export contains a path outside of the tree, {path}."
+        )
+
+
+def _create(path: Path, target: Path, append: bool = False) -> BinaryIO:
+    """
+    Returns the supplied file in the target tree opened for writing, creating it unless appending;
+    it's never opened through a symlink, and an existing file is never overwritten.
+    """
+    _check_parent(path=path, target=target)
+    flags: int = os.O_WRONLY | os.O_NOFOLLOW
+    try:
+        descriptor: int = os.open(
+            path, flags | (os.O_APPEND if append else os.O_CREAT | os.O_EXCL), 0o660
+        )
+    except OSError as ex:
+        raise IllegalArgumentError(message=f"Unable to restore {path}: {ex}")
+    return os.fdopen(descriptor, "ab" if append else "wb")
+
+
+class _Links:
+    """
+    The symlinks read by a restore, which are only created once every file and directory has been
+    restored so that nothing is ever written through a restored link. They're spilled to LINKS_FILE
+    in the target tree in the meantime, so memory use doesn't grow with the size of the tree.
+    """
+
+    def __init__(self, target: Path) -> None:
+        self.target: Path = target
+        self.path: Path = Path(target, LINKS_FILE)
+        self._file: TextIO = open(self.path, "x+", encoding="utf-8")
+
+    def __enter__(self) -> "_Links":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+    def add(self, link_target: str, path: Path) -> None:
+        self._file.write(f"{json.dumps([link_target, str(path)])}\n")
+
+    def create(self) -> None:
+        self._file.seek(0)
+        for line in self._file:
+            link_target, link_path = json.loads(line)
+            path: Path = Path(link_path)
+            _check_parent(path=path, target=self.target)
+            try:
+                os.symlink(link_target, path)
+            except FileExistsError:
+                raise IllegalArgumentError(
+                    message=f"The export contains {path} more than once."
+                )
+
+
+def _restore_tar(
+    source: BinaryIO, target: Path, shard_widths: Tuple[int, ...], links: "_Links"
+) -> int:
+    restored: int = 0
+    lengths: Set[int] = {32, config.IDENTIFIER_LENGTH}
+    created: Path = target
+    with tarfile.open(fileobj=source, mode="r|*") as archive:
+        exported_widths: Optional[str] = archive.pax_headers.get(SHARD_WIDTHS_HEADER)
+        if exported_widths is not None and layout_service.parse_shard_widths(
+            exported_widths
+        ) != tuple(shard_widths):
+            raise IllegalArgumentError(
+                message=f'The archive has shard widths of "{exported_widths}"; restore an NDJSON '
+                "export instead, or migrate the restored tree with identifier_migrate_layout."
+            )
+        for member in archive:
+            path: Path = _inside(target=target, relative=member.name)
+            if member.isdir():
+                path.mkdir(parents=True, exist_ok=True)
+                created = path
+                if _identifier_at(
+                    parts=path.relative_to(target).parts,
+                    shard_widths=shard_widths,
+                    lengths=lengths,
+                ):
+                    restored += 1
+                continue
+            if not (member.isfile() or member.issym()):
+                continue
+            if path.parent != created:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                created = path.parent
+            if member.issym():
+                link_target: str = member.linkname
+                if "/" in link_target and not Path(link_target).is_absolute():
+                    # Links into the tree were made relative by the export
+                    link_target = str(
+                        _inside(
+                            target=target,
+                            relative=os.path.relpath(
+                                Path(path.parent, link_target), start=target
+                            ),
+                        )
+                    )
+                links.add(link_target=link_target, path=path)
+            else:
+                with _create(path=path, target=target) as file:
+                    shutil.copyfileobj(archive.extractfile(member), file)
+    return restored
@@ -0,0 +1,243 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Final, Deque, Dict, List, Optional
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories.uuid_repository import UuidRepository
+from co.deability.identifier.config import LOG
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
+
+"""
+A per-process pool of identifiers that have already been serialized to disk (see
+config.POOL_SIZE), so that handing out a new identifier is a pop from memory rather than a trip to
+the disk. A background thread tops the pool up with UuidRepository.create_ids whenever it drops
+below its low-water mark. Identifiers are pooled in the packed batches in which they were created
+(see UuidRepository.create_id_array), and are only turned into strings as they're handed out.
+
+Pooled identifiers already exist on disk, so any that are still in the pool when the process exits
+are written to a spill file under POOL_DIR in the data path rather than being lost; the next pool to
+start in any process claims spill files by renaming them, which only one process can do, and hands
+out their identifiers first. An identifier that is never handed out is never seen by a client, so
+even a spill file lost to a crash costs nothing but the directories.
+"""
+
+POOL_DIR: Final[str] = ".pool"
+SPILL_SUFFIX: Final[str] = ".ids"
+
+
+class IdPool:
+    """
+    A pool of pre-minted identifiers created by a WRITER UuidRepository.
+    """
+
+    def __init__(
+        self,
+        id_repository: UuidRepository,
+        size: int = config.POOL_SIZE,
+        low_water: int = config.POOL_LOW_WATER,
+    ) -> None:
+        """
+        :param id_repository: The repository in which pooled identifiers are created.
+        :param size: The number of identifiers the pool is filled to.
+        :param low_water: The pool is refilled once fewer than this many identifiers are left.
+        """
+        if size < 1 or not 0 <= low_water < size:
+            raise IllegalArgumentError(
+                message="size must be positive and low_water must be less than size."
+            )
+        self.id_repository: UuidRepository = id_repository
+        self.size: int = size
+        self.low_water: int = low_water
+        self.spill_path: Path = Path(id_repository.base_path, POOL_DIR)
+        self._batches: Deque[IdentifierArray] = deque()
+        # The number of identifiers already handed out from the first batch
+        self._taken: int = 0
+        self._depth: int = 0
+        self._batches_lock: threading.Lock = threading.Lock()
+        self._wanted: threading.Event = threading.Event()
+        self._lock: threading.Lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._closed: bool = False
+        self._refills: int = 0
+        self._misses: int = 0
+        self._reclaimed: int = 0
+
+    def get(self) -> str:
+        """
+        Returns a new identifier from the pool, or creates one directly if the pool is empty.
+        """
+        self._start()
+        identifier: Optional[str] = self._take()
+        if identifier is None:
+            self._misses += 1
+            identifier = self.id_repository.create_id(retries=config.MAX_WRITE_RETRIES)
+        if self._depth < self.low_water:
+            self._wanted.set()
+        return identifier
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the current depth of the pool along with counters of its activity.
+        """
+        return {
+            "depth": self._depth,
+            "size": self.size,
+            "low water": self.low_water,
+            "refills": self._refills,
+            "misses": self._misses,
+            "reclaimed": self._reclaimed,
+        }
+
+    def close(self) -> None:
+        """
+        Stops the refill thread and spills any identifiers left in the pool to disk.
+        """
+        with self._lock:
+            if self._closed or self._pid != os.getpid():
+                return
+            self._closed = True
+        self._wanted.set()
+        self._thread.join(timeout=5)
+        self._spill()
+
+    def _start(self) -> None:
+        """
+        Starts the refill thread in this process if it isn't running yet. Pools are usually
+        constructed before gunicorn forks its workers, and neither threads nor identifiers may be
+        shared across a fork, so each process gets its own.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pooled(clear=True)
+            self._closed = False
+            self._pid = os.getpid()
+            self._reclaim()
+            self._wanted.set()
+            self._thread = threading.Thread(
+                target=self._refill, name="identifier-pool", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _refill(self) -> None:
+        while True:
+            self._wanted.wait()
+            self._wanted.clear()
+            if self._closed:
+                return
+            wanted: int = self.size - self._depth
+            if wanted <= 0:
+                continue
+            try:
+                self._put(
+                    identifiers=self.id_repository.create_id_array(
+                        count=wanted, retries=config.MAX_WRITE_RETRIES
+                    )
+                )
+                self._refills += 1
+            except Exception as ex:
+                LOG.error(f"Unable to refill the identifier pool: {ex}")
+                time.sleep(1)
+                self._wanted.set()
+
+    def _take(self) -> Optional[str]:
+        """
+        Removes the first identifier from the pool and returns it, or returns None if the pool is
+        empty.
+        """
+        with self._batches_lock:
+            if not self._batches:
+                return None
+            batch: IdentifierArray = self._batches[0]
+            identifier: str = batch[self._taken].hex()
+            self._taken += 1
+            self._depth -= 1
+            if self._taken == len(batch):
+                self._batches.popleft()
+                self._taken = 0
+        return identifier
+
+    def _put(self, identifiers: IdentifierArray) -> None:
+        if not identifiers:
+            return
+        with self._batches_lock:
+            self._batches.append(identifiers)
+            self._depth += len(identifiers)
+
+    def _pooled(self, clear: bool = False) -> List[str]:
+        """
+        Returns the identifiers in the pool, in the order they'd be handed out, optionally
+        emptying it.
+        """
+        with self._batches_lock:
+            identifiers: List[str] = [
+                identifier
+                for index, batch in enumerate(self._batches)
+                for identifier in (
+                    batch[self._taken :] if index == 0 else batch
+                ).hexes()
+            ]
+            if clear:
+                self._batches.clear()
+                self._taken = 0
+                self._depth = 0
+        return identifiers
+
+    def _spill(self) -> None:
+        identifiers: List[str] = self._pooled(clear=True)
+        if not identifiers:
+            return
+        name: str = f"{os.getpid()}-{time.time_ns()}"
+        temporary: Path = Path(self.spill_path, f".{name}")
+        try:
+            self.spill_path.mkdir(exist_ok=True)
+            temporary.write_text("\n".join(identifiers), encoding=config.TEXT_ENCODING)
+            os.replace(temporary, Path(self.spill_path, f"{name}{SPILL_SUFFIX}"))
+        except OSError as ex:
+            LOG.warning(f"Unable to spill {len(identifiers)} pooled identifiers: {ex}")
+
+    def _reclaim(self) -> None:
+        if not self.spill_path.is_dir():
+            return
+        for spill_file in sorted(self.spill_path.glob(f"*{SPILL_SUFFIX}")):
+            claimed: Path = spill_file.with_name(f".{spill_file.stem}.{os.getpid()}")
+            try:
+                os.rename(spill_file, claimed)
+            except FileNotFoundError:
+                continue  # claimed by another process
+            try:
+                identifiers: IdentifierArray = IdentifierArray.from_hex(
+                    identifiers=claimed.read_text(encoding=config.TEXT_ENCODING).split()
+                )
+            except IllegalIdentifierError:
+                LOG.warning(f"Discarding the unreadable pool spill file {spill_file}.")
+                claimed.unlink()
+                continue
+            self._put(identifiers=identifiers)
+            self._reclaimed += len(identifiers)
+            claimed.unlink()
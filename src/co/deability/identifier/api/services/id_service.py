@@ -13,25 +13,55 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from typing import Any, Final
+import base64
+from functools import partial
+from typing import Any, Final, List, Optional
 
 from co.deability.identifier import config
 from co.deability.identifier.api.repositories.uuid_repository import (
     UuidRepository,
     IdRepositoryType,
+    data_timestamp,
 )
+from co.deability.identifier.api.services import read_pool
+from co.deability.identifier.api.services.id_pool import IdPool
 from co.deability.identifier.errors.BadRequestError import BadRequestError
 from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.errors.NoSuchEntityError import NoSuchEntityError
+from co.deability.identifier.values.Identifier import UUID_LENGTH
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
 
 WRITER_REPOSITORY: Final[UuidRepository] = UuidRepository(
     repository_type=IdRepositoryType.WRITER
 )
+ID_POOL: Final[Optional[IdPool]] = (
+    IdPool(id_repository=WRITER_REPOSITORY) if config.POOL_SIZE else None
+)
+EXISTS_FORMATS: Final[tuple[str, ...]] = ("map", "bitmap")
 
 
 def create_new_id(id_repository: UuidRepository = WRITER_REPOSITORY) -> dict:
+    if ID_POOL and id_repository is ID_POOL.id_repository:
+        return {"created": ID_POOL.get()}
     return {"created": id_repository.create_id(retries=config.MAX_WRITE_RETRIES)}
 
 
+def create_new_ids(
+    count: Any, id_repository: UuidRepository = WRITER_REPOSITORY
+) -> dict:
+    if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+        raise BadRequestError(message="The count must be an integer greater than zero.")
+    if count > config.MAX_BATCH_SIZE:
+        raise BadRequestError(
+            message=f"The count must be no more than {config.MAX_BATCH_SIZE}."
+        )
+    return {
+        "created": id_repository.create_id_array(
+            count=count, retries=config.MAX_WRITE_RETRIES
+        ).hexes()
+    }
+
+
 def add_data(
     data: dict[str, Any],
     identifier: str,
@@ -50,14 +80,97 @@ def get_current_data(identifier: str) -> dict[str, Any]:
     return {f"{identifier}": data}
 
 
-def get_all_data(identifier: str) -> dict[str, Any]:
-    return {f"{identifier}": _get_reader().get_all_data(identifier=identifier)}
+def get_current_data_batch(identifiers: Any) -> dict[str, Any]:
+    return read_pool.read_all(
+        identifiers=identifiers,
+        read=partial(_read_current_data, id_repository=_get_reader()),
+        length=UUID_LENGTH,
+    )
+
+
+def _read_current_data(
+    identifier: str, id_repository: UuidRepository
+) -> Optional[dict[str, Any]]:
+    try:
+        return id_repository.get_current_data(identifier=identifier) or {}
+    except NoSuchEntityError:
+        return None
+
+
+def get_all_data(
+    identifier: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> dict[str, Any]:
+    if cursor is not None and data_timestamp(name=cursor) is None:
+        raise BadRequestError(message="The cursor is not valid.")
+    data, next_cursor = _get_reader().get_data_page(
+        identifier=identifier,
+        since=_to_int(value=since, name="since"),
+        until=_to_int(value=until, name="until"),
+        limit=_to_int(value=limit, name="limit", minimum=1),
+        cursor=cursor,
+    )
+    result: dict[str, Any] = {f"{identifier}": data}
+    if next_cursor:
+        result.update({"next cursor": next_cursor})
+    return result
+
+
+def _to_int(value: Optional[str], name: str, minimum: int = 0) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        result: int = int(value)
+    except ValueError:
+        raise BadRequestError(message=f"The {name} parameter must be an integer.")
+    if result < minimum:
+        raise BadRequestError(
+            message=f"The {name} parameter must be at least {minimum}."
+        )
+    return result
 
 
 def exists(identifier: str) -> dict:
     return {f"{identifier} exists": _get_reader().exists(identifier=identifier)}
 
 
+def exists_batch(identifiers: Any, exists_format: str = "map") -> dict[str, Any]:
+    if exists_format not in EXISTS_FORMATS:
+        raise BadRequestError(
+            message=f"The format must be one of {', '.join(EXISTS_FORMATS)}."
+        )
+    if not isinstance(identifiers, list) or not identifiers:
+        raise BadRequestError(message="The identifiers must be a non-empty list.")
+    if len(identifiers) > config.MAX_EXISTS_BATCH_SIZE:
+        raise BadRequestError(
+            message=f"No more than {config.MAX_EXISTS_BATCH_SIZE} identifiers may be checked."
+        )
+    results: List[bool] = _get_reader().exists_many(
+        identifiers=IdentifierArray.from_hex(
+            identifiers=identifiers, length=UUID_LENGTH
+        )
+    )
+    if exists_format == "map":
+        return {"exists": dict(zip(identifiers, results))}
+    # Bit i, counting from the most significant bit of the first byte, is for identifiers[i].
+    bitmap: bytearray = bytearray((len(results) + 7) // 8)
+    for position, result in enumerate(results):
+        if result:
+            bitmap[position >> 3] |= 0x80 >> (position & 7)
+    return {"exists": base64.b64encode(bitmap).decode("ascii"), "count": len(results)}
+
+
+def cache_stats() -> dict[str, Any]:
+    return _get_reader().cache_stats()
+
+
+def pool_stats() -> Optional[dict[str, int]]:
+    return ID_POOL.stats() if ID_POOL else None
+
+
 def _get_reader() -> UuidRepository:
     return UuidRepository(repository_type=IdRepositoryType.READER)
 
@@ -81,6 +194,9 @@ class IdCreator:
     def get_new_id(self) -> dict:
         return create_new_id(id_repository=self.id_repository)
 
+    def get_new_ids(self, count: Any) -> dict:
+        return create_new_ids(count=count, id_repository=self.id_repository)
+
     def add_data(self, data: dict[str, Any], identifier: str) -> dict[str, Any]:
         return add_data(
             data=data, identifier=identifier, id_repository=self.id_repository
@@ -0,0 +1,70 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Final, List, Optional
+
+from co.deability.identifier import config
+from co.deability.identifier.errors.BadRequestError import BadRequestError
+from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
+from co.deability.identifier.values.Identifier import Identifier
+
+"""
+A per-process pool of threads for the multi-get endpoints, which read many entities or data at
+once. Each read mostly waits on the disk, so spreading them over config.READ_THREADS threads lets
+their latencies overlap rather than add up. The threads are started when first needed and are
+shared by every request the process serves.
+"""
+
+_reader: Optional[ThreadPoolExecutor] = None
+_reader_lock: Final[threading.Lock] = threading.Lock()
+
+
+def read_all(
+    identifiers: Any, read: Callable[[str], Any], length: int
+) -> Dict[str, Any]:
+    """
+    Returns the result of reading each of the supplied identifiers with the supplied function, by
+    identifier and in the order they were supplied (repeated identifiers are read once.) The
+    identifiers are all validated before any are read.
+
+    :param identifiers: A list of no more than config.MAX_MULTI_GET_SIZE identifiers.
+    :param read: The function that reads what's requested for a single identifier.
+    :param length: The length of a valid identifier.
+    :return: A dictionary of the result of each read, by identifier.
+    """
+    if not isinstance(identifiers, list) or not identifiers:
+        raise BadRequestError(message="The identifiers must be a non-empty list.")
+    if len(identifiers) > config.MAX_MULTI_GET_SIZE:
+        raise BadRequestError(
+            message=f"No more than {config.MAX_MULTI_GET_SIZE} identifiers may be read at once."
+        )
+    if not all(Identifier.is_valid(identifier, length) for identifier in identifiers):
+        raise IllegalIdentifierError()
+    unique: List[str] = list(dict.fromkeys(identifiers))
+    if config.READ_THREADS < 2 or len(unique) < 2:
+        return {identifier: read(identifier) for identifier in unique}
+    return dict(zip(unique, _get_reader().map(read, unique)))
+
+
+def _get_reader() -> ThreadPoolExecutor:
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = ThreadPoolExecutor(
+                max_workers=config.READ_THREADS, thread_name_prefix="identifier-reader"
+            )
+        return _reader
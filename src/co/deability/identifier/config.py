@@ -17,10 +17,15 @@ import os
 import logging
 from datetime import timezone
 from pathlib import Path
-from typing import Final
+from typing import Final, Tuple
 from co.deability.identifier.errors.EnvironmentError import EnvironmentError
 from co.deability.identifier import __version__, __commit__
 
+
+def _is_enabled(variable: str) -> bool:
+    return str(os.environ.get(variable, "false")).lower() in ("true", "yes", "1")
+
+
 # MODE OF OPERATION
 DEBUG: Final[bool] = __debug__ and not os.environ.get("FLASK_ENV") == "production"
 
@@ -66,6 +71,128 @@ if IDENTIFIER_LENGTH > 128 or IDENTIFIER_LENGTH <= 16:
     raise EnvironmentError(
         "The IDENTIFIER_ID_LENGTH must be between 16 and 128 (inclusive.)"
     )
+# Identifier directories are nested one character per level unless shard widths are given, e.g.
+# "2,2" stores "c963ef49..." at c9/63/ef49...
+_shard_widths: str = os.environ.get("IDENTIFIER_SHARD_WIDTHS", "")
+try:
+    SHARD_WIDTHS: Tuple[int, ...] = tuple(
+        int(width) for width in _shard_widths.split(",") if width.strip()
+    )
+except ValueError:
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_SHARD_WIDTHS variable must be a comma-separated list of "
+        "integers."
+    )
+if any(width < 1 for width in SHARD_WIDTHS) or sum(SHARD_WIDTHS) > 16:
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_SHARD_WIDTHS must be positive and add up to no more than 16."
+    )
+# The backing store for UuidRepository identifiers and their data: "directory" (one directory per
+# identifier and one file per data write) or "segment" (append-only segment files.)
+STORAGE_ENGINE: str = str(
+    os.environ.get("IDENTIFIER_STORAGE_ENGINE") or "directory"
+).lower()
+if STORAGE_ENGINE not in ("directory", "segment"):
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_STORAGE_ENGINE variable must be either directory or segment."
+    )
+SEGMENT_SIZE: int = int(os.environ.get("IDENTIFIER_SEGMENT_SIZE") or 64 * 1024 * 1024)
+# A Bloom filter of every identifier lets existence checks for unknown identifiers skip the disk.
+BLOOM_FILTER: bool = _is_enabled("IDENTIFIER_BLOOM_FILTER")
+BLOOM_CAPACITY: int = int(os.environ.get("IDENTIFIER_BLOOM_CAPACITY") or 10000000)
+BLOOM_ERROR_RATE: float = float(os.environ.get("IDENTIFIER_BLOOM_ERROR_RATE") or 0.01)
+if BLOOM_CAPACITY < 1 or not 0 < BLOOM_ERROR_RATE < 1:
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_BLOOM_CAPACITY must be positive and the "
+        "IDENTIFIER_BLOOM_ERROR_RATE must be between 0 and 1."
+    )
+# If enabled, existence checks are answered from a sorted, memory-mapped index of every identifier
+# (see api/repositories/id_index.py) rather than by looking up directories; new identifiers are
+# merged into the index once this many have been added.
+ID_INDEX: bool = _is_enabled("IDENTIFIER_ID_INDEX")
+ID_INDEX_MERGE_SIZE: int = int(
+    os.environ.get("IDENTIFIER_ID_INDEX_MERGE_SIZE") or 65536
+)
+if ID_INDEX_MERGE_SIZE < 1:
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_ID_INDEX_MERGE_SIZE must be positive."
+    )
+# Bounds for the identifier existence cache; negative answers are only cached for the TTL (in
+# seconds), since another worker may create the identifier at any time.
+CACHE_SIZE: int = int(os.environ.get("IDENTIFIER_CACHE_SIZE") or 100000)
+NEGATIVE_CACHE_TTL: float = float(os.environ.get("IDENTIFIER_NEGATIVE_CACHE_TTL") or 0)
+# The most identifiers that can be minted by a single request to /identifier/new/batch
+MAX_BATCH_SIZE: int = int(os.environ.get("IDENTIFIER_MAX_BATCH_SIZE") or 1000)
+# The most entities that can be added by a single request to /identifier/entity/add/bulk
+MAX_BULK_SIZE: int = int(os.environ.get("IDENTIFIER_MAX_BULK_SIZE") or 10000)
+# The most identifiers that can be checked by a single request to /identifier/exists/batch
+MAX_EXISTS_BATCH_SIZE: int = int(
+    os.environ.get("IDENTIFIER_MAX_EXISTS_BATCH_SIZE") or 100000
+)
+# The most identifiers that can be read by a single request to /identifier/entity/read/batch or
+# /identifier/data/current/batch, and the number of threads each worker spreads those reads over
+MAX_MULTI_GET_SIZE: int = int(os.environ.get("IDENTIFIER_MAX_MULTI_GET_SIZE") or 100)
+READ_THREADS: int = int(os.environ.get("IDENTIFIER_READ_THREADS") or 8)
+# Writers can lease a block of identifiers sharing a prefix of this many hexadecimal characters, so
+# that workers sharing the data path never mint the same identifiers; 0 disables leasing. Leases
+# held from other hosts are considered abandoned once they haven't been renewed for LEASE_TTL seconds.
+# The prefix replaces the first characters of each UUID, so it must stop short of the 13th (version)
+# character for the identifiers to remain version 4 UUIDs.
+LEASE_PREFIX_WIDTH: int = int(os.environ.get("IDENTIFIER_LEASE_PREFIX_WIDTH") or 0)
+LEASE_TTL: float = float(os.environ.get("IDENTIFIER_LEASE_TTL") or 300)
+if not 0 <= LEASE_PREFIX_WIDTH <= 12 or LEASE_TTL <= 0:
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_LEASE_PREFIX_WIDTH must be between 0 and 12 (inclusive) and "
+        "the IDENTIFIER_LEASE_TTL must be positive."
+    )
+# Each worker can keep a pool of identifiers that are already on disk, refilled in the background
+# once fewer than POOL_LOW_WATER are left; a POOL_SIZE of 0 disables the pool.
+POOL_SIZE: int = int(os.environ.get("IDENTIFIER_POOL_SIZE") or 0)
+POOL_LOW_WATER: int = int(os.environ.get("IDENTIFIER_POOL_LOW_WATER") or POOL_SIZE // 2)
+if POOL_SIZE < 0 or (POOL_SIZE and not 0 <= POOL_LOW_WATER < POOL_SIZE):
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_POOL_SIZE must not be negative, and the "
+        "IDENTIFIER_POOL_LOW_WATER must be less than it."
+    )
+# Index entries are stored as one symlink per entry ("symlink") or in compacted posting lists
+# ("postings"); either way, entries stored in the other format are still read.
+INDEX_FORMAT: str = str(os.environ.get("IDENTIFIER_INDEX_FORMAT") or "symlink").lower()
+if INDEX_FORMAT not in ("symlink", "postings"):
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_INDEX_FORMAT variable must be either symlink or postings."
+    )
+# Posting lists store identifiers as bytes, two hexadecimal characters each
+if INDEX_FORMAT == "postings" and IDENTIFIER_LENGTH % 2:
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_ID_LENGTH must be even when the IDENTIFIER_INDEX_FORMAT is "
+        "postings."
+    )
+POSTINGS_BUFFER_SIZE: int = int(
+    os.environ.get("IDENTIFIER_POSTINGS_BUFFER_SIZE") or 1024
+)
+# Compiled schema validators are shared by requests; changes made to the schema directory by other
+# processes are noticed within this many seconds (changes made by this process are seen at once.)
+SCHEMA_REFRESH_INTERVAL: float = float(
+    os.environ.get("IDENTIFIER_SCHEMA_REFRESH_INTERVAL") or 1
+)
+# Schema are compiled either into jsonschema validators ("jsonschema") or, where they only use the
+# keywords supported by services/schema_compiler.py, into generated Python functions ("compiled").
+VALIDATOR_ENGINE: str = str(
+    os.environ.get("IDENTIFIER_VALIDATOR_ENGINE") or "jsonschema"
+).lower()
+if VALIDATOR_ENGINE not in ("jsonschema", "compiled"):
+    raise EnvironmentError(
+        explanation="The IDENTIFIER_VALIDATOR_ENGINE variable must be either jsonschema or compiled."
+    )
+# Entities read through the API are cached in a file of this many bytes that all workers share; 0
+# disables the cache.
+ENTITY_CACHE_SIZE: int = int(os.environ.get("IDENTIFIER_ENTITY_CACHE_SIZE") or 0)
+# The whole data tree can be downloaded from /identifier/export only if this is enabled.
+EXPORT_ENABLED: bool = _is_enabled("IDENTIFIER_EXPORT_ENABLED")
+# The size of the thread pool in which each ASGI worker (see api/asgi.py) runs requests.
+ASGI_THREADS: int = int(os.environ.get("IDENTIFIER_ASGI_THREADS") or 32)
+if ASGI_THREADS < 1:
+    raise EnvironmentError(explanation="The IDENTIFIER_ASGI_THREADS must be positive.")
 
 # OTHER CONFIG
 TIMEZONE: timezone = timezone.utc
@@ -89,6 +216,30 @@ if DEBUG:
                 "DATA_PATH": DATA_PATH,
                 "MAX_READER_COUNT": MAX_READER_COUNT,
                 "MAX_WRITE_RETRIES": MAX_WRITE_RETRIES,
+                "SHARD_WIDTHS": SHARD_WIDTHS,
+                "STORAGE_ENGINE": STORAGE_ENGINE,
+                "SEGMENT_SIZE": SEGMENT_SIZE,
+                "BLOOM_FILTER": BLOOM_FILTER,
+                "ID_INDEX": ID_INDEX,
+                "ID_INDEX_MERGE_SIZE": ID_INDEX_MERGE_SIZE,
+                "CACHE_SIZE": CACHE_SIZE,
+                "NEGATIVE_CACHE_TTL": NEGATIVE_CACHE_TTL,
+                "MAX_BATCH_SIZE": MAX_BATCH_SIZE,
+                "MAX_BULK_SIZE": MAX_BULK_SIZE,
+                "MAX_EXISTS_BATCH_SIZE": MAX_EXISTS_BATCH_SIZE,
+                "MAX_MULTI_GET_SIZE": MAX_MULTI_GET_SIZE,
+                "READ_THREADS": READ_THREADS,
+                "LEASE_PREFIX_WIDTH": LEASE_PREFIX_WIDTH,
+                "LEASE_TTL": LEASE_TTL,
+                "POOL_SIZE": POOL_SIZE,
+                "INDEX_FORMAT": INDEX_FORMAT,
+                "POSTINGS_BUFFER_SIZE": POSTINGS_BUFFER_SIZE,
+                "POOL_LOW_WATER": POOL_LOW_WATER,
+                "SCHEMA_REFRESH_INTERVAL": SCHEMA_REFRESH_INTERVAL,
+                "VALIDATOR_ENGINE": VALIDATOR_ENGINE,
+                "ENTITY_CACHE_SIZE": ENTITY_CACHE_SIZE,
+                "EXPORT_ENABLED": EXPORT_ENABLED,
+                "ASGI_THREADS": ASGI_THREADS,
                 "TEXT_ENCODING": TEXT_ENCODING,
                 "TIMEZONE": TIMEZONE,
                 "BUILD_ID": BUILD_ID,
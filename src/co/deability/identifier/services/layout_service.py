@@ -0,0 +1,160 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+from os import PathLike
+from pathlib import Path
+from typing import Final, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from co.deability.identifier import config
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+
+HEX_CHARS: Final[Set[str]] = set("0123456789abcdef")
+
+"""
+Functions that define how an identifier is laid out as a directory structure beneath a repository's
+base path. The layout is controlled by config.SHARD_WIDTHS; an empty value selects the original
+layout of one directory per character.
+"""
+
+
+def identifier_parts(
+    identifier: str, shard_widths: Optional[Sequence[int]] = None
+) -> List[str]:
+    """
+    Returns the directory names that make up the path of the supplied identifier. E.g., with shard
+    widths of (2, 2), the identifier "c963ef49afa5483bb1326e9525727140" is split into
+    ["c9", "63", "ef49afa5483bb1326e9525727140"]; with no shard widths, it is split into its
+    individual characters.
+
+    :param identifier: The identifier to be split into directory names.
+    :param shard_widths: The widths of the shard directories above the leaf directory; defaults to
+    config.SHARD_WIDTHS.
+    :return: The directory names, from the top down, for the supplied identifier.
+    """
+    widths: Sequence[int] = (
+        config.SHARD_WIDTHS if shard_widths is None else shard_widths
+    )
+    if not widths:
+        return list(identifier)
+    parts: List[str] = []
+    start: int = 0
+    for width in widths:
+        parts.append(identifier[start : start + width])
+        start += width
+    parts.append(identifier[start:])
+    return parts
+
+
+def identifier_path(
+    base_path: Union[str, PathLike],
+    identifier: str,
+    shard_widths: Optional[Sequence[int]] = None,
+) -> Path:
+    """
+    Returns the path of the directory representing the supplied identifier beneath the supplied
+    base path. See identifier_parts, above.
+
+    :param base_path: The directory under which the identifier is stored.
+    :param identifier: The identifier to be transmogrified into a file path.
+    :param shard_widths: The widths of the shard directories above the leaf directory; defaults to
+    config.SHARD_WIDTHS.
+    :return: A file path for a directory that's suitable for serialization to disk.
+    """
+    return Path(base_path, *identifier_parts(identifier, shard_widths=shard_widths))
+
+
+def identifier_depth(
+    identifier_length: int, shard_widths: Optional[Sequence[int]] = None
+) -> int:
+    """
+    Returns the number of directory levels beneath the base path at which identifiers of the
+    supplied length are stored.
+
+    :param identifier_length: The number of characters in the identifier.
+    :param shard_widths: The widths of the shard directories above the leaf directory; defaults to
+    config.SHARD_WIDTHS.
+    :return: The depth of the leaf directory for identifiers of the supplied length.
+    """
+    widths: Sequence[int] = (
+        config.SHARD_WIDTHS if shard_widths is None else shard_widths
+    )
+    return len(widths) + 1 if widths else identifier_length
+
+
+def parse_shard_widths(spec: str) -> Tuple[int, ...]:
+    """
+    Returns the shard widths described by the supplied comma-separated specification, e.g. "2,2";
+    an empty specification describes the single-character layout. Raises an IllegalArgumentError
+    if the specification can't be parsed.
+
+    :param spec: A comma-separated list of positive integers, or an empty string.
+    :return: The shard widths described by the specification.
+    """
+    try:
+        widths: Tuple[int, ...] = tuple(
+            int(width) for width in spec.split(",") if width.strip()
+        )
+    except ValueError:
+        raise IllegalArgumentError(
+            message=f"The shard widths {spec} are not a comma-separated list of integers."
+        )
+    if any(width < 1 for width in widths) or sum(widths) > 16:
+        raise IllegalArgumentError(
+            message="Shard widths must be positive and add up to no more than 16."
+        )
+    return widths
+
+
+def find_identifiers(
+    base_path: Union[str, PathLike], shard_widths: Optional[Sequence[int]] = None
+) -> Iterator[Tuple[str, Path]]:
+    """
+    Returns a generator that walks the tree beneath the supplied base path and produces each
+    identifier it finds (of the length of UuidRepository identifiers or of config.IDENTIFIER_LENGTH)
+    along with the directory that represents it. Entries whose names aren't hexadecimal, such as
+    the schema directory, are skipped.
+
+    :param base_path: The root of the data tree to be searched.
+    :param shard_widths: The widths of the shard directories above the leaf directory; defaults to
+    config.SHARD_WIDTHS.
+    :return: A generator of (identifier, directory) pairs.
+    """
+    base_path = Path(base_path)
+    lengths: Set[int] = {32, config.IDENTIFIER_LENGTH}
+    max_depth: int = max(
+        identifier_depth(identifier_length=length, shard_widths=shard_widths)
+        for length in lengths
+    )
+    for dir_path, dir_names, _ in os.walk(base_path):
+        parts: Tuple[str, ...] = Path(dir_path).relative_to(base_path).parts
+        identifier: str = "".join(parts)
+        if len(identifier) in lengths and tuple(
+            identifier_parts(identifier, shard_widths=shard_widths)
+        ) == tuple(parts):
+            yield identifier, Path(dir_path)
+        dir_names[:] = (
+            [name for name in dir_names if is_hex(name)]
+            if len(parts) < max_depth
+            else []
+        )
+
+
+def is_hex(name: str) -> bool:
+    """
+    Returns True if the supplied name is non-empty and consists only of the lower-case hexadecimal
+    characters used in identifiers; False otherwise.
+    """
+    return bool(name) and set(name) <= HEX_CHARS
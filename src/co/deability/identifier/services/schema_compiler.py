@@ -0,0 +1,390 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import re
+from typing import Final, Dict, Any, List, Optional, Callable, Tuple
+
+from jsonschema.exceptions import ValidationError
+
+"""
+Compiles JSON schema into generated Python functions, in the manner of fastjsonschema, so that an
+entity can be validated by straight-line code instead of by interpreting its schema keyword by
+keyword. Only the keywords most used to describe entities are supported (see SUPPORTED_KEYWORDS);
+compile_schema returns None for schema using any other keyword, so that the caller can fall back to
+a jsonschema validator. The generated code follows the semantics of jsonschema's own validators,
+e.g. booleans are neither integers nor numbers, and 1.0 is an integer.
+"""
+
+SUPPORTED_KEYWORDS: Final[frozenset] = frozenset(
+    (
+        "type",
+        "enum",
+        "const",
+        "properties",
+        "required",
+        "additionalProperties",
+        "minProperties",
+        "maxProperties",
+        "items",
+        "minItems",
+        "maxItems",
+        "minLength",
+        "maxLength",
+        "pattern",
+        "minimum",
+        "maximum",
+        "exclusiveMinimum",
+        "exclusiveMaximum",
+    )
+)
+# Keywords that don't affect validation (format is only asserted when a format checker is used,
+# which the jsonschema validators it replaces don't do.)
+ANNOTATION_KEYWORDS: Final[frozenset] = frozenset(
+    (
+        "$schema",
+        "$id",
+        "$comment",
+        "title",
+        "description",
+        "default",
+        "examples",
+        "format",
+        "deprecated",
+        "readOnly",
+        "writeOnly",
+    )
+)
+TYPE_CHECKS: Final[Dict[str, str]] = {
+    "object": "isinstance({0}, dict)",
+    "array": "isinstance({0}, list)",
+    "string": "isinstance({0}, str)",
+    "boolean": "isinstance({0}, bool)",
+    "null": "{0} is None",
+    "number": "(isinstance({0}, (int, float)) and not isinstance({0}, bool))",
+    "integer": "((isinstance({0}, int) and not isinstance({0}, bool)) or "
+    "(isinstance({0}, float) and {0}.is_integer()))",
+}
+
+
+class CompiledValidator:
+    """
+    Validates instances against a schema with a function generated by compile_schema, offering
+    the validate and is_valid methods of the jsonschema validator it replaces.
+    """
+
+    def __init__(self, schema: Dict[str, Any], source: str, function: Callable):
+        self.schema = schema
+        self.source = source
+        self._function = function
+
+    def validate(self, instance: Any) -> None:
+        self._function(instance)
+
+    def is_valid(self, instance: Any) -> bool:
+        try:
+            self._function(instance)
+        except ValidationError:
+            return False
+        return True
+
+
+def compile_schema(schema: Dict[str, Any]) -> Optional[CompiledValidator]:
+    """
+    Returns a validator for the supplied schema that runs generated code, or None if the schema
+    uses a keyword (or a form of one) that isn't supported.
+
+    :param schema: A valid JSON schema.
+    :return: A CompiledValidator, or None.
+    """
+    generator = _Generator()
+    try:
+        generator.emit(schema=schema, variable="data", indent=1)
+    except _UnsupportedSchema:
+        return None
+    source: str = "\n".join(["def validate(data):"] + generator.lines + ["    pass"])
+    namespace: Dict[str, Any] = dict(generator.constants)
+    namespace.update(ValidationError=ValidationError, _equal=_equal)
+    exec(compile(source, "<schema>", "exec"), namespace)
+    return CompiledValidator(
+        schema=schema, source=source, function=namespace["validate"]
+    )
+
+
+class _UnsupportedSchema(Exception):
+    pass
+
+
+class _Generator:
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self._names: int = 0
+
+    def emit(self, schema: Any, variable: str, indent: int) -> None:
+        if schema is True or schema == {}:
+            return
+        if schema is False:
+            self._fail(indent, f'f"False schema does not allow {{{variable}!r}}"')
+            return
+        if not isinstance(schema, dict):
+            raise _UnsupportedSchema()
+        for keyword in schema:
+            if keyword not in SUPPORTED_KEYWORDS and not (
+                keyword in ANNOTATION_KEYWORDS or keyword.startswith("x-")
+            ):
+                raise _UnsupportedSchema()
+        self._emit_type(schema, variable, indent)
+        if "enum" in schema:
+            values: str = self._constant(schema["enum"])
+            self._check(
+                indent,
+                f"not any(_equal({variable}, value) for value in {values})",
+                f'f"{{{variable}!r}} is not one of {{{values}!r}}"',
+            )
+        if "const" in schema:
+            value: str = self._constant(schema["const"])
+            self._check(
+                indent,
+                f"not _equal({variable}, {value})",
+                f'f"{{{value}!r}} was expected"',
+            )
+        self._emit_string(schema, variable, indent)
+        self._emit_number(schema, variable, indent)
+        self._emit_object(schema, variable, indent)
+        self._emit_array(schema, variable, indent)
+
+    def _emit_type(self, schema: Dict[str, Any], variable: str, indent: int) -> None:
+        if "type" not in schema:
+            return
+        types = schema["type"]
+        types = [types] if isinstance(types, str) else types
+        if not isinstance(types, list) or any(
+            name not in TYPE_CHECKS for name in types
+        ):
+            raise _UnsupportedSchema()
+        condition: str = " or ".join(
+            TYPE_CHECKS[name].format(variable) for name in types
+        )
+        self._check(
+            indent,
+            f"not ({condition or 'False'})",
+            f'f"{{{variable}!r}} is not of type {", ".join(map(repr, types))}"',
+        )
+
+    def _emit_string(self, schema: Dict[str, Any], variable: str, indent: int) -> None:
+        keywords: List[str] = [
+            keyword
+            for keyword in ("minLength", "maxLength", "pattern")
+            if keyword in schema
+        ]
+        if not keywords:
+            return
+        indent = self._guard(schema, variable, indent, ("string",))
+        if "minLength" in schema:
+            self._check(
+                indent,
+                f"len({variable}) < {self._integer(schema['minLength'])}",
+                f'f"{{{variable}!r}} is too short"',
+            )
+        if "maxLength" in schema:
+            self._check(
+                indent,
+                f"len({variable}) > {self._integer(schema['maxLength'])}",
+                f'f"{{{variable}!r}} is too long"',
+            )
+        if "pattern" in schema:
+            if not isinstance(schema["pattern"], str):
+                raise _UnsupportedSchema()
+            try:
+                pattern: str = self._constant(re.compile(schema["pattern"]))
+            except re.error:
+                raise _UnsupportedSchema()
+            self._check(
+                indent,
+                f"not {pattern}.search({variable})",
+                f'f"{{{variable}!r}} does not match {{{pattern}.pattern!r}}"',
+            )
+
+    def _emit_number(self, schema: Dict[str, Any], variable: str, indent: int) -> None:
+        comparisons: Dict[str, str] = {
+            "minimum": "<",
+            "maximum": ">",
+            "exclusiveMinimum": "<=",
+            "exclusiveMaximum": ">=",
+        }
+        keywords: List[str] = [keyword for keyword in comparisons if keyword in schema]
+        if not keywords:
+            return
+        indent = self._guard(schema, variable, indent, ("number", "integer"))
+        for keyword in keywords:
+            limit = schema[keyword]
+            if isinstance(limit, bool) or not isinstance(limit, (int, float)):
+                raise _UnsupportedSchema()  # e.g. draft 4's boolean exclusiveMinimum
+            self._check(
+                indent,
+                f"{variable} {comparisons[keyword]} {self._constant(limit)}",
+                f'f"{{{variable}!r}} violates {keyword} {limit!r}"',
+            )
+
+    def _emit_object(self, schema: Dict[str, Any], variable: str, indent: int) -> None:
+        keywords: List[str] = [
+            keyword
+            for keyword in (
+                "required",
+                "properties",
+                "additionalProperties",
+                "minProperties",
+                "maxProperties",
+            )
+            if keyword in schema
+        ]
+        if not keywords:
+            return
+        start: int = len(self.lines)
+        indent = self._guard(schema, variable, indent, ("object",))
+        if "minProperties" in schema:
+            self._check(
+                indent,
+                f"len({variable}) < {self._integer(schema['minProperties'])}",
+                f'f"{{{variable}!r}} does not have enough properties"',
+            )
+        if "maxProperties" in schema:
+            self._check(
+                indent,
+                f"len({variable}) > {self._integer(schema['maxProperties'])}",
+                f'f"{{{variable}!r}} has too many properties"',
+            )
+        required = schema.get("required", [])
+        if not isinstance(required, list) or not all(
+            isinstance(name, str) for name in required
+        ):
+            raise _UnsupportedSchema()
+        for name in required:
+            self._check(
+                indent,
+                f"{name!r} not in {variable}",
+                f"{repr(f'{name!r} is a required property')}",
+            )
+        properties = schema.get("properties", {})
+        if not isinstance(properties, dict):
+            raise _UnsupportedSchema()
+        for name, subschema in properties.items():
+            property_variable: str = self._name()
+            self.lines.append(f"{'    ' * indent}if {name!r} in {variable}:")
+            self.lines.append(
+                f"{'    ' * (indent + 1)}{property_variable} = {variable}[{name!r}]"
+            )
+            self.emit(schema=subschema, variable=property_variable, indent=indent + 1)
+        additional = schema.get("additionalProperties", True)
+        if additional is not True and additional != {}:
+            names: str = self._constant(frozenset(properties))
+            key, value = self._name(), self._name()
+            self.lines.append(
+                f"{'    ' * indent}for {key}, {value} in {variable}.items():"
+            )
+            self.lines.append(f"{'    ' * (indent + 1)}if {key} not in {names}:")
+            if additional is False:
+                self._fail(
+                    indent + 2,
+                    f'f"Additional properties are not allowed ({{{key}!r}} was unexpected)"',
+                )
+            else:
+                self.emit(schema=additional, variable=value, indent=indent + 2)
+                self.lines.append(f"{'    ' * (indent + 2)}pass")
+        if len(self.lines) == start + 1:
+            self.lines.append(f"{'    ' * indent}pass")
+
+    def _emit_array(self, schema: Dict[str, Any], variable: str, indent: int) -> None:
+        keywords: List[str] = [
+            keyword
+            for keyword in ("items", "minItems", "maxItems")
+            if keyword in schema
+        ]
+        if not keywords:
+            return
+        indent = self._guard(schema, variable, indent, ("array",))
+        if "minItems" in schema:
+            self._check(
+                indent,
+                f"len({variable}) < {self._integer(schema['minItems'])}",
+                f'f"{{{variable}!r}} is too short"',
+            )
+        if "maxItems" in schema:
+            self._check(
+                indent,
+                f"len({variable}) > {self._integer(schema['maxItems'])}",
+                f'f"{{{variable}!r}} is too long"',
+            )
+        if "items" in schema:
+            if isinstance(schema["items"], list):
+                raise _UnsupportedSchema()  # the tuple form of earlier drafts
+            item: str = self._name()
+            self.lines.append(f"{'    ' * indent}for {item} in {variable}:")
+            self.emit(schema=schema["items"], variable=item, indent=indent + 1)
+            self.lines.append(f"{'    ' * (indent + 1)}pass")
+
+    def _guard(
+        self, schema: Dict[str, Any], variable: str, indent: int, types: Tuple[str]
+    ) -> int:
+        """
+        Starts a block for keywords that only apply to instances of the supplied types, unless the
+        schema's type keyword has already ensured the instance is one, and returns its indent.
+        """
+        declared = schema.get("type")
+        declared = [declared] if isinstance(declared, str) else declared
+        if declared and all(name in types for name in declared):
+            return indent
+        # the first type includes any others (i.e. numbers include integers)
+        self.lines.append(
+            f"{'    ' * indent}if {TYPE_CHECKS[types[0]].format(variable)}:"
+        )
+        return indent + 1
+
+    def _check(self, indent: int, condition: str, message: str) -> None:
+        self.lines.append(f"{'    ' * indent}if {condition}:")
+        self._fail(indent + 1, message)
+
+    def _fail(self, indent: int, message: str) -> None:
+        self.lines.append(f"{'    ' * indent}raise ValidationError({message})")
+
+    def _constant(self, value: Any) -> str:
+        name: str = f"_constant_{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def _integer(self, value: Any) -> int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise _UnsupportedSchema()
+        return value
+
+    def _name(self) -> str:
+        self._names += 1
+        return f"data_{self._names}"
+
+
+def _equal(one: Any, two: Any) -> bool:
+    """
+    Compares JSON values the way jsonschema does for enum and const, i.e. without treating booleans
+    as numbers.
+    """
+    if isinstance(one, bool) or isinstance(two, bool):
+        return type(one) is type(two) and one == two
+    if isinstance(one, dict) and isinstance(two, dict):
+        return one.keys() == two.keys() and all(
+            _equal(value, two[key]) for key, value in one.items()
+        )
+    if isinstance(one, list) and isinstance(two, list):
+        return len(one) == len(two) and all(map(_equal, one, two))
+    return one == two
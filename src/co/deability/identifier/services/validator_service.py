@@ -14,14 +14,49 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import json
-from typing import Dict, Any
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, FrozenSet, List, Optional, Set, Tuple, Union
 from flask import request
-import jsonschema
-from jsonschema.exceptions import ValidationError
+from jsonschema.exceptions import SchemaError, ValidationError
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
 
 from co.deability.identifier import config
 from co.deability.identifier.errors.BadRequestError import BadRequestError
 from co.deability.identifier.errors.UnknownEntityTypeError import UnknownEntityTypeError
+from co.deability.identifier.services import schema_compiler
+from co.deability.identifier.services.schema_compiler import CompiledValidator
+
+"""
+Validates entities against the schema for their types. Each schema is compiled into a validator
+once, when its file is first read or has changed, and kept in a registry shared by all requests.
+The registry is reloaded when invalidate() has been called since it was last loaded (as it is by
+every change to the schema made through this process), or when any schema file has been added,
+changed, or removed (e.g. by another process), which is checked at most once every
+config.SCHEMA_REFRESH_INTERVAL seconds.
+
+When config.VALIDATOR_ENGINE is "compiled", schema are compiled into generated functions by
+schema_compiler where possible, and into jsonschema validators otherwise.
+"""
+
+LOG = logging.getLogger(__name__)
+SchemaValidator = Union[Validator, CompiledValidator]
+
+# The modification time and size of a schema file, its schema, and its compiled validator (None if
+# the schema isn't a valid JSON schema)
+_Entry = Tuple[Tuple[int, int], Dict[str, Any], Optional[SchemaValidator]]
+
+# The entry of each entity type
+_registry: Dict[str, _Entry] = {}
+_registry_lock: threading.Lock = threading.Lock()
+_generation: int = 0
+_loaded_generation: int = -1
+_schema_stamp: Optional[FrozenSet[Tuple[str, int, int]]] = None
+_checked_at: float = float("-inf")
 
 
 def validate_entity(post_func):
@@ -34,11 +69,13 @@ def validate_entity(post_func):
                 message="The body cannot be missing or an empty document."
             )
         entity_type: str = request.url.rsplit(sep="/", maxsplit=1)[1]
-        schema = known_schema().get(entity_type)
-        if not schema:
+        schema_validator: Optional[SchemaValidator] = get_validator(
+            entity_type=entity_type
+        )
+        if not schema_validator:
             raise UnknownEntityTypeError()
         try:
-            jsonschema.validate(instance=entity, schema=schema)
+            schema_validator.validate(instance=entity)
         except ValidationError as ve:
             raise BadRequestError(
                 message="The entity cannot be validated against the specified entity type."
@@ -48,10 +85,112 @@ def validate_entity(post_func):
     return validator
 
 
+def get_validator(entity_type: str) -> Optional[SchemaValidator]:
+    """
+    Returns the compiled validator for the schema of the supplied entity type, or None if there's
+    no such schema. Raises a BadRequestError if the schema isn't a valid JSON schema.
+    """
+    _refresh(force=False)
+    entry = _registry.get(entity_type)
+    if not entry:
+        return None
+    if not entry[2]:
+        raise BadRequestError(
+            message="The schema for the specified entity type is not a valid JSON schema."
+        )
+    return entry[2]
+
+
+def get_schema(entity_type: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the schema of the supplied entity type from the registry, or None if there's no such
+    schema. Like get_validator, it only checks the schema files for changes made by other
+    processes every config.SCHEMA_REFRESH_INTERVAL seconds.
+    """
+    _refresh(force=False)
+    entry = _registry.get(entity_type)
+    return entry[1] if entry else None
+
+
 def known_schema() -> Dict[str, Any]:
-    result: Dict[str, Any] = {}
-    for schema in config.SCHEMA_PATH.glob("**/*.json"):
-        result.update(
-            {schema.stem: json.loads(schema.read_text(encoding=config.TEXT_ENCODING))}
+    _refresh(force=True)
+    return {name: schema for name, (_, schema, _) in _registry.items()}
+
+
+def invalidate() -> None:
+    """
+    Causes the registry to be reloaded before it's next used; called whenever a schema is added,
+    updated, or removed.
+    """
+    global _generation
+    _generation += 1
+
+
+def _refresh(force: bool) -> None:
+    global _registry, _loaded_generation, _schema_stamp, _checked_at
+    if _loaded_generation == _generation and (
+        not force and time.monotonic() - _checked_at < config.SCHEMA_REFRESH_INTERVAL
+    ):
+        return
+    with _registry_lock:
+        generation: int = _generation
+        _checked_at = time.monotonic()
+        schema_paths: List[Path] = list(config.SCHEMA_PATH.glob("**/*.json"))
+        stamp: FrozenSet[Tuple[str, int, int]] = _stamp(schema_paths=schema_paths)
+        if _loaded_generation == generation and _schema_stamp == stamp:
+            return
+        registry: Dict[str, _Entry] = {}
+        for schema_path in schema_paths:
+            entry = _compile(schema_path=schema_path)
+            if entry:
+                registry[schema_path.stem] = entry
+        _registry = registry
+        _loaded_generation = generation
+        _schema_stamp = stamp
+
+
+def _compile(schema_path: Path) -> Optional[_Entry]:
+    try:
+        stat: os.stat_result = schema_path.stat()
+        # A file rewritten within the same tick of the clock keeps its modification time
+        stamp: Tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+        previous: Optional[_Entry] = _registry.get(schema_path.stem)
+        if previous and previous[0] == stamp:
+            return previous
+        schema: Dict[str, Any] = json.loads(
+            schema_path.read_text(encoding=config.TEXT_ENCODING)
+        )
+    except FileNotFoundError:
+        return None  # removed while the directory was being read
+    except ValueError as ex:
+        LOG.error(
+            f"The schema in {schema_path} can't be parsed and will be ignored: {ex}"
         )
-    return result
+        return None
+    validator_class = validator_for(schema)
+    try:
+        validator_class.check_schema(schema)
+    except SchemaError as ex:
+        LOG.error(f"The schema in {schema_path} is not a valid JSON schema: {ex}")
+        return stamp, schema, None
+    compiled: Optional[CompiledValidator] = (
+        schema_compiler.compile_schema(schema=schema)
+        if config.VALIDATOR_ENGINE == "compiled"
+        else None
+    )
+    return stamp, schema, compiled or validator_class(schema)
+
+
+def _stamp(schema_paths: List[Path]) -> FrozenSet[Tuple[str, int, int]]:
+    """
+    Returns the path, modification time, and size of each of the supplied schema files, which
+    changes whenever a file is added, removed, or rewritten (in place or not.)
+    """
+    stamp: Set[Tuple[str, int, int]] = set()
+    for schema_path in schema_paths:
+        try:
+            stat: os.stat_result = schema_path.stat()
+        except FileNotFoundError:
+            continue
+        stamp.add((str(schema_path), stat.st_mtime_ns, stat.st_size))
+    return frozenset(stamp)
@@ -0,0 +1,291 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Final, Any, BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple
+
+from jsonschema.exceptions import ValidationError
+
+from co.deability.identifier import config
+from co.deability.identifier.api import repositories
+from co.deability.identifier.api.repositories import bloom_filter, entities, id_index
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+from co.deability.identifier.api.services import entity_service
+from co.deability.identifier.config import LOG
+from co.deability.identifier.errors.UnknownEntityTypeError import UnknownEntityTypeError
+from co.deability.identifier.services import validator_service
+
+"""
+An offline tool that imports a file of entities of one type, one JSON document per line, directly
+into the data tree at IDENTIFIER_DATA_PATH, in the same layout as entities added through the API
+(see entity_service.add_entities), but without the overhead of a request per entity.
+
+The file is read in chunks of lines, which are parsed, validated against the schema for the entity
+type, and hashed by a pool of worker processes, while the main process writes the entities of each
+chunk (in the order of the file) along with their entity type search terms and the search terms of
+any indexed fields. After each chunk, the position reached in the file is recorded in a checkpoint
+file, from which an interrupted import resumes when it's run again. Invalid lines are logged and
+skipped, and entities that already exist are left as they are.
+"""
+
+PROGRESS_INTERVAL: Final[int] = 100000
+CHECKPOINT_SUFFIX: Final[str] = ".checkpoint"
+
+
+def import_entities(
+    path: Path,
+    entity_type: str,
+    checkpoint_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+) -> Dict[str, int]:
+    """
+    Imports the entities in the NDJSON file at the supplied path, resuming from the checkpoint
+    file if it records an earlier, interrupted import, and returns the tallies recorded in it.
+
+    :param path: The file of entities.
+    :param entity_type: The type of every entity in the file.
+    :param checkpoint_path: The checkpoint file; by default, the file's path plus CHECKPOINT_SUFFIX.
+    :param workers: The number of worker processes; by default, the number of CPUs.
+    :param chunk_size: The number of lines handed to a worker at a time.
+    :return: The number of lines read and of entities created, already existing, and invalid.
+    """
+    checkpoint_path = checkpoint_path or Path(f"{path}{CHECKPOINT_SUFFIX}")
+    progress: Dict[str, int] = _read_checkpoint(checkpoint_path=checkpoint_path)
+    if (
+        not validator_service.get_validator(entity_type=entity_type)
+        and not config.DEBUG
+    ):
+        raise UnknownEntityTypeError()
+    resuming: bool = progress["offset"] > 0
+    if resuming:
+        LOG.info(f"Resuming the import of {path} from line {progress['lines'] + 1}.")
+    started: float = time.monotonic()
+    starting_lines: int = progress["lines"]
+    workers = workers or os.cpu_count() or 1
+    with open(path, "rb") as source, ProcessPoolExecutor(max_workers=workers) as pool:
+        source.seek(progress["offset"])
+        in_flight: Deque[Tuple[int, int, Future]] = deque()
+        chunks: Iterator[Optional[Tuple[int, List[bytes]]]] = itertools.chain(
+            _read_chunks(source=source, chunk_size=chunk_size), [None]
+        )
+        for chunk in chunks:
+            if chunk:
+                offset, lines = chunk
+                in_flight.append(
+                    (offset, len(lines), pool.submit(_prepare, lines, entity_type))
+                )
+            # Workers prepare chunks ahead of the one being written, up to a limit; once the file
+            # has been read (chunk is None), the rest are written.
+            while in_flight and (len(in_flight) >= workers * 2 or not chunk):
+                _write_chunk(in_flight.popleft(), entity_type, progress, resuming)
+                _write_checkpoint(checkpoint_path=checkpoint_path, progress=progress)
+                resuming = False
+                read: int = progress["lines"] - starting_lines
+                if read // PROGRESS_INTERVAL > (read - chunk_size) // PROGRESS_INTERVAL:
+                    LOG.info(
+                        f"Read {progress['lines']} lines "
+                        f"({read / (time.monotonic() - started):.0f} lines/s)..."
+                    )
+    if not config.BLOOM_FILTER:
+        bloom_filter.remove_snapshot(base_path=repositories.BASE_PATH)
+    if not config.ID_INDEX:
+        id_index.remove_index(base_path=repositories.BASE_PATH)
+    elapsed: float = time.monotonic() - started
+    read: int = progress["lines"] - starting_lines
+    LOG.info(
+        f"Read {read} lines in {elapsed:.1f}s ({read / elapsed if elapsed else 0:.0f} lines/s): "
+        f"{progress['created']} entities created, {progress['existing']} already existed, and "
+        f"{progress['invalid']} were invalid in all."
+    )
+    return progress
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="identifier_import_entities",
+        description="Imports a file of entities of one type, one JSON document per line, "
+        "directly into IDENTIFIER_DATA_PATH.",
+    )
+    parser.add_argument("entity_type", help="The type of every entity in the file.")
+    parser.add_argument("path", type=Path, help="The NDJSON file of entities.")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help=f"The checkpoint file (default: the file's path plus {CHECKPOINT_SUFFIX}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="The number of worker processes (default: the number of CPUs).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="The number of lines handed to a worker at a time (default: 1000).",
+    )
+    args = parser.parse_args()
+    # progress and throughput are reported through the log
+    logging.basicConfig(format="%(asctime)s %(levelname)s:%(message)s")
+    import_entities(
+        path=args.path,
+        entity_type=args.entity_type,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+
+
+def _read_chunks(
+    source: BinaryIO, chunk_size: int
+) -> Iterator[Tuple[int, List[bytes]]]:
+    """
+    Returns a generator of the chunks of lines in the supplied file, from its current position,
+    each with the position of the file after it.
+    """
+    lines: List[bytes] = []
+    for line in source:
+        lines.append(line)
+        if len(lines) == chunk_size:
+            yield source.tell(), lines
+            lines = []
+    if lines:
+        yield source.tell(), lines
+
+
+def _prepare(lines: List[bytes], entity_type: str) -> List[Tuple[Optional[str], str]]:
+    """
+    Runs in a worker process. Returns the identifier and serialized content of each entity in the
+    supplied lines, or None and the reason a line is invalid. Blank lines are returned as neither.
+    """
+    validator: Optional[
+        validator_service.SchemaValidator
+    ] = validator_service.get_validator(entity_type=entity_type)
+    prepared: List[Tuple[Optional[str], str]] = []
+    for line in lines:
+        if not line.strip():
+            prepared.append((None, ""))
+            continue
+        try:
+            entity: Any = json.loads(line)
+        except ValueError:
+            prepared.append((None, "The line is not valid JSON."))
+            continue
+        if not isinstance(entity, dict) or not entity:
+            prepared.append((None, "The entity must be a non-empty JSON object."))
+            continue
+        if validator:
+            try:
+                validator.validate(entity)
+            except ValidationError as ve:
+                prepared.append((None, f"The entity is not valid: {ve.message}"))
+                continue
+        prepared.append(
+            (entities.calculate_id_from_data(data=entity), json.dumps(entity))
+        )
+    return prepared
+
+
+def _write_chunk(
+    chunk: Tuple[int, int, Future],
+    entity_type: str,
+    progress: Dict[str, int],
+    resuming: bool,
+) -> None:
+    """
+    Writes the prepared entities of a chunk and adds their search terms, and updates the progress
+    to the end of the chunk.
+
+    If the import is resuming, the chunk may have been partly written before the import was
+    interrupted, so existing entities without metadata (which is written for an entity once its
+    search terms have been added) have their search terms added again.
+    """
+    offset, line_count, future = chunk
+    prepared: List[Tuple[Optional[str], str]] = future.result()
+    pending: Dict[str, str] = {}
+    for number, (identifier, content) in enumerate(prepared, progress["lines"] + 1):
+        if identifier:
+            pending.setdefault(identifier, content)
+        elif content:
+            LOG.warning(f"Skipped line {number}: {content}")
+            progress["invalid"] += 1
+    targets: Dict[str, Path] = {}
+    for identifier, identifier_path in repositories.create_identifier_paths(
+        identifiers=pending
+    ).items():
+        data_path: Path = entities.calculate_new_data_path(
+            identifier_path=identifier_path
+        )
+        data_path.write_text(data=pending[identifier], encoding=config.TEXT_ENCODING)
+        targets[identifier] = data_path
+    progress["created"] += len(targets)
+    progress["existing"] += sum(1 for identifier, _ in prepared if identifier) - len(
+        targets
+    )
+    if resuming:
+        for identifier in pending.keys() - targets.keys():
+            if not entity_repository.read_metadata(identifier=identifier):
+                targets[identifier] = entity_repository.find_entity_path(
+                    identifier=identifier
+                )
+    index_repository.create_index_entries(
+        targets=targets, index={entity_service.ENTITY_TYPE: entity_type}
+    )
+    for identifier in targets:
+        entity_service.index_fields(
+            identifier=identifier,
+            entity=json.loads(pending[identifier]),
+            metadata={entity_service.ENTITY_TYPE: entity_type},
+        )
+    progress["offset"] = offset
+    progress["lines"] += line_count
+
+
+def _read_checkpoint(checkpoint_path: Path) -> Dict[str, int]:
+    progress: Dict[str, int] = dict(offset=0, lines=0, created=0, existing=0, invalid=0)
+    try:
+        progress.update(
+            json.loads(checkpoint_path.read_text(encoding=config.TEXT_ENCODING))
+        )
+    except FileNotFoundError:
+        pass
+    return progress
+
+
+def _write_checkpoint(checkpoint_path: Path, progress: Dict[str, int]) -> None:
+    temporary: Path = Path(
+        checkpoint_path.parent, f".{checkpoint_path.name}.{uuid.uuid4().hex}"
+    )
+    temporary.write_text(data=json.dumps(progress), encoding=config.TEXT_ENCODING)
+    os.replace(temporary, checkpoint_path)
+
+
+if __name__ == "__main__":
+    main()
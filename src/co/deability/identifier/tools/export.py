@@ -0,0 +1,77 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import BinaryIO
+
+from co.deability.identifier import config
+from co.deability.identifier.api.services import export_service
+from co.deability.identifier.services import layout_service
+
+"""
+A tool that writes an export of the data tree at IDENTIFIER_DATA_PATH (see export_service) to a
+file or to standard output, e.g. to be piped to identifier_restore on another node:
+
+    identifier_export | ssh other-node identifier_restore
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="identifier_export",
+        description="Exports an Identifier data tree as a single stream.",
+    )
+    parser.add_argument(
+        "--source",
+        default=str(config.DATA_PATH),
+        help="The data tree to be exported; defaults to IDENTIFIER_DATA_PATH.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=export_service.FORMATS,
+        default="ndjson",
+        help="ndjson (which can be restored into any layout) or tar (default: ndjson).",
+    )
+    parser.add_argument(
+        "--widths",
+        default=",".join(str(width) for width in config.SHARD_WIDTHS),
+        help="The shard widths of the data tree; defaults to IDENTIFIER_SHARD_WIDTHS.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="The file to be written (default: standard output).",
+    )
+    args = parser.parse_args()
+    output: BinaryIO = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for content in export_service.export(
+            base_path=Path(args.source),
+            export_format=args.format,
+            shard_widths=layout_service.parse_shard_widths(args.widths),
+        ):
+            output.write(content)
+    finally:
+        if args.output:
+            output.close()
+        else:
+            output.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+from typing import Final, Any, Dict, List
+
+from co.deability.identifier.api.repositories.entities import entity_repository
+from co.deability.identifier.api.services import entity_service
+from co.deability.identifier.config import LOG
+
+"""
+A tool that adds the search terms declared by a schema's indexed fields (see
+entity_repository.INDEX_ANNOTATION) to the existing entities of that type, e.g. after the schema
+gains a new indexed field. New and updated entities are indexed automatically; this brings the
+entities that were written before the schema changed up to date. It's safe to run while the
+Identifier API is running, and to run more than once.
+"""
+
+PROGRESS_INTERVAL: Final[int] = 10000
+
+
+def backfill(entity_type: str) -> int:
+    """
+    Adds (or updates) the automatically maintained search terms of every entity of the supplied
+    type, and returns the number of entities processed.
+
+    :param entity_type: The entity type whose schema declares the indexed fields.
+    :return: The number of entities processed.
+    """
+    processed: int = 0
+    for identifier, entity in entity_service.stream_all_entities(
+        entity_type=entity_type
+    ):
+        metadata: Dict[str, Any] = entity_repository.read_metadata(
+            identifier=identifier
+        )
+        metadata[entity_service.ENTITY_TYPE] = entity_type
+        entity_service.index_fields(
+            identifier=identifier, entity=entity, metadata=metadata
+        )
+        processed += 1
+        if processed % PROGRESS_INTERVAL == 0:
+            LOG.info(f"Indexed {processed} {entity_type} entities...")
+    return processed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="identifier_backfill_indexes",
+        description="Adds the search terms declared by schema indexed fields to existing "
+        "entities.",
+    )
+    parser.add_argument(
+        "entity_types", nargs="+", help="The entity types to be backfilled."
+    )
+    args = parser.parse_args()
+    entity_types: List[str] = args.entity_types
+    for entity_type in entity_types:
+        processed: int = backfill(entity_type=entity_type)
+        LOG.info(f"Indexed {processed} {entity_type} entities.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import os
+import shutil
+from pathlib import Path
+from typing import Final, Sequence, Tuple
+
+from co.deability.identifier import config
+from co.deability.identifier.config import LOG
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.services import layout_service
+
+"""
+An offline tool that converts an existing Identifier data tree from one directory layout to another
+(see config.SHARD_WIDTHS.) The Identifier API must not be running against either tree while the
+migration is in progress.
+
+Identifier directories are moved from the source tree into the target tree one file at a time,
+symlinks that point into the source tree (entity updates, deletions and search indexes) are
+rewritten to point at the corresponding location in the target tree, and any other content of the
+source tree (such as schema) is moved across unchanged. Once the migration has completed,
+IDENTIFIER_DATA_PATH should be pointed at the target tree and IDENTIFIER_SHARD_WIDTHS set to the
+new layout.
+"""
+
+PROGRESS_INTERVAL: Final[int] = 100000
+
+
+def migrate(
+    source: Path,
+    target: Path,
+    from_widths: Sequence[int],
+    to_widths: Sequence[int],
+) -> int:
+    """
+    Moves the identifiers in the source tree, which is laid out according to from_widths, into the
+    target tree, laid out according to to_widths, and returns the number of identifiers that were
+    moved.
+
+    :param source: The root of the existing data tree.
+    :param target: The root of the new data tree, which must be empty or not yet exist.
+    :param from_widths: The shard widths of the source tree.
+    :param to_widths: The shard widths of the target tree.
+    :return: The number of identifiers that were moved.
+    """
+    source = source.absolute()
+    target = target.absolute()
+    if not source.is_dir():
+        raise IllegalArgumentError(message=f"The source {source} is not a directory.")
+    if target.exists() and any(target.iterdir()):
+        raise IllegalArgumentError(message=f"The target {target} is not empty.")
+    if target.is_relative_to(source) or source.is_relative_to(target):
+        raise IllegalArgumentError(
+            message="The source and target trees cannot be nested inside each other."
+        )
+    target.mkdir(parents=True, exist_ok=True)
+    moved: int = 0
+    for identifier, old_dir in layout_service.find_identifiers(
+        base_path=source, shard_widths=from_widths
+    ):
+        new_dir: Path = layout_service.identifier_path(
+            base_path=target, identifier=identifier, shard_widths=to_widths
+        )
+        new_dir.mkdir(parents=True, exist_ok=True)
+        for entry in os.scandir(old_dir):
+            if entry.is_dir(follow_symlinks=False):
+                continue
+            new_path: Path = Path(new_dir, entry.name)
+            if entry.is_symlink():
+                link_target: Path = _relocate(
+                    link_target=Path(os.readlink(entry.path)),
+                    source=source,
+                    target=target,
+                    from_widths=from_widths,
+                    to_widths=to_widths,
+                )
+                os.symlink(link_target, new_path)
+                os.unlink(entry.path)
+            else:
+                shutil.move(entry.path, new_path)
+        moved += 1
+        if moved % PROGRESS_INTERVAL == 0:
+            LOG.info(f"Migrated {moved} identifiers...")
+    for entry in os.scandir(source):
+        if not layout_service.is_hex(entry.name):
+            shutil.move(entry.path, Path(target, entry.name))
+    _remove_empty_dirs(source)
+    return moved
+
+
+def _relocate(
+    link_target: Path,
+    source: Path,
+    target: Path,
+    from_widths: Sequence[int],
+    to_widths: Sequence[int],
+) -> Path:
+    """
+    Returns the location in the target tree that corresponds to the supplied symlink target in the
+    source tree. Targets outside the source tree are returned unchanged.
+    """
+    if not link_target.is_absolute() or not link_target.is_relative_to(source):
+        return link_target
+    relative: Path = link_target.relative_to(source)
+    parent_parts: Tuple[str, ...] = relative.parent.parts
+    identifier: str = "".join(parent_parts)
+    if (
+        parent_parts
+        and layout_service.is_hex(identifier)
+        and tuple(layout_service.identifier_parts(identifier, shard_widths=from_widths))
+        == parent_parts
+    ):
+        return Path(
+            layout_service.identifier_path(
+                base_path=target, identifier=identifier, shard_widths=to_widths
+            ),
+            relative.name,
+        )
+    return Path(target, relative)
+
+
+def _remove_empty_dirs(source: Path) -> None:
+    for dir_path, _, _ in os.walk(source, topdown=False):
+        if Path(dir_path) != source:
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                # Not empty; leave it for the operator to inspect.
+                ...
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="identifier_migrate_layout",
+        description="Converts an Identifier data tree to a new directory layout.",
+    )
+    parser.add_argument(
+        "--source",
+        default=str(config.DATA_PATH),
+        help="The existing data tree; defaults to IDENTIFIER_DATA_PATH.",
+    )
+    parser.add_argument(
+        "--target", required=True, help="The new, empty data tree to be created."
+    )
+    parser.add_argument(
+        "--from-widths",
+        default="",
+        help='The shard widths of the existing tree, e.g. "2,2"; empty for one directory per '
+        "character.",
+    )
+    parser.add_argument(
+        "--to-widths",
+        default=",".join(str(width) for width in config.SHARD_WIDTHS),
+        help="The shard widths of the new tree; defaults to IDENTIFIER_SHARD_WIDTHS.",
+    )
+    args = parser.parse_args()
+    moved: int = migrate(
+        source=Path(args.source),
+        target=Path(args.target),
+        from_widths=layout_service.parse_shard_widths(args.from_widths),
+        to_widths=layout_service.parse_shard_widths(args.to_widths),
+    )
+    LOG.info(f"Migrated {moved} identifiers from {args.source} to {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
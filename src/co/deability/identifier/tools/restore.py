@@ -0,0 +1,69 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import BinaryIO
+
+from co.deability.identifier import config
+from co.deability.identifier.api.services import export_service
+from co.deability.identifier.config import LOG
+from co.deability.identifier.services import layout_service
+
+"""
+An offline tool that restores an export written by identifier_export (or downloaded from
+/identifier/export) into an empty data tree. The Identifier API must not be running against the
+tree while it's being restored.
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="identifier_restore",
+        description="Restores an Identifier export into an empty data tree.",
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        type=Path,
+        default=None,
+        help="The export to be restored (default: standard input).",
+    )
+    parser.add_argument(
+        "--target",
+        default=str(config.DATA_PATH),
+        help="The data tree to be restored; defaults to IDENTIFIER_DATA_PATH.",
+    )
+    parser.add_argument(
+        "--widths",
+        default=",".join(str(width) for width in config.SHARD_WIDTHS),
+        help="The shard widths of the restored tree; defaults to IDENTIFIER_SHARD_WIDTHS.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s %(levelname)s:%(message)s")
+    source: BinaryIO = open(args.source, "rb") if args.source else sys.stdin.buffer
+    with source:
+        restored: int = export_service.restore(
+            source=source,
+            target=Path(args.target),
+            shard_widths=layout_service.parse_shard_widths(args.widths),
+        )
+    LOG.info(f"Restored {restored} identifiers into {args.target}.")
+
+
+if __name__ == "__main__":
+    main()
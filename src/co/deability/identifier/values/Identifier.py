@@ -0,0 +1,130 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import uuid
+from functools import total_ordering
+from typing import Any, Final
+
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
+
+"""
+A compact, immutable identifier value, backed by the bytes its hexadecimal form encodes, so that an
+identifier is only turned into a string where one is needed: in a file path or an API response.
+"""
+
+# The length of identifiers minted from UUIDs, in hexadecimal characters
+UUID_LENGTH: Final[int] = 32
+
+
+def is_hex(text: str) -> bool:
+    """
+    Returns True if the supplied string consists only of the lower-case hexadecimal characters used
+    in identifiers; False otherwise. The string is decoded and encoded again, which takes two
+    passes in C however long it is: bytes.fromhex rejects any other characters but accepts
+    upper-case letters and whitespace, which change the encoded string.
+    """
+    # bytes.fromhex needs whole bytes
+    even: str = f"0{text}" if len(text) % 2 else text
+    try:
+        return bytes.fromhex(even).hex() == even
+    except ValueError:
+        return False
+
+
+@total_ordering
+class Identifier:
+    """
+    An identifier, held as the bytes encoded by its (lower-case, hexadecimal) string form.
+    Identifiers compare and sort the same way as their string forms.
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw: bytes) -> None:
+        """
+        :param raw: The bytes of the identifier.
+        """
+        if not isinstance(raw, bytes) or not raw:
+            raise IllegalArgumentError(message="raw must be a non-empty bytes object.")
+        self._raw: bytes = raw
+
+    @staticmethod
+    def is_valid(identifier: Any, length: int = UUID_LENGTH) -> bool:
+        """
+        Returns True if the supplied identifier is a string of the supplied length composed
+        entirely of numbers (0-9) and lower-case letters in the range a-f; False otherwise. The
+        characters are checked all at once (see is_hex) rather than one at a time.
+
+        :param identifier: The string to be validated.
+        :param length: The length the identifier must have.
+        :return: True if the identifier is valid; False otherwise.
+        """
+        return (
+            isinstance(identifier, str)
+            and len(identifier) == length
+            and is_hex(text=identifier)
+        )
+
+    @classmethod
+    def from_hex(cls, identifier: str, length: int = UUID_LENGTH) -> "Identifier":
+        """
+        Returns the identifier represented by the supplied string, raising an
+        IllegalIdentifierError if it isn't valid (see is_valid.)
+        """
+        if length % 2 or not Identifier.is_valid(identifier=identifier, length=length):
+            raise IllegalIdentifierError()
+        return cls(raw=bytes.fromhex(identifier))
+
+    @classmethod
+    def random(cls) -> "Identifier":
+        """
+        Returns a new identifier from a random (version 4) UUID.
+        """
+        return cls(raw=uuid.uuid4().bytes)
+
+    def hex(self) -> str:
+        """
+        Returns the string form of this identifier.
+        """
+        return self._raw.hex()
+
+    def __bytes__(self) -> bytes:
+        return self._raw
+
+    def __len__(self) -> int:
+        """
+        Returns the length of the string form of this identifier.
+        """
+        return 2 * len(self._raw)
+
+    def __str__(self) -> str:
+        return self._raw.hex()
+
+    def __repr__(self) -> str:
+        return f"Identifier({self._raw.hex()!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Identifier):
+            return NotImplemented
+        return self._raw == other._raw
+
+    def __lt__(self, other: Any) -> bool:
+        if not isinstance(other, Identifier):
+            return NotImplemented
+        return self._raw < other._raw
+
+    def __hash__(self) -> int:
+        return hash(self._raw)
@@ -0,0 +1,224 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+from typing import Any, Final, Iterable, Iterator, List, Union
+
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
+from co.deability.identifier.values.Identifier import (
+    UUID_LENGTH,
+    Identifier,
+    is_hex,
+)
+
+"""
+A list of identifiers of the same length, packed end to end in a single bytearray. Each
+identifier takes only its bytes (16 for an identifier minted from a UUID) rather than a string
+object and a list slot, and whole arrays are validated, converted to and from strings, and minted
+with a handful of calls that each do their work in C.
+"""
+
+# The bits of each random identifier that random() keeps, and those it sets, so that the
+# identifier is a version 4, variant 1 UUID, as uuid.uuid4() would return
+_UUID_MASK: Final[int] = ~((0xF << 76) | (0x3 << 62)) & ((1 << 128) - 1)
+_UUID_BITS: Final[int] = (0x4 << 76) | (0x2 << 62)
+
+
+class IdentifierArray:
+    """
+    A mutable sequence of identifiers of the same length, stored as packed bytes.
+    """
+
+    __slots__ = ("_data", "_width")
+
+    def __init__(
+        self, data: Union[bytes, bytearray] = b"", length: int = UUID_LENGTH
+    ) -> None:
+        """
+        :param data: The bytes of the identifiers, end to end.
+        :param length: The length of the identifiers' string forms, which must be even.
+        """
+        if length < 2 or length % 2 or len(data) % (length // 2):
+            raise IllegalArgumentError(
+                message="length must be even, and data must hold whole identifiers."
+            )
+        self._data: bytearray = bytearray(data)
+        self._width: int = length // 2
+
+    @classmethod
+    def from_hex(
+        cls, identifiers: Iterable[str], length: int = UUID_LENGTH
+    ) -> "IdentifierArray":
+        """
+        Returns an array of the identifiers represented by the supplied strings, raising an
+        IllegalIdentifierError if any of them isn't valid (see Identifier.is_valid.) The strings
+        are validated and converted all at once.
+        """
+        identifiers = list(identifiers)
+        if not identifiers:
+            return cls(length=length)
+        # Each check runs over the whole list in C.
+        if (
+            length % 2
+            or set(map(type, identifiers)) != {str}
+            or set(map(len, identifiers)) != {length}
+        ):
+            raise IllegalIdentifierError()
+        joined: str = "".join(identifiers)
+        if not is_hex(text=joined):
+            raise IllegalIdentifierError()
+        return cls(data=bytes.fromhex(joined), length=length)
+
+    @classmethod
+    def random(cls, count: int, prefix: str = "") -> "IdentifierArray":
+        """
+        Returns an array of count new identifiers, each a random (version 4) UUID that begins with
+        the supplied prefix. The random bytes are drawn, and the fixed bits set, for the whole
+        array at once.
+
+        :param count: The number of identifiers to create.
+        :param prefix: The hexadecimal characters that every identifier begins with, which replace
+        the UUID's own.
+        :return: The new identifiers.
+        """
+        if count < 0 or len(prefix) > UUID_LENGTH or not is_hex(text=prefix):
+            raise IllegalArgumentError(
+                message="count must not be negative, and prefix must be hexadecimal."
+            )
+        if not count:
+            return cls()
+        width: int = UUID_LENGTH // 2
+        mask: int = _UUID_MASK
+        bits: int = _UUID_BITS
+        if prefix:
+            shift: int = 4 * (UUID_LENGTH - len(prefix))
+            mask &= (1 << shift) - 1
+            bits = (bits & ((1 << shift) - 1)) | (int(prefix, 16) << shift)
+        value: int = int.from_bytes(os.urandom(width * count), "big")
+        masks: int = int.from_bytes(mask.to_bytes(width, "big") * count, "big")
+        fixed: int = int.from_bytes(bits.to_bytes(width, "big") * count, "big")
+        return cls(data=((value & masks) | fixed).to_bytes(width * count, "big"))
+
+    @property
+    def length(self) -> int:
+        """
+        Returns the length of the string form of each identifier in this array.
+        """
+        return 2 * self._width
+
+    def hexes(self) -> List[str]:
+        """
+        Returns the string forms of the identifiers in this array, in order.
+        """
+        text: str = self._data.hex()
+        step: int = 2 * self._width
+        return [text[start : start + step] for start in range(0, len(text), step)]
+
+    def append(self, identifier: Identifier) -> None:
+        raw: bytes = bytes(identifier)
+        if len(raw) != self._width:
+            raise IllegalArgumentError(
+                message="The identifier is not the same length as those in the array."
+            )
+        self._data += raw
+
+    def extend(
+        self, identifiers: Union["IdentifierArray", Iterable[Identifier]]
+    ) -> None:
+        if isinstance(identifiers, IdentifierArray):
+            if identifiers._width != self._width:
+                raise IllegalArgumentError(
+                    message="The arrays hold identifiers of different lengths."
+                )
+            self._data += identifiers._data
+            return
+        for identifier in identifiers:
+            self.append(identifier=identifier)
+
+    def pop(self) -> Identifier:
+        """
+        Removes and returns the last identifier in this array.
+        """
+        if not self._data:
+            raise IndexError("pop from an empty IdentifierArray")
+        raw: bytes = bytes(self._data[-self._width :])
+        del self._data[-self._width :]
+        return Identifier(raw=raw)
+
+    def sorted(self) -> "IdentifierArray":
+        """
+        Returns a copy of this array with its identifiers in sorted order.
+        """
+        return IdentifierArray(
+            data=b"".join(sorted(self._records())), length=self.length
+        )
+
+    def _records(self) -> List[bytes]:
+        data: bytes = bytes(self._data)
+        return [
+            data[start : start + self._width]
+            for start in range(0, len(data), self._width)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._data) // self._width
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Identifier, "IdentifierArray"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return IdentifierArray(
+                    data=self._data[start * self._width : stop * self._width],
+                    length=self.length,
+                )
+            records: List[bytes] = self._records()
+            return IdentifierArray(
+                data=b"".join(records[start:stop:step]), length=self.length
+            )
+        count: int = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("IdentifierArray index out of range")
+        return Identifier(
+            raw=bytes(self._data[index * self._width : (index + 1) * self._width])
+        )
+
+    def __iter__(self) -> Iterator[Identifier]:
+        return (Identifier(raw=record) for record in self._records())
+
+    def __contains__(self, identifier: Any) -> bool:
+        if not isinstance(identifier, Identifier) or len(identifier) != self.length:
+            return False
+        raw: bytes = bytes(identifier)
+        start: int = self._data.find(raw)
+        # Only a match that starts on an identifier's boundary counts.
+        while start != -1 and start % self._width:
+            start = self._data.find(raw, start + 1)
+        return start != -1
+
+    def __bytes__(self) -> bytes:
+        return bytes(self._data)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, IdentifierArray):
+            return NotImplemented
+        return self._width == other._width and self._data == other._data
+
+    def __repr__(self) -> str:
+        return f"IdentifierArray({self.hexes()!r})"
@@ -0,0 +1,154 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+from co.deability.identifier import config
+from co.deability.identifier.api.app import app
+from co.deability.identifier.api.asgi import AsgiAdapter
+
+ADAPTER: AsgiAdapter = AsgiAdapter(wsgi_app=app, threads=4)
+
+
+def _request(
+    method: str, path: str, body: bytes = b"", query: bytes = b""
+) -> Tuple[int, Dict[bytes, bytes], bytes, List[Dict[str, Any]]]:
+    scope: Dict[str, Any] = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"content-type", b"application/json"), (b"host", b"localhost")],
+        "server": ("localhost", 8000),
+        "client": ("127.0.0.1", 50000),
+    }
+    # The body arrives in two parts, as it might from a real server
+    incoming: List[Dict[str, Any]] = [
+        {"type": "http.request", "body": body[:1], "more_body": True},
+        {"type": "http.request", "body": body[1:], "more_body": False},
+    ]
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return incoming.pop(0)
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    asyncio.run(ADAPTER(scope, receive, send))
+    start: Optional[Dict[str, Any]] = sent[0]
+    assert start["type"] == "http.response.start"
+    assert not sent[-1]["more_body"]
+    content: bytes = b"".join(message["body"] for message in sent[1:])
+    return start["status"], dict(start["headers"]), content, sent
+
+
+def test_serves_id_routes():
+    status, headers, content, _ = _request(method="GET", path="/identifier/new")
+    assert status == HTTPStatus.CREATED
+    assert headers[b"content-type"] == b"application/json"
+    created = json.loads(content)["created"]
+    status, _, content, _ = _request(method="GET", path=f"/identifier/exists/{created}")
+    assert status == HTTPStatus.OK
+    assert json.loads(content) == {f"{created} exists": True}
+
+
+def test_serves_entity_routes_with_body():
+    status, _, content, _ = _request(
+        method="POST",
+        path="/identifier/entity/add/foobar",
+        body=json.dumps({"foo": "bar"}).encode(),
+    )
+    assert status == HTTPStatus.CREATED
+    created = json.loads(content)["created"]
+    status, _, content, _ = _request(
+        method="GET", path=f"/identifier/entity/read/{created}"
+    )
+    assert status == HTTPStatus.OK
+    assert json.loads(content) == {"foo": "bar"}
+
+
+def test_serves_errors():
+    status, _, _, _ = _request(method="GET", path="/identifier/nowhere")
+    assert status == HTTPStatus.NOT_FOUND
+
+
+def test_streams_responses(monkeypatch):
+    monkeypatch.setattr(config, "EXPORT_ENABLED", True)
+    _request(method="GET", path="/identifier/new")
+    status, headers, content, sent = _request(
+        method="GET", path="/identifier/export", query=b"format=ndjson"
+    )
+    assert status == HTTPStatus.OK
+    assert b"content-length" not in headers
+    assert json.loads(content.splitlines()[0])["export"]
+
+
+def test_lifespan():
+    incoming: List[Dict[str, Any]] = [
+        {"type": "lifespan.startup"},
+        {"type": "lifespan.shutdown"},
+    ]
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return incoming.pop(0)
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    adapter: AsgiAdapter = AsgiAdapter(wsgi_app=app, threads=1)
+    asyncio.run(adapter({"type": "lifespan"}, receive, send))
+    assert [message["type"] for message in sent] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
+
+
+def test_supports_the_write_callable():
+    def wsgi_app(environ, start_response):
+        write = start_response("200 OK", [("Content-Type", "text/plain")])
+        write(b"written, ")
+        return [b"returned"]
+
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    adapter: AsgiAdapter = AsgiAdapter(wsgi_app=wsgi_app, threads=1)
+    scope: Dict[str, Any] = {"type": "http", "method": "GET", "path": "/"}
+    asyncio.run(adapter(scope, receive, send))
+    assert sent[0]["status"] == HTTPStatus.OK
+    assert b"".join(message["body"] for message in sent[1:]) == b"written, returned"
+
+
+def test_refuses_websockets():
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "websocket.connect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    asyncio.run(ADAPTER({"type": "websocket", "path": "/"}, receive, send))
+    assert [message["type"] for message in sent] == ["websocket.close"]
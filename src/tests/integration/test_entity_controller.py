@@ -101,6 +101,25 @@ def test_get_entity():
         assert response.status_code == HTTPStatus.OK
 
 
+def test_get_entities():
+    entity_id = _add_entity()
+    other_id = _add_entity(entity={"fizzbuzz": "other"})
+    missing_id = "0" * 32
+    with app.test_client() as client:
+        endpoint = f"{ROOT_DIR}/read/batch"
+        body = [entity_id, missing_id, other_id, entity_id]
+        response = client.post(endpoint, headers=ACCEPT_JSON_HEADERS, json=body)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json == {
+            entity_id: ENTITY,
+            missing_id: None,
+            other_id: {"fizzbuzz": "other"},
+        }
+        for bad_body in ([entity_id, "foobar"], [], [entity_id] * 101):
+            response = client.post(endpoint, headers=ACCEPT_JSON_HEADERS, json=bad_body)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 def test_remove_entity(setup_entity_repository):
     entity_id = _add_entity()
     with app.test_client() as client:
@@ -254,3 +273,73 @@ def test_get_all_entities_by_type_works(setup_entity_repository, http_client):
         assert response.json.get(entity_id) == ENTITY
         assert response.json.get(second_entity_id) == SECOND_ENTITY
         assert len(response.json) == 2
+
+
+def test_stream_entities_as_ndjson(setup_entity_repository):
+    entity_id = _add_entity()
+    _add_search_terms(identifier=entity_id)
+    another_id = _add_entity(entity=SECOND_ENTITY)
+    _add_search_terms(identifier=another_id)
+    with app.test_client() as client:
+        endpoint = f"{ROOT_DIR}/search"
+        response = client.get(
+            endpoint,
+            headers={"Accept": "application/x-ndjson"} | JSON_CONTENT_HEADERS,
+            data=json.dumps(SEARCH_TERMS),
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert {entity_id: ENTITY} in lines and {another_id: SECOND_ENTITY} in lines
+        assert len(lines) == 2
+        endpoint = f"{ROOT_DIR}/read/all/foobar"
+        response = client.get(endpoint, headers={"Accept": "application/x-ndjson"})
+        assert len(response.text.splitlines()) == 2
+
+
+def test_search_with_combined_terms(setup_entity_repository):
+    entity_id = _add_entity()
+    _add_search_terms(identifier=entity_id)
+    _add_entity(entity=SECOND_ENTITY)
+    with app.test_client() as client:
+        endpoint = f"{ROOT_DIR}/search"
+        query = {"$and": [SEARCH_TERMS, {"entity type": "foobar"}]}
+        response = client.get(
+            endpoint,
+            headers=ACCEPT_JSON_HEADERS | JSON_CONTENT_HEADERS,
+            data=json.dumps(query),
+        )
+        assert response.json == {entity_id: ENTITY}
+        response = client.get(
+            f"{endpoint}/ids",
+            headers=ACCEPT_JSON_HEADERS | JSON_CONTENT_HEADERS,
+            data=json.dumps({"$not": SEARCH_TERMS}),
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_add_entities_in_bulk(setup_entity_repository):
+    with app.test_client() as client:
+        endpoint = f"{ROOT_DIR}/add/bulk/foobar"
+        response = client.post(
+            endpoint,
+            headers=ACCEPT_JSON_HEADERS | JSON_CONTENT_HEADERS,
+            data=json.dumps([ENTITY, SECOND_ENTITY, ENTITY]),
+        )
+        assert response.status_code == HTTPStatus.OK
+        first_id = response.json[0]["created"]
+        assert response.json[2] == {"exists": first_id}
+        response = client.post(
+            endpoint,
+            headers=ACCEPT_JSON_HEADERS | {"Content-Type": "application/x-ndjson"},
+            data=f"{json.dumps(ENTITY)}\n{{not json\n",
+        )
+        assert response.json[0] == {"exists": first_id}
+        assert "invalid" in response.json[1]
+        response = client.post(
+            endpoint,
+            headers=ACCEPT_JSON_HEADERS | JSON_CONTENT_HEADERS,
+            data=json.dumps(ENTITY),
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert _get_entity(identifier=first_id) == ENTITY
@@ -13,8 +13,12 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import json
+from http import HTTPStatus
 from typing import Final
 
+from co.deability.identifier import config
+
 from co.deability.identifier.api.app import app
 from conftest import ACCEPT_JSON_HEADERS
 
@@ -41,6 +45,18 @@ def test_create_id():
     assert len(random_id) == 32
 
 
+def test_create_ids():
+    with app.test_client() as client:
+        endpoint = f"{ROOT_DIR}/new/batch"
+        response = client.post(endpoint, headers=ACCEPT_JSON_HEADERS, json={"count": 5})
+        assert response.status_code == 201
+        assert len(set(response.json.get("created"))) == 5
+        response = client.post(f"{endpoint}?count=2", headers=ACCEPT_JSON_HEADERS)
+        assert len(response.json.get("created")) == 2
+        response = client.post(endpoint, headers=ACCEPT_JSON_HEADERS, json={"count": 0})
+        assert response.status_code == 400
+
+
 def test_check_id_exists():
     with app.test_client() as client:
         random_id = _create_id()
@@ -49,6 +65,26 @@ def test_check_id_exists():
         assert response.json.get(f"{random_id} exists") is True
 
 
+def test_check_ids_exist():
+    with app.test_client() as client:
+        random_id = _create_id()
+        missing_id = "0" * 32
+        endpoint = f"{ROOT_DIR}/exists/batch"
+        body = [missing_id, random_id]
+        response = client.post(endpoint, headers=ACCEPT_JSON_HEADERS, json=body)
+        assert response.status_code == 200
+        assert response.json.get("exists") == {missing_id: False, random_id: True}
+        response = client.post(
+            f"{endpoint}?format=bitmap",
+            headers=ACCEPT_JSON_HEADERS,
+            json={"identifiers": body * 5},
+        )
+        assert response.json == {"exists": "VUA=", "count": 10}
+        for bad_body in ([random_id, "foobar"], [], {"identifiers": random_id}):
+            response = client.post(endpoint, headers=ACCEPT_JSON_HEADERS, json=bad_body)
+            assert response.status_code == 400
+
+
 def test_add_data():
     with app.test_client() as client:
         random_id = _create_id()
@@ -70,6 +106,31 @@ def test_get_current_data():
         assert str(response.json).find(str(body)) >= 0
 
 
+def test_get_current_data_batch():
+    with app.test_client() as client:
+        random_id = _create_id()
+        empty_id = _create_id()
+        missing_id = "0" * 32
+        body = {"foo": "bar"}
+        client.post(
+            f"{ROOT_DIR}/data/add/{random_id}", headers=ACCEPT_JSON_HEADERS, json=body
+        )
+        endpoint = f"{ROOT_DIR}/data/current/batch"
+        response = client.post(
+            endpoint,
+            headers=ACCEPT_JSON_HEADERS,
+            json={"identifiers": [random_id, empty_id, missing_id]},
+        )
+        assert response.status_code == 200
+        assert list(response.json.get(random_id).values()) == [body]
+        assert response.json.get(empty_id) == {}
+        assert response.json.get(missing_id, "absent") is None
+        response = client.post(
+            endpoint, headers=ACCEPT_JSON_HEADERS, json=[random_id[1:]]
+        )
+        assert response.status_code == 400
+
+
 def test_get_all_data():
     with app.test_client() as client:
         endpoint = f"{ROOT_DIR}/new"
@@ -84,3 +145,38 @@ def test_get_all_data():
         output = str(response.json)
         assert output.find(str(body_one)) >= 0
         assert output.find(str(body_two)) >= 0
+
+
+def test_get_data_pages():
+    with app.test_client() as client:
+        random_id = _create_id()
+        endpoint = f"{ROOT_DIR}/data/add/{random_id}"
+        for version in range(3):
+            client.post(endpoint, headers=ACCEPT_JSON_HEADERS, json={"v": version})
+        endpoint = f"{ROOT_DIR}/data/all/{random_id}"
+        response = client.get(f"{endpoint}?limit=2", headers=ACCEPT_JSON_HEADERS)
+        assert len(response.json.get(random_id)) == 2
+        cursor = response.json.get("next cursor")
+        response = client.get(
+            f"{endpoint}?limit=2&cursor={cursor}", headers=ACCEPT_JSON_HEADERS
+        )
+        assert list(response.json.get(random_id).values()) == [{"v": 0}]
+        assert "next cursor" not in response.json
+        response = client.get(f"{endpoint}?limit=none", headers=ACCEPT_JSON_HEADERS)
+        assert response.status_code == 400
+
+
+def test_export(monkeypatch):
+    created_id = _create_id()
+    with app.test_client() as client:
+        endpoint = f"{ROOT_DIR}/export"
+        assert client.get(endpoint).status_code == HTTPStatus.NOT_FOUND
+        monkeypatch.setattr(config, "EXPORT_ENABLED", True)
+        response = client.get(endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assert response.mimetype == "application/x-ndjson"
+        records = [json.loads(line) for line in response.data.splitlines()]
+        assert {"identifier": created_id} in records
+        assert client.get(f"{endpoint}?format=zip").status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
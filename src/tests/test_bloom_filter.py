@@ -0,0 +1,63 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import uuid
+from pathlib import Path
+
+from co.deability.identifier import config
+from co.deability.identifier.api import repositories
+from co.deability.identifier.api.repositories.bloom_filter import (
+    BLOOM_FILE,
+    BloomFilter,
+)
+from conftest import test_path
+
+AN_ID: str = "c963ef49afa5483bb1326e9525727140"
+BLOOM_PATH: Path = Path(test_path, BLOOM_FILE)
+
+
+def _open(rebuild=lambda: []) -> BloomFilter:
+    return BloomFilter(path=BLOOM_PATH, rebuild=rebuild, capacity=1000, error_rate=0.01)
+
+
+def test_builds_from_existing_identifiers():
+    bloom_filter = _open(rebuild=lambda: [AN_ID])
+    assert BLOOM_PATH.exists()
+    assert bloom_filter.might_contain(identifier=AN_ID)
+    misses = [
+        bloom_filter.might_contain(identifier=uuid.uuid4().hex) for _ in range(100)
+    ]
+    assert misses.count(True) < 10
+
+
+def test_additions_are_shared_through_the_snapshot():
+    writer = _open()
+    reader = _open(rebuild=lambda: [AN_ID])  # not rebuilt; the snapshot exists
+    assert not reader.might_contain(identifier=AN_ID)
+    writer.add(identifier=AN_ID)
+    assert reader.might_contain(identifier=AN_ID)
+
+
+def test_identifier_exists_consults_filter(monkeypatch):
+    monkeypatch.setattr(config, "BLOOM_FILTER", True)
+    monkeypatch.setattr(BloomFilter, "_filters", {})
+    assert not repositories.identifier_exists(identifier=AN_ID)
+    repositories.create_identifier_path(identifier=AN_ID)
+    assert repositories.get_bloom_filter().might_contain(identifier=AN_ID)
+    assert repositories.identifier_exists(identifier=AN_ID)
+    # An identifier the filter hasn't seen is reported missing without checking the disk.
+    other_id = "0123456789abcdef0123456789abcdef"
+    repositories.calculate_path(identifier=other_id).mkdir(parents=True)
+    assert not repositories.identifier_exists(identifier=other_id)
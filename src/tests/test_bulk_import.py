@@ -0,0 +1,70 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import json
+from pathlib import Path
+
+from conftest import test_path
+
+from co.deability.identifier.api.repositories import entities
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+from co.deability.identifier.tools.bulk_import import import_entities
+
+SCHEMA = {
+    "type": "object",
+    "required": ["name"],
+    "properties": {
+        "name": {"type": "string"},
+        "city": {"type": "string", "x-index": True},
+    },
+}
+
+
+def _write(path: Path, *lines: str) -> None:
+    with open(path, "a") as file:
+        file.writelines(f"{line}\n" for line in lines)
+
+
+def test_imports_entities_and_resumes(setup_entity_repository):
+    entity_repository.add_schema(schema=SCHEMA, name="place")
+    path = Path(test_path, "places.ndjson")
+    places = [{"name": f"Place {number}", "city": "Denver"} for number in range(25)]
+    _write(path, *map(json.dumps, places[:20]))
+    _write(path, json.dumps(places[0]), "{not json", json.dumps({"city": "Denver"}), "")
+    progress = import_entities(path=path, entity_type="place", workers=2, chunk_size=3)
+    assert progress["lines"] == 24
+    assert (progress["created"], progress["existing"], progress["invalid"]) == (
+        20,
+        1,
+        2,
+    )
+    _write(path, *map(json.dumps, places[20:]))
+    progress = import_entities(path=path, entity_type="place", workers=2, chunk_size=3)
+    assert progress["lines"] == 29
+    assert progress["created"] == 25
+    identifiers = sorted(
+        entities.calculate_id_from_data(data=place) for place in places
+    )
+    assert (
+        sorted(index_repository.find_entity_ids(index={"entity type": "place"}))
+        == identifiers
+    )
+    assert sorted(index_repository.find_entity_ids(index={"city": "Denver"})) == (
+        identifiers
+    )
+    assert entity_repository.read_entity(identifier=identifiers[0]) in places
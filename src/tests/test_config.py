@@ -73,3 +73,13 @@ def test_good_encoding():
     os.environ[ITE] = "ascii"
     reload(config)
     assert config.TEXT_ENCODING == "ascii"
+
+
+def test_postings_need_an_even_identifier_length(monkeypatch):
+    monkeypatch.setenv("IDENTIFIER_INDEX_FORMAT", "postings")
+    monkeypatch.setenv("IDENTIFIER_ID_LENGTH", "33")
+    with pytest.raises(SystemExit) as wrapped_error:
+        reload(config)
+    wrapped_error.match("IDENTIFIER_ID_LENGTH")
+    monkeypatch.undo()
+    reload(config)
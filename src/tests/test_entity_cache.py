@@ -0,0 +1,83 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import multiprocessing
+from pathlib import Path
+
+from co.deability.identifier.api.repositories.entities import entity_cache
+from co.deability.identifier.api.repositories.entities.entity_cache import EntityCache
+from conftest import test_path
+
+CACHE_PATH: Path = Path(test_path, entity_cache.CACHE_FILE)
+ROOT: str = "c963ef49afa5483bb1326e9525727140"
+OTHER_ROOT: str = "0123456789abcdef0123456789abcdef"
+
+
+def _put_in_other_process(identifier: str, content: bytes) -> None:
+    cache = EntityCache(path=CACHE_PATH, size=64 * 1024)
+    cache.put(
+        identifier=identifier, root=ROOT, epoch=cache.epoch(root=ROOT), content=content
+    )
+
+
+def test_caches_entities_until_lineage_changes():
+    cache = EntityCache(path=CACHE_PATH, size=64 * 1024)
+    assert cache.get(identifier=ROOT) is None
+    cache.put(identifier=ROOT, root=ROOT, epoch=cache.epoch(root=ROOT), content=b"{}")
+    cache.put(
+        identifier=OTHER_ROOT,
+        root=OTHER_ROOT,
+        epoch=cache.epoch(root=OTHER_ROOT),
+        content=b"[]",
+    )
+    assert cache.get(identifier=ROOT) == b"{}"
+    cache.invalidate(root=ROOT)
+    assert cache.get(identifier=ROOT) is None
+    assert cache.get(identifier=OTHER_ROOT) == b"[]"
+
+
+def test_entries_read_before_a_change_are_never_valid():
+    cache = EntityCache(path=CACHE_PATH, size=64 * 1024)
+    epoch = cache.epoch(root=ROOT)
+    cache.invalidate(root=ROOT)
+    cache.put(identifier=ROOT, root=ROOT, epoch=epoch, content=b"{}")
+    assert cache.get(identifier=ROOT) is None
+
+
+def test_evicts_least_recently_used_and_skips_oversized_entries():
+    cache = EntityCache(path=CACHE_PATH, size=0)
+    assert cache.slot_count == entity_cache.BUCKET_WAYS
+    identifiers = [f"{number:032x}" for number in range(cache.slot_count + 1)]
+    for identifier in identifiers:
+        cache.put(identifier=identifier, root=ROOT, epoch=0, content=b"1")
+        cache.get(identifier=identifiers[0])
+    assert cache.get(identifier=identifiers[0]) == b"1"
+    assert cache.get(identifier=identifiers[1]) is None
+    assert cache.get(identifier=identifiers[-1]) == b"1"
+    cache.put(
+        identifier=ROOT, root=ROOT, epoch=0, content=b"x" * entity_cache.SLOT_SIZE
+    )
+    assert cache.get(identifier=ROOT) is None
+
+
+def test_is_shared_between_processes():
+    cache = EntityCache(path=CACHE_PATH, size=64 * 1024)
+    process = multiprocessing.get_context("fork").Process(
+        target=_put_in_other_process, args=(ROOT, b'{"foo": "bar"}')
+    )
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert cache.get(identifier=ROOT) == b'{"foo": "bar"}'
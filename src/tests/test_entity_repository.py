@@ -18,9 +18,14 @@ import json
 import pytest
 from co.deability.identifier.services import validator_service
 
+from co.deability.identifier import config
 from co.deability.identifier.api import repositories
 from co.deability.identifier.api.repositories import entities
-from co.deability.identifier.api.repositories.entities import entity_repository
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+from co.deability.identifier.api.repositories.entities.entity_cache import EntityCache
 from co.deability.identifier.errors.NoSuchEntityError import NoSuchEntityError
 
 
@@ -109,6 +114,41 @@ def test_updates_entity_to_old_value_correctly_with_many_changes():
     assert entity_repository.read_entity(identifier=final_identifier) == second_entity
 
 
+def test_resolves_latest_version_after_many_updates(setup_entity_repository):
+    first_identifier = entity_repository.create_entity(entity={"version": 0})
+    index_repository.create_index(identifier=first_identifier, index={"kind": "test"})
+    identifier = first_identifier
+    for version in range(1, 60):
+        identifier = entity_repository.update_entity(
+            identifier=identifier, entity={"version": version}
+        )
+    assert (
+        entity_repository.latest_identifier(identifier=first_identifier) == identifier
+    )
+    assert entity_repository.read_entity(identifier=first_identifier) == {"version": 59}
+    assert index_repository.find_entities(index={"kind": "test"}) == {
+        identifier: {"version": 59}
+    }
+
+
+def test_joins_lineage_of_entity_with_same_content():
+    first_identifier = entity_repository.create_entity(entity={"foo": "bar"})
+    other_identifier = entity_repository.create_entity(entity={"fizz": "buzz"})
+    joined_identifier = entity_repository.update_entity(
+        identifier=first_identifier, entity={"fizz": "buzz"}
+    )
+    assert joined_identifier == other_identifier
+    final_identifier = entity_repository.update_entity(
+        identifier=other_identifier, entity={"silly": "walks"}
+    )
+    assert entity_repository.latest_identifier(identifier=first_identifier) == (
+        final_identifier
+    )
+    assert entity_repository.read_entity(identifier=first_identifier) == {
+        "silly": "walks"
+    }
+
+
 def test_does_not_update_missing_entity():
     entity = {"foo": "bar"}
     identifier = entities.calculate_id_from_data(data=entity)
@@ -129,6 +169,26 @@ def test_deletes_entity(setup_entity_repository):
     assert json.loads(data_path.read_text()) == expected
 
 
+def test_serves_cached_entities_until_changed(setup_entity_repository, monkeypatch):
+    monkeypatch.setattr(config, "ENTITY_CACHE_SIZE", 1024 * 1024)
+    monkeypatch.setattr(EntityCache, "_caches", {})
+    identifier = entity_repository.create_entity(entity={"foo": "bar"})
+    assert entity_repository.read_entity(identifier=identifier) == {"foo": "bar"}
+    assert entity_repository.read_entity(identifier=identifier) == {"foo": "bar"}
+    cache = entity_repository.get_entity_cache()
+    assert cache.hits == 1
+    updated_identifier = entity_repository.update_entity(
+        identifier=identifier, entity={"fizz": "buzz"}
+    )
+    assert entity_repository.read_entity(identifier=identifier) == {"fizz": "buzz"}
+    assert entity_repository.read_entity(identifier=updated_identifier) == {
+        "fizz": "buzz"
+    }
+    entity_repository.delete_entity(identifier=updated_identifier)
+    assert entity_repository.read_entity(identifier=identifier) is None
+    assert entity_repository.read_entity(identifier=updated_identifier) is None
+
+
 def test_adds_and_removes_schema(setup_entity_repository):
     name = "a_schema"
     schema = {"type": "object", "properties": {"fizzbuzz": {"type": "string"}}}
@@ -0,0 +1,102 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+from co.deability.identifier.api.services import entity_service
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "city": {"type": "string", "x-index": True},
+    },
+}
+
+
+def test_indexes_schema_fields_automatically(setup_entity_repository):
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    created = entity_service.add_entity(
+        entity={"name": "Ann", "city": "Denver"}, entity_type="person"
+    )["created"]
+    assert index_repository.find_entity_ids(index={"city": "Denver"}) == [created]
+    assert (
+        entity_repository.read_metadata(identifier=created)["entity type"] == "person"
+    )
+    renamed = entity_service.update_entity(
+        identifier=created, entity={"name": "Ann B", "city": "Denver"}
+    )["updated"]
+    assert index_repository.find_entity_ids(index={"city": "Denver"}) == [renamed]
+    moved = entity_service.update_entity(
+        identifier=renamed, entity={"name": "Ann B", "city": "Boulder"}
+    )["updated"]
+    assert index_repository.find_entity_ids(index={"city": "Denver"}) == []
+    assert index_repository.find_entity_ids(index={"city": "Boulder"}) == [moved]
+
+
+def test_adds_entities_in_bulk(setup_entity_repository):
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    existing = entity_service.add_entity(entity={"name": "Ann"}, entity_type="person")
+    results = entity_service.add_entities(
+        batch=[
+            {"name": "Bob", "city": "Denver"},
+            {"name": "Ann"},
+            {"name": 1},
+            {"name": "Bob", "city": "Denver"},
+            [],
+            {"name": "Cat", "city": "Denver"},
+        ],
+        entity_type="person",
+    )
+    bob, cat = results[0].get("created"), results[5].get("created")
+    assert bob and cat
+    assert results[1] == {"exists": existing["created"]}
+    assert "invalid" in results[2] and "invalid" in results[4]
+    assert results[3] == {"exists": bob}
+    assert sorted(
+        index_repository.find_entity_ids(index={"entity type": "person"})
+    ) == sorted([existing["created"], bob, cat])
+    assert sorted(index_repository.find_entity_ids(index={"city": "Denver"})) == sorted(
+        [bob, cat]
+    )
+
+
+def test_keeps_index_entries_when_an_update_joins_another_lineage(
+    setup_entity_repository,
+):
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    ann = entity_service.add_entity(
+        entity={"name": "Ann", "city": "Denver"}, entity_type="person"
+    )["created"]
+    bob = entity_service.add_entity(
+        entity={"name": "Bob", "city": "Boulder"}, entity_type="person"
+    )["created"]
+    # Bob's Boulder entry stays under his first version's identifier
+    bob = entity_service.update_entity(
+        identifier=bob, entity={"name": "Bob B", "city": "Boulder"}
+    )["updated"]
+    joined = entity_service.update_entity(
+        identifier=ann, entity={"name": "Bob B", "city": "Boulder"}
+    )["updated"]
+    assert joined == bob
+    assert index_repository.find_entity_ids(index={"city": "Denver"}) == []
+    assert index_repository.find_entity_ids(index={"city": "Boulder"}) == [bob]
+    moved = entity_service.update_entity(
+        identifier=ann, entity={"name": "Bob B", "city": "Aspen"}
+    )["updated"]
+    assert index_repository.find_entity_ids(index={"city": "Boulder"}) == []
+    assert index_repository.find_entity_ids(index={"city": "Aspen"}) == [moved]
@@ -0,0 +1,195 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import io
+import json
+import os
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier.api.services import export_service
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.services import layout_service
+from conftest import test_path
+
+FIRST_ID: str = "c963ef49afa5483bb1326e9525727140"
+SECOND_ID: str = "0123456789abcdef0123456789abcdef"
+EMPTY_ID: str = "fedcba9876543210fedcba9876543210"
+SOURCE: Path = Path(test_path, "source")
+TARGET: Path = Path(test_path, "target")
+BINARY: bytes = bytes(range(256)) * 8
+
+
+def _source_tree() -> None:
+    first_dir = layout_service.identifier_path(SOURCE, FIRST_ID, shard_widths=())
+    second_dir = layout_service.identifier_path(SOURCE, SECOND_ID, shard_widths=())
+    first_dir.mkdir(parents=True)
+    second_dir.mkdir(parents=True)
+    layout_service.identifier_path(SOURCE, EMPTY_ID, shard_widths=()).mkdir(
+        parents=True
+    )
+    Path(first_dir, "1_data.json").write_text(json.dumps({"foo": "bar"}))
+    os.symlink("1_data.json", Path(first_dir, "current"))
+    os.symlink(Path(first_dir, "1_data.json"), Path(second_dir, "2.json"))
+    Path(second_dir, "postings.bin").write_bytes(BINARY)
+    Path(SOURCE, "deleted_entity.json").write_text("{}")
+    os.symlink(Path(SOURCE, "deleted_entity.json"), Path(first_dir, "3.json"))
+    Path(SOURCE, "schema").mkdir()
+    Path(SOURCE, "schema", "person.json").write_text('{"type": "object"}')
+    Path(SOURCE, ".identifiers.bloom").write_bytes(b"not exported")
+    Path(SOURCE, "schema", "stale.tmp").write_text("not exported")
+
+
+def _export(export_format: str) -> bytes:
+    return b"".join(
+        export_service.export(
+            base_path=SOURCE, export_format=export_format, shard_widths=()
+        )
+    )
+
+
+def _assert_restored(first_dir: Path, second_dir: Path) -> None:
+    assert json.loads(Path(first_dir, "1_data.json").read_text()) == {"foo": "bar"}
+    assert os.readlink(Path(first_dir, "current")) == "1_data.json"
+    assert Path(second_dir, "2.json").readlink() == Path(first_dir, "1_data.json")
+    assert Path(first_dir, "3.json").readlink() == Path(TARGET, "deleted_entity.json")
+    assert Path(second_dir, "postings.bin").read_bytes() == BINARY
+    assert Path(TARGET, "schema", "person.json").read_text() == '{"type": "object"}'
+    assert not Path(TARGET, ".identifiers.bloom").exists()
+    assert not Path(TARGET, "schema", "stale.tmp").exists()
+    assert not Path(TARGET, export_service.LINKS_FILE).exists()
+
+
+def test_ndjson_export_restores_into_another_layout():
+    _source_tree()
+    exported = _export(export_format="ndjson")
+    records = [json.loads(line) for line in exported.splitlines()]
+    assert records[0]["export"] == export_service.EXPORT_VERSION
+    assert {"identifier": EMPTY_ID} in records
+    restored = export_service.restore(
+        source=io.BytesIO(exported), target=TARGET, shard_widths=(2, 2)
+    )
+    assert restored == 3
+    _assert_restored(
+        first_dir=Path(TARGET, "c9/63/ef49afa5483bb1326e9525727140"),
+        second_dir=Path(TARGET, "01/23/456789abcdef0123456789abcdef"),
+    )
+    assert Path(TARGET, "fe/dc/ba9876543210fedcba9876543210").is_dir()
+
+
+def test_tar_export_restores_into_same_layout():
+    _source_tree()
+    restored = export_service.restore(
+        source=io.BytesIO(_export(export_format="tar")), target=TARGET, shard_widths=()
+    )
+    assert restored == 3
+    _assert_restored(
+        first_dir=layout_service.identifier_path(TARGET, FIRST_ID, shard_widths=()),
+        second_dir=layout_service.identifier_path(TARGET, SECOND_ID, shard_widths=()),
+    )
+
+
+def test_tar_export_refuses_other_layout():
+    _source_tree()
+    with pytest.raises(IllegalArgumentError):
+        export_service.restore(
+            source=io.BytesIO(_export(export_format="tar")),
+            target=TARGET,
+            shard_widths=(2, 2),
+        )
+
+
+def test_large_files_are_exported_in_chunks(monkeypatch):
+    monkeypatch.setattr(export_service, "CHUNK_SIZE", 100)
+    _source_tree()
+    exported = _export(export_format="ndjson")
+    chunks = [
+        record
+        for record in map(json.loads, exported.splitlines())
+        if record.get("name") == "postings.bin"
+    ]
+    assert len(chunks) == len(BINARY) // 100 + 1
+    export_service.restore(source=io.BytesIO(exported), target=TARGET)
+    assert (
+        Path(
+            layout_service.identifier_path(TARGET, SECOND_ID), "postings.bin"
+        ).read_bytes()
+        == BINARY
+    )
+
+
+def test_restore_refuses_non_empty_target():
+    _source_tree()
+    TARGET.mkdir(parents=True)
+    Path(TARGET, "something").write_text("")
+    with pytest.raises(IllegalArgumentError):
+        export_service.restore(
+            source=io.BytesIO(_export(export_format="ndjson")), target=TARGET
+        )
+
+
+def test_restore_replaces_the_deleted_entity_placeholder():
+    _source_tree()
+    TARGET.mkdir(parents=True)
+    Path(TARGET, "schema").mkdir()
+    Path(TARGET, "deleted_entity.json").write_text("{}")
+    restored = export_service.restore(
+        source=io.BytesIO(_export(export_format="ndjson")), target=TARGET
+    )
+    assert restored == 3
+    assert Path(TARGET, "deleted_entity.json").read_text() == "{}"
+
+
+def test_restore_refuses_paths_outside_target():
+    exported = b'{"path": "../escaped", "text": ""}\n'
+    with pytest.raises(IllegalArgumentError):
+        export_service.restore(source=io.BytesIO(exported), target=TARGET)
+    assert not Path(test_path, "escaped").exists()
+
+
+def test_ndjson_restore_never_writes_through_links():
+    outside = Path(test_path, "outside")
+    outside.mkdir(parents=True)
+    exported = (
+        json.dumps({"path": "x", "link": {"target": str(outside)}})
+        + "\n"
+        + json.dumps({"path": "x/escaped", "text": "hello"})
+        + "\n"
+    ).encode("utf-8")
+    with pytest.raises(IllegalArgumentError):
+        export_service.restore(source=io.BytesIO(exported), target=TARGET)
+    assert not Path(outside, "escaped").exists()
+    assert not Path(TARGET, export_service.LINKS_FILE).exists()
+
+
+def test_tar_restore_never_writes_through_links():
+    outside = Path(test_path, "outside")
+    outside.mkdir(parents=True)
+    exported = io.BytesIO()
+    with tarfile.open(fileobj=exported, mode="w") as archive:
+        link = tarfile.TarInfo(name="x")
+        link.type = tarfile.SYMTYPE
+        link.linkname = str(outside)
+        archive.addfile(link)
+        escaped = tarfile.TarInfo(name="x/escaped")
+        escaped.size = 5
+        archive.addfile(escaped, io.BytesIO(b"hello"))
+    exported.seek(0)
+    with pytest.raises(IllegalArgumentError):
+        export_service.restore(source=exported, target=TARGET)
+    assert not Path(outside, "escaped").exists()
+    assert not Path(TARGET, export_service.LINKS_FILE).exists()
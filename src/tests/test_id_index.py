@@ -0,0 +1,137 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import uuid
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier import config
+from co.deability.identifier.api import repositories
+from co.deability.identifier.api.repositories import id_index
+from co.deability.identifier.api.repositories.id_index import (
+    DELTA_FILE,
+    INDEX_DIR,
+    MANIFEST_FILE,
+    IdIndex,
+)
+from co.deability.identifier.api.repositories.id_repository_type import IdRepositoryType
+from co.deability.identifier.api.repositories.uuid_repository import UuidRepository
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
+from conftest import test_path
+
+AN_ID: str = "c963ef49afa5483bb1326e9525727140"
+INDEX_PATH: Path = Path(test_path, INDEX_DIR)
+
+
+def _open(rebuild=lambda: [], merge_size: int = 1000) -> IdIndex:
+    return IdIndex(path=INDEX_PATH, rebuild=rebuild, merge_size=merge_size)
+
+
+def test_builds_from_existing_identifiers():
+    identifiers = sorted(uuid.uuid4().hex for _ in range(500))
+    index = _open(rebuild=lambda: identifiers + [AN_ID])
+    assert Path(INDEX_PATH, MANIFEST_FILE).exists()
+    assert AN_ID in index
+    assert all(identifier in index for identifier in identifiers)
+    assert not any(uuid.uuid4().hex in index for _ in range(100))
+    assert list(index) == sorted(identifiers + [AN_ID])
+
+
+def test_additions_are_shared_through_the_delta():
+    writer = _open()
+    reader = _open(rebuild=lambda: [AN_ID])  # not rebuilt; the index exists
+    assert AN_ID not in reader
+    writer.add(identifier=AN_ID)
+    assert AN_ID in reader
+
+
+def test_merges_the_delta_into_segments():
+    writer = _open(merge_size=10)
+    reader = _open()
+    identifiers = []
+    for _ in range(20):
+        batch = [uuid.uuid4().hex for _ in range(7)]
+        writer.add_all(identifiers=batch)
+        identifiers.extend(batch)
+        writer.merge()
+        assert all(identifier in reader for identifier in identifiers)
+    assert not Path(INDEX_PATH, DELTA_FILE).exists()
+    # Segments of similar size are merged, so there are only a few of them.
+    assert len(Path(INDEX_PATH, MANIFEST_FILE).read_text().split()) <= 5
+    assert list(reader) == sorted(identifiers)
+    assert list(_open()) == sorted(identifiers)
+
+
+def test_identifier_exists_consults_index(monkeypatch):
+    monkeypatch.setattr(config, "ID_INDEX", True)
+    monkeypatch.setattr(IdIndex, "_indexes", {})
+    assert not repositories.identifier_exists(identifier=AN_ID)
+    repositories.create_identifier_path(identifier=AN_ID)
+    assert AN_ID in repositories.get_id_index()
+    assert repositories.identifier_exists(identifier=AN_ID)
+    # An identifier the index hasn't seen is reported missing without checking the disk.
+    other_id = "0123456789abcdef0123456789abcdef"
+    repositories.calculate_path(identifier=other_id).mkdir(parents=True)
+    assert not repositories.identifier_exists(identifier=other_id)
+    id_index.remove_index(base_path=test_path)
+    assert not INDEX_PATH.exists()
+
+
+def test_repository_answers_existence_from_index(monkeypatch):
+    monkeypatch.setattr(config, "ID_INDEX", True)
+    monkeypatch.setattr(IdIndex, "_indexes", {})
+    writer = UuidRepository(
+        repository_type=IdRepositoryType.WRITER, base_path=test_path
+    )
+    assert writer.id_index and not writer.bloom_filter
+    identifiers = [writer.create_id()] + writer.create_ids(count=5)
+    reader = UuidRepository(
+        repository_type=IdRepositoryType.READER, base_path=test_path
+    )
+    monkeypatch.setattr(reader, "_path_calculator", None)  # no directory lookups
+    assert all(reader._exists(identifier=identifier) for identifier in identifiers)
+    assert not reader._exists(identifier=uuid.uuid4().hex)
+
+
+def test_identifiers_are_only_indexed_once_created(monkeypatch):
+    monkeypatch.setattr(config, "ID_INDEX", True)
+    monkeypatch.setattr(IdIndex, "_indexes", {})
+    writer = UuidRepository(
+        repository_type=IdRepositoryType.WRITER, base_path=test_path
+    )
+    other_id = "0123456789abcdef0123456789abcdef"
+
+    def fail(*args, **kwargs):
+        raise PermissionError("Permission denied")
+
+    with monkeypatch.context() as failing:
+        failing.setattr(Path, "mkdir", fail)
+        failing.setattr(repositories.os, "mkdir", fail)
+        with pytest.raises(PermissionError):
+            repositories.create_identifier_path(identifier=AN_ID)
+        with pytest.raises(PermissionError):
+            repositories.create_identifier_paths(identifiers=[AN_ID, other_id])
+        assert not writer._serialize(identifier=AN_ID)
+        assert not len(
+            writer._serialize_all(
+                identifiers=IdentifierArray.from_hex(identifiers=[AN_ID, other_id])
+            )
+        )
+    assert not repositories.identifier_exists(identifier=AN_ID)
+    assert not repositories.identifier_exists(identifier=other_id)
+    assert repositories.create_identifier_paths(identifiers=[AN_ID, other_id])
+    assert repositories.identifier_exists(identifier=AN_ID)
+    assert repositories.identifier_exists(identifier=other_id)
@@ -0,0 +1,51 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import time
+
+from co.deability.identifier.api.services.id_pool import IdPool
+
+
+def _wait_for_depth(pool: IdPool, depth: int) -> None:
+    deadline: float = time.monotonic() + 5
+    while pool.stats()["depth"] < depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_pool_hands_out_serialized_identifiers(mock_uuid_repository_writer):
+    pool = IdPool(id_repository=mock_uuid_repository_writer, size=10, low_water=5)
+    identifiers = {pool.get() for _ in range(25)}
+    assert len(identifiers) == 25
+    for identifier in identifiers:
+        assert mock_uuid_repository_writer.exists(identifier=identifier)
+    _wait_for_depth(pool=pool, depth=10)
+    stats = pool.stats()
+    assert stats["depth"] == 10
+    assert stats["refills"] >= 1
+    pool.close()
+
+
+def test_pool_spills_leftovers_for_the_next_pool(mock_uuid_repository_writer):
+    pool = IdPool(id_repository=mock_uuid_repository_writer, size=10, low_water=5)
+    handed_out = pool.get()
+    _wait_for_depth(pool=pool, depth=10)
+    leftovers = pool._pooled()
+    pool.close()
+    assert pool.stats()["depth"] == 0
+    next_pool = IdPool(id_repository=mock_uuid_repository_writer, size=10, low_water=5)
+    assert next_pool.get() == leftovers[0]
+    assert next_pool.stats()["reclaimed"] == 10
+    assert handed_out not in next_pool._pooled()
+    next_pool.close()
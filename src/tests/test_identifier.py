@@ -0,0 +1,45 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import pytest
+
+from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
+from co.deability.identifier.values.Identifier import Identifier
+
+AN_ID: str = "c963ef49afa5483bb1326e9525727140"
+
+
+def test_validates_identifiers():
+    assert Identifier.is_valid(identifier=AN_ID)
+    assert not Identifier.is_valid(identifier=AN_ID.upper())
+    assert not Identifier.is_valid(identifier=AN_ID[:-1] + "g")
+    assert not Identifier.is_valid(identifier=AN_ID[:-1])
+    assert not Identifier.is_valid(identifier=None)
+    assert Identifier.is_valid(identifier=AN_ID[:-1], length=31)
+    with pytest.raises(IllegalIdentifierError):
+        Identifier.from_hex(identifier=f" {AN_ID[1:]}")
+
+
+def test_round_trips_through_bytes():
+    identifier = Identifier.from_hex(identifier=AN_ID)
+    assert bytes(identifier) == bytes.fromhex(AN_ID)
+    assert str(identifier) == identifier.hex() == AN_ID
+    assert len(identifier) == 32
+    assert identifier == Identifier(raw=bytes.fromhex(AN_ID))
+    assert len({identifier, Identifier.from_hex(identifier=AN_ID)}) == 1
+    others = [Identifier.random() for _ in range(20)]
+    assert [other.hex() for other in sorted(others)] == sorted(
+        other.hex() for other in others
+    )
@@ -0,0 +1,62 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import uuid
+
+import pytest
+
+from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
+from co.deability.identifier.values.Identifier import Identifier
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
+
+
+def test_mints_uuids_with_a_prefix():
+    identifiers = IdentifierArray.random(count=100, prefix="abc")
+    assert len(identifiers) == 100
+    for identifier in identifiers.hexes():
+        assert identifier.startswith("abc")
+        assert uuid.UUID(identifier).version == 4
+        assert uuid.UUID(identifier).variant == uuid.RFC_4122
+    assert len(set(identifiers.hexes())) == 100
+
+
+def test_converts_to_and_from_strings():
+    hexes = [uuid.uuid4().hex for _ in range(10)]
+    identifiers = IdentifierArray.from_hex(identifiers=hexes)
+    assert identifiers.hexes() == hexes
+    assert bytes(identifiers) == bytes.fromhex("".join(hexes))
+    assert [identifier.hex() for identifier in identifiers] == hexes
+    assert identifiers[-1] == Identifier.from_hex(identifier=hexes[-1])
+    assert identifiers[2:8:3].hexes() == hexes[2:8:3]
+    assert identifiers.sorted().hexes() == sorted(hexes)
+    with pytest.raises(IllegalIdentifierError):
+        IdentifierArray.from_hex(identifiers=hexes + [hexes[0][:-1] + "G"])
+    with pytest.raises(IllegalIdentifierError):
+        # The right total length, but not the right lengths
+        IdentifierArray.from_hex(identifiers=[hexes[0] + "a", hexes[1][1:]])
+
+
+def test_finds_only_whole_identifiers():
+    identifiers = IdentifierArray.from_hex(
+        identifiers=["00" * 8 + "11" * 8, "22" * 8 + "33" * 8]
+    )
+    assert Identifier.from_hex(identifier="22" * 8 + "33" * 8) in identifiers
+    # Spans the boundary between the two identifiers
+    assert Identifier.from_hex(identifier="11" * 8 + "22" * 8) not in identifiers
+    last = identifiers.pop()
+    assert last not in identifiers and len(identifiers) == 1
+    identifiers.extend(IdentifierArray.random(count=3))
+    identifiers.append(last)
+    assert len(identifiers) == 5 and identifiers[4] == last
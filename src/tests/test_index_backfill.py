@@ -0,0 +1,42 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+from co.deability.identifier.api.services import entity_service
+from co.deability.identifier.tools.index_backfill import backfill
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"name": {"type": "string"}, "city": {"type": "string"}},
+}
+INDEXED_SCHEMA = {
+    "type": "object",
+    "properties": {"city": {"type": "string", "x-index": True}},
+}
+
+
+def test_backfills_new_indexed_fields(setup_entity_repository):
+    entity_repository.add_schema(schema=SCHEMA, name="place")
+    created = entity_service.add_entity(
+        entity={"name": "Union Station", "city": "Denver"}, entity_type="place"
+    )["created"]
+    assert index_repository.find_entity_ids(index={"city": "Denver"}) == []
+    entity_repository.update_schema(schema=INDEXED_SCHEMA, name="place")
+    assert backfill(entity_type="place") == 1
+    assert backfill(entity_type="place") == 1
+    assert index_repository.find_entity_ids(index={"city": "Denver"}) == [created]
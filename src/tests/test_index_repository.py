@@ -0,0 +1,107 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+from co.deability.identifier.errors.BadRequestError import BadRequestError
+from conftest import test_path
+
+PERSON = {"entity type": "person"}
+DENVER = {"city": "Denver"}
+BOULDER = {"city": "Boulder"}
+INACTIVE = {"status": "inactive"}
+
+
+def _add(entity, *terms) -> str:
+    identifier = entity_repository.create_entity(entity=entity)
+    for term in terms:
+        index_repository.create_index(identifier=identifier, index=term)
+    return identifier
+
+
+def test_combines_search_terms(setup_entity_repository):
+    ann = _add({"name": "Ann"}, PERSON, DENVER)
+    bob = _add({"name": "Bob"}, PERSON, BOULDER, INACTIVE)
+    cat = _add({"name": "Cat"}, PERSON, DENVER, INACTIVE)
+    _add({"name": "Denver Zoo"}, DENVER)
+    assert index_repository.find_matching_entity_ids(
+        query={"$and": [PERSON, DENVER]}
+    ) == sorted([ann, cat])
+    assert index_repository.find_matching_entity_ids(
+        query={"$and": [PERSON, {"$or": [DENVER, BOULDER]}, {"$not": INACTIVE}]}
+    ) == [ann]
+    assert index_repository.find_matching_entities(
+        query={"$and": [{"$or": [BOULDER, {"city": "Aspen"}]}, PERSON]}
+    ) == {bob: {"name": "Bob"}}
+
+
+def test_finds_each_current_entity_once(setup_entity_repository):
+    ann = _add({"name": "Ann"}, DENVER)
+    updated = entity_repository.update_entity(identifier=ann, entity={"name": "Ann B"})
+    index_repository.create_index(identifier=updated, index=DENVER)
+    assert index_repository.find_entity_ids(index=DENVER) == [updated]
+    assert list(index_repository.iter_entities(index=DENVER)) == [
+        (updated, {"name": "Ann B"})
+    ]
+
+
+def test_evaluates_smallest_terms_first(setup_entity_repository, monkeypatch):
+    _add({"name": "Ann"}, PERSON, DENVER)
+    _add({"name": "Bob"}, PERSON)
+    evaluated = []
+    find_entity_ids = index_repository.find_entity_ids
+
+    def spy(index):
+        evaluated.append(index)
+        return find_entity_ids(index=index)
+
+    monkeypatch.setattr(index_repository, "find_entity_ids", spy)
+    index_repository.find_matching_entity_ids(query={"$and": [PERSON, DENVER]})
+    assert evaluated == [DENVER, PERSON]
+    evaluated.clear()
+    index_repository.find_matching_entity_ids(query={"$and": [PERSON, BOULDER]})
+    assert evaluated == [BOULDER]
+
+
+def test_rejects_unbounded_queries():
+    with pytest.raises(BadRequestError):
+        index_repository.find_matching_entity_ids(query={"$not": PERSON})
+    with pytest.raises(BadRequestError):
+        index_repository.find_matching_entity_ids(query={"$and": [{"$not": PERSON}]})
+    with pytest.raises(BadRequestError):
+        index_repository.find_matching_entity_ids(query={"$or": PERSON})
+    with pytest.raises(BadRequestError):
+        index_repository.find_matching_entity_ids(
+            query={"$and": [PERSON, {"$not": INACTIVE, "city": "Denver"}]}
+        )
+
+
+def test_estimates_large_indexes_without_listing_them(monkeypatch):
+    index_path = Path(test_path, "links")
+    index_path.mkdir()
+    for number in range(1000):
+        Path(index_path, f"{number:012d}_data.json").symlink_to(test_path)
+    with monkeypatch.context() as patched:
+        patched.setattr(
+            index_repository.os, "scandir", lambda path: pytest.fail("listed the index")
+        )
+        estimate = index_repository._count_links(index_identifier_path=index_path)
+    assert 500 < estimate < 2000
@@ -0,0 +1,67 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.services import layout_service
+from co.deability.identifier.tools import layout_migration
+from conftest import test_path
+
+FIRST_ID: str = "c963ef49afa5483bb1326e9525727140"
+SECOND_ID: str = "0123456789abcdef0123456789abcdef"
+SOURCE: Path = Path(test_path, "source")
+TARGET: Path = Path(test_path, "target")
+
+
+def _legacy_tree() -> None:
+    first_dir = layout_service.identifier_path(SOURCE, FIRST_ID, shard_widths=())
+    second_dir = layout_service.identifier_path(SOURCE, SECOND_ID, shard_widths=())
+    first_dir.mkdir(parents=True)
+    second_dir.mkdir(parents=True)
+    Path(first_dir, "1_data.json").write_text(json.dumps({"foo": "bar"}))
+    os.symlink(Path(first_dir, "1_data.json"), Path(second_dir, "2.json"))
+    Path(SOURCE, "schema").mkdir()
+    Path(SOURCE, "schema", "person.json").write_text("{}")
+
+
+def test_migrates_legacy_tree_to_sharded_layout():
+    _legacy_tree()
+    moved = layout_migration.migrate(
+        source=SOURCE, target=TARGET, from_widths=(), to_widths=(2, 2)
+    )
+    assert moved == 2
+    first_dir = Path(TARGET, "c9/63/ef49afa5483bb1326e9525727140")
+    second_dir = Path(TARGET, "01/23/456789abcdef0123456789abcdef")
+    assert json.loads(Path(first_dir, "1_data.json").read_text()) == {"foo": "bar"}
+    link = Path(second_dir, "2.json")
+    assert link.is_symlink()
+    assert link.readlink() == Path(first_dir, "1_data.json")
+    assert Path(TARGET, "schema", "person.json").exists()
+    assert not any(SOURCE.iterdir())
+
+
+def test_refuses_non_empty_target():
+    _legacy_tree()
+    TARGET.mkdir()
+    Path(TARGET, "something").write_text("")
+    with pytest.raises(IllegalArgumentError):
+        layout_migration.migrate(
+            source=SOURCE, target=TARGET, from_widths=(), to_widths=(2, 2)
+        )
@@ -0,0 +1,52 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
+from co.deability.identifier.services import layout_service
+from conftest import test_path
+
+AN_ID: str = "c963ef49afa5483bb1326e9525727140"
+
+
+def test_default_layout_is_one_directory_per_character():
+    assert layout_service.identifier_parts(AN_ID, shard_widths=()) == list(AN_ID)
+    assert layout_service.identifier_depth(32, shard_widths=()) == 32
+
+
+def test_sharded_layout():
+    assert layout_service.identifier_parts(AN_ID, shard_widths=(2, 2)) == [
+        "c9",
+        "63",
+        "ef49afa5483bb1326e9525727140",
+    ]
+    assert layout_service.identifier_path(
+        base_path=test_path, identifier=AN_ID, shard_widths=(2, 2)
+    ) == Path(test_path, "c9/63/ef49afa5483bb1326e9525727140")
+    assert layout_service.identifier_depth(32, shard_widths=(2, 2)) == 3
+
+
+def test_parses_shard_widths():
+    assert layout_service.parse_shard_widths("") == ()
+    assert layout_service.parse_shard_widths("2, 2") == (2, 2)
+    with pytest.raises(IllegalArgumentError):
+        layout_service.parse_shard_widths("two")
+    with pytest.raises(IllegalArgumentError):
+        layout_service.parse_shard_widths("0,2")
+    with pytest.raises(IllegalArgumentError):
+        layout_service.parse_shard_widths("8,8,1")
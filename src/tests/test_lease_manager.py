@@ -0,0 +1,98 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories import lease_manager
+from co.deability.identifier.api.repositories.id_repository_type import IdRepositoryType
+from co.deability.identifier.api.repositories.lease_manager import (
+    LEASE_DIR,
+    LeaseManager,
+)
+from co.deability.identifier.api.repositories.uuid_repository import UuidRepository
+from co.deability.identifier.errors.TooManyRetriesError import TooManyRetriesError
+from conftest import test_path
+
+LEASE_PATH: Path = Path(test_path, LEASE_DIR)
+
+
+def _write_lease(prefix: str, holder: dict) -> Path:
+    LEASE_PATH.mkdir(exist_ok=True)
+    lease = Path(LEASE_PATH, f"{prefix}.lease")
+    lease.write_text(json.dumps(holder))
+    return lease
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_leases_distinct_prefixes():
+    first = LeaseManager(base_path=test_path, width=1, ttl=60)
+    second = LeaseManager(base_path=test_path, width=1, ttl=60)
+    assert len(first.prefix()) == 1
+    assert first.prefix() != second.prefix()
+    holder = json.loads(Path(LEASE_PATH, f"{first.prefix()}.lease").read_text())
+    assert holder["pid"] == os.getpid()
+    first_prefix = first.prefix()
+    first.release()
+    assert not Path(LEASE_PATH, f"{first_prefix}.lease").exists()
+    assert len(list(LEASE_PATH.glob("*.lease"))) == 1
+
+
+def test_reclaims_leases_of_dead_holders(monkeypatch):
+    monkeypatch.setattr(lease_manager.random, "getrandbits", lambda bits: 10)
+    lease = _write_lease(
+        prefix="a",
+        holder={"host": lease_manager.socket.gethostname(), "pid": _dead_pid()},
+    )
+    manager = LeaseManager(base_path=test_path, width=1, ttl=60)
+    assert manager.prefix() == "a"
+    assert json.loads(lease.read_text())["pid"] == os.getpid()
+
+
+def test_reclaims_expired_leases_from_other_hosts(monkeypatch):
+    monkeypatch.setattr(lease_manager.random, "getrandbits", lambda bits: 10)
+    lease = _write_lease(prefix="a", holder={"host": "elsewhere", "pid": 1})
+    stale = LeaseManager(base_path=test_path, width=1, ttl=60)
+    monkeypatch.setattr(lease_manager, "MAX_ACQUIRE_ATTEMPTS", 3)
+    with pytest.raises(TooManyRetriesError):
+        stale.prefix()
+    expired = time.time() - 120
+    os.utime(lease, (expired, expired))
+    assert stale.prefix() == "a"
+
+
+def test_repository_mints_identifiers_in_its_leased_block(monkeypatch):
+    monkeypatch.setattr(config, "LEASE_PREFIX_WIDTH", 3)
+    monkeypatch.setattr(LeaseManager, "_managers", {})
+    writer = UuidRepository(
+        repository_type=IdRepositoryType.WRITER, base_path=test_path
+    )
+    prefix = writer.lease_manager.prefix()
+    identifiers = [writer.create_id()] + writer.create_ids(count=10)
+    assert all(identifier.startswith(prefix) for identifier in identifiers)
+    assert all(writer.exists(identifier=identifier) for identifier in identifiers)
+    writer.lease_manager.release()
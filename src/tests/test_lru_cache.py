@@ -0,0 +1,46 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import time
+
+from co.deability.identifier.api.repositories.lru_cache import LruCache, MISSING
+
+
+def test_evicts_least_recently_used_entries():
+    cache = LruCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "size": 2,
+        "max size": 2,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+
+def test_expires_entries_with_a_ttl():
+    cache = LruCache(max_size=10)
+    cache.put("a", False, ttl=0.01)
+    assert cache.get("a") is False
+    time.sleep(0.02)
+    assert cache.get("a") is MISSING
+    cache.put("b", False, ttl=0)
+    assert cache.get("b") is MISSING
@@ -0,0 +1,100 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import time
+import uuid
+from pathlib import Path
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories import entities
+from co.deability.identifier.api.repositories.entities import (
+    entity_repository,
+    index_repository,
+)
+from co.deability.identifier.api.repositories.entities.posting_list import (
+    BUFFER_FILE,
+    COMPACTING_FILE,
+    POSTINGS_FILE,
+    PostingList,
+)
+from conftest import test_path
+
+POSTINGS_PATH: Path = Path(test_path, "postings")
+
+
+def _posting_list(buffer_size: int = 1000) -> PostingList:
+    POSTINGS_PATH.mkdir(exist_ok=True)
+    return PostingList(
+        path=POSTINGS_PATH, identifier_length=32, buffer_size=buffer_size
+    )
+
+
+def test_lists_sorted_unique_entries_across_compactions():
+    postings = _posting_list()
+    identifiers = [uuid.uuid4().hex for _ in range(20)]
+    for identifier in identifiers[:10]:
+        postings.add(identifier=identifier)
+    postings.compact()
+    assert Path(POSTINGS_PATH, POSTINGS_FILE).exists()
+    assert not Path(POSTINGS_PATH, BUFFER_FILE).exists()
+    for identifier in identifiers[5:]:
+        postings.add(identifier=identifier)
+    assert list(postings) == sorted(identifiers)
+    assert len(postings) == 25
+    assert identifiers[0] in postings and identifiers[19] in postings
+    assert uuid.uuid4().hex not in postings
+    postings.compact()
+    assert list(postings) == sorted(identifiers)
+    assert len(postings) == 20
+    postings.remove(identifier=identifiers[0])
+    postings.remove(identifier=identifiers[1])
+    postings.add(identifier=identifiers[1])
+    assert identifiers[0] not in postings and identifiers[1] in postings
+    assert list(postings) == sorted(identifiers[1:])
+    postings.compact()
+    assert list(postings) == sorted(identifiers[1:])
+    postings.remove_all()
+    assert list(postings) == [] and not postings.exists()
+
+
+def test_compacts_full_buffers_in_the_background():
+    postings = _posting_list(buffer_size=5)
+    for _ in range(5):
+        postings.add(identifier=uuid.uuid4().hex)
+    for _ in range(100):
+        if not any(
+            Path(POSTINGS_PATH, name).exists()
+            for name in (BUFFER_FILE, COMPACTING_FILE)
+        ):
+            break
+        time.sleep(0.01)
+    assert Path(POSTINGS_PATH, POSTINGS_FILE).stat().st_size == 5 * 16
+
+
+def test_index_repository_reads_both_formats(monkeypatch, setup_entity_repository):
+    index = {"entity type": "posting"}
+    first = entity_repository.create_entity(entity={"foo": "bar"})
+    second = entity_repository.create_entity(entity={"fizz": "buzz"})
+    index_repository.create_index(identifier=first, index=index)
+    monkeypatch.setattr(config, "INDEX_FORMAT", "postings")
+    index_repository.create_index(identifier=second, index=index)
+    assert index_repository.find_entities(index=index) == {
+        first: {"foo": "bar"},
+        second: {"fizz": "buzz"},
+    }
+    index_repository.delete_index(
+        index_identifier=entities.calculate_id_from_data(data=index)
+    )
+    assert index_repository.find_entities(index=index) == {}
@@ -0,0 +1,52 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import threading
+import uuid
+
+import pytest
+
+from co.deability.identifier import config
+from co.deability.identifier.api.services import read_pool
+from co.deability.identifier.errors.BadRequestError import BadRequestError
+from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
+
+
+def test_reads_each_identifier_once_in_order_on_the_read_threads(monkeypatch):
+    monkeypatch.setattr(config, "READ_THREADS", 4)
+    identifiers = [uuid.uuid4().hex for _ in range(5)]
+    threads = set()
+
+    def read(identifier):
+        threads.add(threading.current_thread().name)
+        return identifier.upper()
+
+    result = read_pool.read_all(
+        identifiers=identifiers + identifiers[:2], read=read, length=32
+    )
+    assert list(result.items()) == [
+        (identifier, identifier.upper()) for identifier in identifiers
+    ]
+    assert all(name.startswith("identifier-reader") for name in threads)
+
+
+def test_validates_every_identifier_before_reading():
+    read = lambda identifier: pytest.fail("nothing should be read")
+    with pytest.raises(IllegalIdentifierError):
+        read_pool.read_all(
+            identifiers=[uuid.uuid4().hex, "foobar"], read=read, length=32
+        )
+    with pytest.raises(BadRequestError):
+        read_pool.read_all(identifiers="foobar", read=read, length=32)
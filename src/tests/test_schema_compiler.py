@@ -0,0 +1,115 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import random
+
+from jsonschema.validators import validator_for
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories.entities import entity_repository
+from co.deability.identifier.services import schema_compiler, validator_service
+from co.deability.identifier.services.schema_compiler import CompiledValidator
+
+SCHEMA = {
+    "type": "object",
+    "required": ["name", "age"],
+    "additionalProperties": False,
+    "properties": {
+        "name": {
+            "type": "string",
+            "minLength": 1,
+            "maxLength": 10,
+            "pattern": "^[A-Z]",
+        },
+        "age": {"type": "integer", "minimum": 0, "exclusiveMaximum": 150},
+        "status": {"enum": ["active", "inactive", 1, True]},
+        "tags": {
+            "type": "array",
+            "items": {"type": "string"},
+            "minItems": 1,
+            "maxItems": 3,
+        },
+        "address": {
+            "type": ["object", "null"],
+            "properties": {"city": {"type": "string", "x-index": True}},
+            "additionalProperties": {"type": "number"},
+            "minProperties": 1,
+        },
+        "kind": {"const": {"a": [1, 2]}},
+    },
+}
+VALUES = [None, True, False, 0, 1, 1.0, 1.5, -1, 150, "", "Ann", "ann", "Abcdefghijkl"]
+VALUES += [[], ["a"], ["a", 1], ["a", "b", "c", "d"], {}, {"city": "X"}, {"city": 1}]
+VALUES += [{"zip": 5}, {"zip": "5"}, "active", {"a": [1, 2]}, {"a": [True, 2]}]
+
+
+def test_agrees_with_jsonschema():
+    compiled = schema_compiler.compile_schema(schema=SCHEMA)
+    interpreted = validator_for(SCHEMA)(SCHEMA)
+    generator = random.Random(1)
+    valid = 0
+    for _ in range(5000):
+        instance = {
+            key: generator.choice(VALUES)
+            for key in ("name", "age", "status", "tags", "address", "kind", "extra")
+            if generator.random() < 0.5
+        }
+        if generator.random() < 0.7:
+            instance.update(name="Ann", age=3)
+            instance.pop("extra", None)
+        assert compiled.is_valid(instance) == interpreted.is_valid(instance), instance
+        valid += compiled.is_valid(instance)
+    assert valid
+    assert not compiled.is_valid(["not", "an", "object"])
+
+
+def test_compiles_non_finite_bounds():
+    for limit in (float("inf"), float("-inf"), float("nan")):
+        schema = {"type": "number", "maximum": limit, "exclusiveMinimum": limit}
+        compiled = schema_compiler.compile_schema(schema=schema)
+        interpreted = validator_for(schema)(schema)
+        for instance in (5, -5.5, float("inf")):
+            assert compiled.is_valid(instance) == interpreted.is_valid(instance)
+
+
+def test_does_not_compile_unsupported_keywords():
+    assert schema_compiler.compile_schema(schema={"$ref": "#/$defs/a"}) is None
+    assert (
+        schema_compiler.compile_schema(
+            schema={"properties": {"a": {"allOf": [{"type": "string"}]}}}
+        )
+        is None
+    )
+    assert (
+        schema_compiler.compile_schema(
+            schema={"properties": {"a": {"type": "number", "exclusiveMinimum": True}}}
+        )
+        is None
+    )
+
+
+def test_registry_uses_compiled_validators_when_enabled(monkeypatch):
+    monkeypatch.setattr(config, "VALIDATOR_ENGINE", "compiled")
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    entity_repository.add_schema(
+        schema={"type": "object", "properties": {"a": {"$ref": "#/$defs/a"}}},
+        name="place",
+    )
+    assert isinstance(
+        validator_service.get_validator(entity_type="person"), CompiledValidator
+    )
+    assert not isinstance(
+        validator_service.get_validator(entity_type="place"), CompiledValidator
+    )
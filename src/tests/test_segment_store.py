@@ -0,0 +1,141 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories.id_repository_type import IdRepositoryType
+from co.deability.identifier.api.repositories.segment_store import SegmentStore
+from co.deability.identifier.api.repositories.uuid_repository import UuidRepository
+from conftest import test_path
+
+AN_ID: str = "c963ef49afa5483bb1326e9525727140"
+ANOTHER_ID: str = "0123456789abcdef0123456789abcdef"
+SEGMENT_PATH: Path = Path(test_path, "segments")
+
+
+@pytest.fixture
+def open_store():
+    """
+    Opens stores at SEGMENT_PATH, and closes them once the test is done.
+    """
+    stores = []
+
+    def open_store(**kwargs) -> SegmentStore:
+        store = SegmentStore(path=SEGMENT_PATH, **kwargs)
+        stores.append(store)
+        return store
+
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+def test_adds_identifiers_once(open_store):
+    store = open_store()
+    assert not store.contains(identifier=AN_ID)
+    assert store.add_identifier(identifier=AN_ID)
+    assert not store.add_identifier(identifier=AN_ID)
+    assert store.contains(identifier=AN_ID)
+
+
+def test_adds_batches_of_identifiers_in_one_write(open_store):
+    store = open_store()
+    store.add_identifier(identifier=AN_ID)
+    assert store.add_identifiers(identifiers=[AN_ID, ANOTHER_ID, ANOTHER_ID]) == [
+        ANOTHER_ID
+    ]
+    assert store.contains(identifier=ANOTHER_ID)
+
+
+def test_records_data_in_order(open_store):
+    store = open_store()
+    store.add_identifier(identifier=AN_ID)
+    assert store.current_data(identifier=AN_ID) is None
+    first_name = store.append_data(identifier=AN_ID, data={"foo": "bar baz"})
+    second_name = store.append_data(identifier=AN_ID, data={"fizz": "buzz"})
+    assert first_name < second_name
+    assert store.current_data(identifier=AN_ID) == (second_name, {"fizz": "buzz"})
+    assert store.all_data(identifier=AN_ID) == [
+        (first_name, {"foo": "bar baz"}),
+        (second_name, {"fizz": "buzz"}),
+    ]
+
+
+def test_rebuilds_index_from_rolled_segments(open_store):
+    store = open_store(max_segment_size=64)
+    store.add_identifier(identifier=AN_ID)
+    store.add_identifier(identifier=ANOTHER_ID)
+    name = store.append_data(identifier=ANOTHER_ID, data={"foo": "bar"})
+    assert len(list(SEGMENT_PATH.glob("*.seg"))) > 1
+    reopened = open_store(max_segment_size=64)
+    assert reopened.contains(identifier=AN_ID)
+    assert reopened.current_data(identifier=ANOTHER_ID) == (name, {"foo": "bar"})
+
+
+def test_sees_records_appended_by_other_processes(open_store):
+    reader = open_store()
+    writer = open_store()
+    writer.add_identifier(identifier=AN_ID)
+    name = writer.append_data(identifier=AN_ID, data={"foo": "bar"})
+    assert reader.contains(identifier=AN_ID)
+    assert reader.current_data(identifier=AN_ID) == (name, {"foo": "bar"})
+    assert not reader.add_identifier(identifier=AN_ID)
+
+
+def test_recovers_from_a_torn_tail(open_store):
+    store = open_store()
+    store.add_identifier(identifier=AN_ID)
+    # The partial record of a write interrupted by a crash
+    with open(next(SEGMENT_PATH.glob("*.seg")), "ab") as segment:
+        segment.write(b"deadbeef")
+    assert store.add_identifier(identifier=ANOTHER_ID)
+    reopened = open_store()
+    assert reopened.contains(identifier=AN_ID)
+    assert reopened.contains(identifier=ANOTHER_ID)
+    assert not reopened.contains(identifier="deadbeef")
+
+
+def test_uuid_repository_uses_segment_engine(monkeypatch, open_store):
+    monkeypatch.setattr(config, "STORAGE_ENGINE", "segment")
+    repository = UuidRepository(
+        repository_type=IdRepositoryType.WRITER, base_path=test_path
+    )
+    repository.segment_store = open_store()
+    identifier = repository.create_id()
+    assert not repository._path_calculator(identifier=identifier).exists()
+    repository.add_data(data={"foo": "bar"}, identifier=identifier)
+    current = repository.get_current_data(identifier=identifier)
+    assert list(current.values()) == [{"foo": "bar"}]
+    assert repository.get_all_data(identifier=identifier) == current
+
+
+def test_keeps_only_the_newest_segment_open(open_store):
+    before = len(os.listdir("/proc/self/fd"))
+    store = open_store(max_segment_size=64)
+    for identifier in (AN_ID, ANOTHER_ID, AN_ID[::-1], ANOTHER_ID[::-1]):
+        store.add_identifier(identifier=identifier)
+    name = store.append_data(identifier=AN_ID, data={"foo": "bar"})
+    assert len(list(SEGMENT_PATH.glob("*.seg"))) > 2
+    assert len(store._descriptors) == 1
+    reopened = open_store(max_segment_size=64)
+    assert reopened.current_data(identifier=AN_ID) == (name, {"foo": "bar"})
+    assert len(reopened._descriptors) == 1
+    store.close()
+    reopened.close()
+    assert len(os.listdir("/proc/self/fd")) == before
@@ -24,12 +24,16 @@ from co.deability.identifier.errors.BadRepositoryError import BadRepositoryError
 from co.deability.identifier.errors.IllegalArgumentError import IllegalArgumentError
 from co.deability.identifier.errors.IllegalIdentifierError import IllegalIdentifierError
 from co.deability.identifier.api.repositories.uuid_repository import (
+    CURRENT_FILE,
+    DATA_FILE,
     UuidRepository,
+    data_timestamp,
     _is_valid,
     _generate_id,
 )
 from co.deability.identifier.api.repositories.id_repository_type import IdRepositoryType
 from co.deability.identifier.errors.TooManyRetriesError import TooManyRetriesError
+from co.deability.identifier.values.IdentifierArray import IdentifierArray
 from conftest import test_path
 
 
@@ -122,9 +126,99 @@ def test_create_id_with_failed_retries_raises_correct_error(
     mock_uuid_repository_writer._serialize = holder
 
 
+def test_repository_creates_batches_of_ids(mock_uuid_repository_writer):
+    ids = mock_uuid_repository_writer.create_ids(count=50)
+    assert len(set(ids)) == 50
+    for an_id in ids:
+        assert mock_uuid_repository_writer._path_calculator(an_id).is_dir()
+    with pytest.raises(IllegalArgumentError):
+        mock_uuid_repository_writer.create_ids(count=0)
+
+
+def test_create_ids_replaces_ids_that_could_not_be_serialized(
+    mock_uuid_repository_writer,
+):
+    holder = mock_uuid_repository_writer._serialize_all
+    mock_uuid_repository_writer._serialize_all = lambda identifiers: identifiers[:1]
+    assert len(mock_uuid_repository_writer.create_ids(count=3, retries=2)) == 3
+    with pytest.raises(TooManyRetriesError):
+        mock_uuid_repository_writer.create_ids(count=3, retries=1)
+    mock_uuid_repository_writer._serialize_all = holder
+
+
 def test_repository_checks_identifier_existence_correctly(mock_uuid_repository_writer):
     an_id = mock_uuid_repository_writer.create_id()
     assert mock_uuid_repository_writer.exists(identifier=an_id)
 
     with pytest.raises(IllegalIdentifierError):
         mock_uuid_repository_writer.exists(identifier="foobar")
+
+
+def test_repository_checks_batches_of_identifiers(mock_uuid_repository_writer):
+    created = mock_uuid_repository_writer.create_ids(count=5)
+    # Siblings sharing a parent directory, so that it's only visited once
+    siblings = [created[0][:-1] + character for character in "0123"]
+    mock_uuid_repository_writer._serialize_all(
+        identifiers=IdentifierArray.from_hex(identifiers=siblings[:3])
+    )
+    for an_id in created + siblings:
+        mock_uuid_repository_writer._exists_cache.invalidate(an_id)
+    missing = _generate_id()
+    identifiers = [missing] + siblings + created + [missing]
+    results = mock_uuid_repository_writer.exists_many(
+        identifiers=IdentifierArray.from_hex(identifiers=identifiers)
+    )
+    assert results == [an_id in created + siblings[:3] for an_id in identifiers]
+
+
+def test_repository_does_not_cache_missing_identifiers(mock_uuid_repository_reader):
+    an_id = _generate_id()
+    assert not mock_uuid_repository_reader.exists(identifier=an_id)
+    # e.g. created by another worker
+    mock_uuid_repository_reader._path_calculator(identifier=an_id).mkdir(parents=True)
+    assert mock_uuid_repository_reader.exists(identifier=an_id)
+    hits = mock_uuid_repository_reader.cache_stats()["exists"]["hits"]
+    assert mock_uuid_repository_reader.exists(identifier=an_id)
+    assert mock_uuid_repository_reader.cache_stats()["exists"]["hits"] == hits + 1
+
+
+def test_repository_points_at_current_data(mock_uuid_repository_writer):
+    an_id = mock_uuid_repository_writer.create_id()
+    for version in range(3):
+        mock_uuid_repository_writer.add_data(
+            data={"version": version}, identifier=an_id
+        )
+    current = mock_uuid_repository_writer.get_current_data(identifier=an_id)
+    assert list(current.values()) == [{"version": 2}]
+    id_folder = mock_uuid_repository_writer._path_calculator(identifier=an_id)
+    oldest = sorted(id_folder.glob(f"*{DATA_FILE}"))[0]
+    mock_uuid_repository_writer._point_current(data_path=oldest)
+    assert mock_uuid_repository_writer.get_current_data(identifier=an_id) == current
+    Path(id_folder, CURRENT_FILE).unlink()
+    assert mock_uuid_repository_writer.get_current_data(identifier=an_id) == current
+
+
+def test_repository_pages_through_data(mock_uuid_repository_writer):
+    an_id = mock_uuid_repository_writer.create_id()
+    for version in range(5):
+        mock_uuid_repository_writer.add_data(
+            data={"version": version}, identifier=an_id
+        )
+    names = list(mock_uuid_repository_writer.get_all_data(identifier=an_id))
+    assert names == sorted(names, reverse=True)
+    page, cursor = mock_uuid_repository_writer.get_data_page(identifier=an_id, limit=2)
+    assert list(page.values()) == [{"version": 4}, {"version": 3}]
+    page, cursor = mock_uuid_repository_writer.get_data_page(
+        identifier=an_id, limit=2, cursor=cursor
+    )
+    assert list(page.values()) == [{"version": 2}, {"version": 1}]
+    page, cursor = mock_uuid_repository_writer.get_data_page(
+        identifier=an_id, limit=2, cursor=cursor
+    )
+    assert list(page.values()) == [{"version": 0}] and cursor is None
+    window = mock_uuid_repository_writer.get_all_data(
+        identifier=an_id,
+        since=data_timestamp(name=names[3]),
+        until=data_timestamp(name=names[1]),
+    )
+    assert list(window) == names[2:4]
@@ -0,0 +1,119 @@
+"""
+Copyright © 2021 William L Horvath II
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from co.deability.identifier import config
+from co.deability.identifier.api.repositories.entities import entity_repository
+from co.deability.identifier.errors.BadRequestError import BadRequestError
+from co.deability.identifier.services import validator_service
+
+SCHEMA = {"type": "object", "properties": {"name": {"type": "string"}}}
+
+
+def test_compiles_each_schema_once():
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    validator = validator_service.get_validator(entity_type="person")
+    assert validator.is_valid({"name": "Ann"})
+    assert not validator.is_valid({"name": 1})
+    assert validator_service.get_validator(entity_type="person") is validator
+    assert validator_service.get_validator(entity_type="place") is None
+
+
+def test_recompiles_changed_schema():
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    validator = validator_service.get_validator(entity_type="person")
+    entity_repository.update_schema(
+        schema={"type": "object", "properties": {"name": {"type": "integer"}}},
+        name="person",
+    )
+    updated = validator_service.get_validator(entity_type="person")
+    assert updated is not validator
+    assert updated.is_valid({"name": 1})
+
+
+def test_notices_schema_added_by_another_process(monkeypatch):
+    monkeypatch.setattr(config, "SCHEMA_REFRESH_INTERVAL", 0)
+    assert validator_service.get_validator(entity_type="person") is None
+    Path(config.SCHEMA_PATH, "person.json").write_text(json.dumps(SCHEMA))
+    assert validator_service.get_validator(entity_type="person").is_valid(
+        {"name": "Ann"}
+    )
+
+
+def test_notices_schema_changed_in_place_by_another_process(monkeypatch):
+    monkeypatch.setattr(config, "SCHEMA_REFRESH_INTERVAL", 0)
+    Path(config.SCHEMA_PATH, "places").mkdir()
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    assert validator_service.get_validator(entity_type="person").is_valid(
+        {"name": "Ann"}
+    )
+    # Neither change touches the schema directory itself
+    with open(Path(config.SCHEMA_PATH, "person.json"), "r+") as schema_file:
+        schema_file.write(json.dumps({"type": "array"}))
+        schema_file.truncate()
+    assert not validator_service.get_validator(entity_type="person").is_valid(
+        {"name": "Ann"}
+    )
+    Path(config.SCHEMA_PATH, "places", "place.json").write_text(json.dumps(SCHEMA))
+    assert validator_service.get_validator(entity_type="place") is not None
+
+
+def test_recompiles_schema_rewritten_within_the_same_tick(monkeypatch):
+    monkeypatch.setattr(config, "SCHEMA_REFRESH_INTERVAL", 0)
+    entity_repository.add_schema(schema=SCHEMA, name="person")
+    assert validator_service.get_validator(entity_type="person").is_valid(
+        {"name": "Ann"}
+    )
+    schema_path = Path(config.SCHEMA_PATH, "person.json")
+    modified = schema_path.stat().st_mtime_ns
+    schema_path.write_text(json.dumps({"type": "array"}))
+    os.utime(schema_path, ns=(modified, modified))
+    assert not validator_service.get_validator(entity_type="person").is_valid(
+        {"name": "Ann"}
+    )
+
+
+def test_reads_indexed_fields_without_rescanning_schema(monkeypatch):
+    monkeypatch.setattr(config, "SCHEMA_REFRESH_INTERVAL", 60)
+    entity_repository.add_schema(
+        schema={
+            "type": "object",
+            "properties": {"name": {"type": "string", "x-index": True}},
+        },
+        name="person",
+    )
+    assert entity_repository.get_indexed_fields(entity_type="Person") == ["name"]
+
+    def rescan(schema_paths):
+        raise AssertionError("The schema directory was scanned again.")
+
+    monkeypatch.setattr(validator_service, "_stamp", rescan)
+    assert entity_repository.get_indexed_fields(entity_type="person") == ["name"]
+    assert entity_repository.get_indexed_fields(entity_type="place") == []
+
+
+def test_rejects_entities_of_type_with_invalid_schema():
+    entity_repository.add_schema(
+        schema={"type": "object", "properties": {"name": {"type": "text"}}},
+        name="person",
+    )
+    assert "person" in validator_service.known_schema()
+    with pytest.raises(BadRequestError):
+        validator_service.get_validator(entity_type="person")